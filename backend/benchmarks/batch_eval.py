@@ -0,0 +1,94 @@
+"""Run the batch evaluator offline and show that reruns are incremental.
+
+A corpus is ingested with both strategies against the local fakes, then the
+question set is evaluated twice with ``BatchEvaluator`` and a fake feedback
+provider. The first run pays for every query and feedback call; the second
+must reuse all of them from the answer and feedback caches.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/batch_eval.py --docs 50 --questions 40 --feedback-latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+from run import QUESTIONS, WORDS, write_corpus  # noqa: E402
+
+STRATEGIES = ["vector_store", "sentence_window"]
+
+def question_set(count: int):
+    """The benchmark questions plus deterministic keyword variations"""
+    questions = list(QUESTIONS)
+    for i in range(len(questions), count):
+        questions.append(f"What does the corpus say about {WORDS[i % len(WORDS)]} and {WORDS[(i * 7) % len(WORDS)]}?")
+    return questions[:count]
+
+async def run(args):
+    from eval.batch_eval import BatchEvaluator
+    from rag.models import model_registry
+    from services.document_processing import document_processor
+
+    install_fakes(llm_latency_s=args.llm_latency_ms / 1000, feedback_latency_s=args.feedback_latency_ms / 1000)
+    workdir = tempfile.mkdtemp(prefix="bench_eval_")
+    try:
+        paths = write_corpus(workdir, args.docs, args.sentences_per_doc, seed=11)
+        for strategy in STRATEGIES:
+            await document_processor.process_multiple_documents(paths, [os.path.basename(p) for p in paths], strategy)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    provider = model_registry.get_feedback_provider("gemini")
+    evaluator = BatchEvaluator(concurrency=args.concurrency, similarity_top_k=args.top_k)
+    questions = question_set(args.questions)
+
+    runs = []
+    for _ in range(2):
+        calls_before = provider.calls
+        report = await evaluator.run(questions, STRATEGIES)
+        runs.append({
+            "elapsed_s": report["elapsed_s"],
+            "provider_calls": provider.calls - calls_before,
+            **report["stats"],
+        })
+
+    return {
+        "questions": len(questions),
+        "strategies": STRATEGIES,
+        "concurrency": args.concurrency,
+        "first_run": runs[0],
+        "rerun": runs[1],
+        "leaderboard": report["leaderboard"],
+        "summary": report["summary"],
+        "incremental": runs[1]["provider_calls"] == 0 and runs[1]["queries"] == 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--sentences-per-doc", type=int, default=40)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=20.0)
+    parser.add_argument("--feedback-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["incremental"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""One fake MongoDB shared by several processes.
+
+``start_store()`` runs the fake collections in a manager process. Every
+process that calls ``install_fakes(store=connect_store(address, authkey))``
+then gets ``RemoteCollection`` proxies instead of in-process collections, so
+separate uvicorn workers (or test processes) read and write one database the
+way they would share Atlas.
+"""
+import asyncio
+import inspect
+import os
+import threading
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from fakes import FakeCollection, FakeCursor
+
+class _Replace:
+    """ReplaceOne as FakeCollection.bulk_write reads it"""
+
+    def __init__(self, filter: Dict[str, Any], doc: Dict[str, Any], upsert: bool):
+        self._filter, self._doc, self._upsert = filter, doc, upsert
+
+def _drive(coroutine):
+    # FakeCollection coroutines only ever await asyncio.sleep, so no event loop is needed
+    try:
+        while True:
+            coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+
+class _Store:
+    """Fake collections by name; every call runs under one lock, like one mongod"""
+
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+        self._lock = threading.Lock()
+
+    def call(self, name: str, method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        with self._lock:
+            collection = self._collections.setdefault(name, FakeCollection(name))
+            if method == "bulk_write":
+                args = ([_Replace(*request) for request in args[0]],) + tuple(args[1:])
+            result = getattr(collection, method)(*args, **kwargs)
+            if inspect.iscoroutine(result):
+                result = _drive(result)
+            if isinstance(result, FakeCursor):
+                result = result._documents
+            return result
+
+    def get_documents(self, name: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._collections.setdefault(name, FakeCollection(name)).documents)
+
+    def set_documents(self, name: str, documents: List[Dict[str, Any]]):
+        with self._lock:
+            self._collections.setdefault(name, FakeCollection(name)).documents = list(documents)
+
+_store: Optional[_Store] = None
+
+def _get_store() -> _Store:
+    global _store
+    if _store is None:
+        _store = _Store()
+    return _store
+
+class _StoreManager(BaseManager):
+    pass
+
+_StoreManager.register("store", callable=_get_store)
+
+def start_store() -> Tuple[BaseManager, Tuple[str, int], bytes]:
+    """Start the store process; returns the manager (call ``shutdown()`` when done), its address and authkey"""
+    authkey = os.urandom(16)
+    manager = _StoreManager(address=("127.0.0.1", 0), authkey=authkey)
+    manager.start()
+    return manager, manager.address, authkey
+
+def connect_store(address: Tuple[str, int], authkey: bytes):
+    """Proxy to a running store"""
+    manager = _StoreManager(address=tuple(address), authkey=authkey)
+    manager.connect()
+    return manager.store()
+
+class RemoteCollection:
+    """The FakeCollection API over a shared store; latency is added on the caller's side"""
+
+    def __init__(self, name: str, store, latency_s: float = 0.0):
+        self.name = name
+        self.latency_s = latency_s
+        self._store = store
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        return self._store.call(self.name, method, args, kwargs)
+
+    async def _acall(self, method: str, *args, **kwargs) -> Any:
+        await asyncio.sleep(self.latency_s)
+        return await asyncio.to_thread(self._call, method, *args, **kwargs)
+
+    @property
+    def documents(self) -> List[Dict[str, Any]]:
+        return self._store.get_documents(self.name)
+
+    @documents.setter
+    def documents(self, documents: List[Dict[str, Any]]):
+        self._store.set_documents(self.name, documents)
+
+    def _find(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self._call("_find", query)
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True):
+        # Like the driver, give the caller's documents their _id
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        return await self._acall("insert_many", documents, ordered=ordered)
+
+    async def insert_one(self, document: Dict[str, Any]):
+        document.setdefault("_id", ObjectId())
+        return await self._acall("insert_one", document)
+
+    async def replace_one(self, query, replacement, upsert: bool = False):
+        return await self._acall("replace_one", query, replacement, upsert=upsert)
+
+    async def update_one(self, query, update, upsert: bool = False):
+        return await self._acall("update_one", query, update, upsert=upsert)
+
+    async def find_one_and_update(self, query, update, upsert: bool = False, return_document=None, projection=None):
+        return await self._acall("find_one_and_update", query, update, upsert=upsert, return_document=return_document, projection=projection)
+
+    async def find_one(self, query=None, projection=None):
+        return await self._acall("find_one", query, projection)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(self._call("find", query, projection), self.latency_s)
+
+    async def find_one_and_delete(self, query, projection=None):
+        return await self._acall("find_one_and_delete", query, projection=projection)
+
+    async def delete_one(self, query):
+        return await self._acall("delete_one", query)
+
+    async def delete_many(self, query):
+        return await self._acall("delete_many", query)
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        # Only ReplaceOne is used by the app
+        return await self._acall("bulk_write", [(r._filter, dict(r._doc), r._upsert) for r in requests], ordered=ordered)
+
+    async def count_documents(self, query):
+        return await self._acall("count_documents", query)
+
+    async def estimated_document_count(self):
+        return await self._acall("estimated_document_count")
+
+    def unique_index(self, field: str):
+        self._call("unique_index", field)
+
+    async def create_index(self, keys, **kwargs):
+        return await self._acall("create_index", keys, **kwargs)
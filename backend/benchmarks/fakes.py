@@ -0,0 +1,529 @@
+"""Deterministic local stand-ins for Gemini and MongoDB Atlas used by the benchmarks.
+
+Every fake takes a ``latency_s`` so network cost can be dialled in without a
+live provider. Embeddings are hashed bags of words, so similar texts land near
+each other and retrieval results are stable across runs.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.llms.types import CompletionResponse, CompletionResponseGen, LLMMetadata
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.llms import CustomLLM
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+EMBED_DIM = 256
+
+def hashed_embedding(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Hash lower-cased tokens into a fixed-size, L2-normalised vector"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in text.lower().split():
+        vector[zlib.crc32(token.encode("utf-8")) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.tolist()
+
+class FakeEmbedding(BaseEmbedding):
+    """GeminiEmbedding replacement with configurable per-call latency"""
+
+    latency_s: float = 0.0
+    dim: int = EMBED_DIM
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        time.sleep(self.latency_s)
+        return hashed_embedding(query, self.dim)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        time.sleep(self.latency_s)
+        return hashed_embedding(text, self.dim)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency_s)
+        return [hashed_embedding(text, self.dim) for text in texts]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        await asyncio.sleep(self.latency_s)
+        return hashed_embedding(query, self.dim)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency_s)
+        return hashed_embedding(text, self.dim)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency_s)
+        return [hashed_embedding(text, self.dim) for text in texts]
+
+class FakeLLM(CustomLLM):
+    """Gemini replacement that answers with a summary of its prompt after a fixed delay.
+
+    ``tail_rate`` of calls take ``tail_latency_s`` instead and ``error_rate`` of
+    calls raise, to exercise hedging and circuit breaking.
+    """
+
+    latency_s: float = 0.0
+    tail_latency_s: float = 0.0
+    tail_rate: float = 0.0
+    error_rate: float = 0.0
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="fake-llm", context_window=32768, num_output=256)
+
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self.tail_latency_s if random.random() < self.tail_rate else self.latency_s)
+        if random.random() < self.error_rate:
+            raise ConnectionError("injected provider failure")
+        return CompletionResponse(text=f"Answer drawn from {len(prompt)} characters of context.")
+
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        yield self.complete(prompt, formatted=formatted, **kwargs)
+
+class FakeFeedbackProvider:
+    """TruLens feedback provider replacement scoring by word overlap after a fixed delay"""
+
+    model_engine = "fake-feedback"
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _overlap(self, a: str, b: str) -> float:
+        time.sleep(self.latency_s)
+        with self._lock:
+            self.calls += 1
+        words_a, words_b = set(a.lower().split()), set(b.lower().split())
+        return len(words_a & words_b) / len(words_a) if words_a else 0.0
+
+    def relevance_with_cot_reasons(self, prompt: str, response: str):
+        return self._overlap(prompt, response), {"reason": "word overlap"}
+
+    def groundedness_measure_with_cot_reasons(self, source: str, statement: str):
+        return self._overlap(statement, source), {"reason": "word overlap"}
+
+def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        value = document
+        for part in key.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$lt" and not (value is not None and value < operand):
+                    return False
+                if op == "$gt" and not (value is not None and value > operand):
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$regex" and not (isinstance(value, str) and re.search(operand, value)):
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return dict(document)
+    included = [k for k, v in projection.items() if v]
+    if included:
+        projected = {k: document[k] for k in included if k in document}
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    return {k: v for k, v in document.items() if k not in projection}
+
+class _Result:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class FakeCursor:
+    def __init__(self, documents: List[Dict[str, Any]], latency_s: float):
+        self._documents = documents
+        self._latency_s = latency_s
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._documents.sort(key=lambda d: d.get(field), reverse=order < 0)
+        return self
+
+    def limit(self, n: int):
+        self._documents = self._documents[:n]
+        return self
+
+    async def to_list(self, length: Optional[int] = None):
+        await asyncio.sleep(self._latency_s)
+        return self._documents if length is None else self._documents[:length]
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        await asyncio.sleep(self._latency_s)
+        for document in self._documents:
+            yield document
+
+class FakeCollection:
+    """In-memory subset of the motor collection API used by the app"""
+
+    def __init__(self, name: str, latency_s: float = 0.0):
+        self.name = name
+        self.latency_s = latency_s
+        self.documents: List[Dict[str, Any]] = []
+        # Fields with a unique index, enforced like MongoDB does
+        self.unique_fields = ["_id"]
+
+    def _find(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [d for d in self.documents if _matches(d, query or {})]
+
+    def _check_unique(self, document: Dict[str, Any], replacing: Optional[Dict[str, Any]] = None):
+        for field in self.unique_fields:
+            if field in document and any(d.get(field) == document[field] for d in self.documents if d is not replacing):
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {{{field}: {document[field]!r}}}", 11000)
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True):
+        await asyncio.sleep(self.latency_s)
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+            self._check_unique(document)
+            self.documents.append(document)
+        return _Result(inserted_ids=[d["_id"] for d in documents])
+
+    async def insert_one(self, document: Dict[str, Any]):
+        result = await self.insert_many([document])
+        return _Result(inserted_id=result.inserted_ids[0])
+
+    async def replace_one(self, query, replacement, upsert: bool = False):
+        await asyncio.sleep(self.latency_s)
+        for i, document in enumerate(self.documents):
+            if _matches(document, query):
+                replacement = dict(replacement)
+                replacement.setdefault("_id", document["_id"])
+                self._check_unique(replacement, replacing=document)
+                self.documents[i] = replacement
+                return _Result(matched_count=1, upserted_id=None)
+        if upsert:
+            replacement = dict(replacement)
+            replacement.setdefault("_id", ObjectId())
+            self._check_unique(replacement)
+            self.documents.append(replacement)
+            return _Result(matched_count=0, upserted_id=replacement["_id"])
+        return _Result(matched_count=0, upserted_id=None)
+
+    async def update_one(self, query, update, upsert: bool = False):
+        await asyncio.sleep(self.latency_s)
+        matches = self._find(query)
+        if not matches:
+            if not upsert:
+                return _Result(matched_count=0)
+            document = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            document.update(update.get("$setOnInsert", {}))
+            document.update(update.get("$set", {}))
+            for key, inc in update.get("$inc", {}).items():
+                document[key] = document.get(key, 0) + inc
+            document.setdefault("_id", ObjectId())
+            self._check_unique(document)
+            self.documents.append(document)
+            return _Result(matched_count=0)
+        document = matches[0]
+        document.update(update.get("$set", {}))
+        for key, inc in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + inc
+        for key, value in update.get("$addToSet", {}).items():
+            values = document.setdefault(key, [])
+            if value not in values:
+                values.append(value)
+        return _Result(matched_count=1)
+
+    async def find_one_and_update(self, query, update, upsert: bool = False, return_document=None, projection=None):
+        matches = self._find(query)
+        before = dict(matches[0]) if matches else None
+        await self.update_one(query, update, upsert=upsert)
+        if not return_document:
+            return _project(before, projection) if before else None
+        after = matches[0] if matches else (self._find(query) or [None])[0]
+        return _project(after, projection) if after else None
+
+    async def find_one(self, query=None, projection=None):
+        await asyncio.sleep(self.latency_s)
+        matches = self._find(query)
+        return _project(matches[0], projection) if matches else None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([_project(d, projection) for d in self._find(query)], self.latency_s)
+
+    async def find_one_and_delete(self, query, projection=None):
+        await asyncio.sleep(self.latency_s)
+        matches = self._find(query)
+        if not matches:
+            return None
+        self.documents.remove(matches[0])
+        return _project(matches[0], projection)
+
+    async def delete_one(self, query):
+        deleted = await self.find_one_and_delete(query)
+        return _Result(deleted_count=1 if deleted else 0)
+
+    async def delete_many(self, query):
+        await asyncio.sleep(self.latency_s)
+        before = len(self.documents)
+        self.documents = [d for d in self.documents if not _matches(d, query or {})]
+        return _Result(deleted_count=before - len(self.documents))
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        await asyncio.sleep(self.latency_s)
+        errors = []
+        for index, request in enumerate(requests):
+            # Only ReplaceOne is used by the app
+            query, replacement = request._filter, dict(request._doc)
+            matches = self._find(query)
+            try:
+                if matches:
+                    replacement.setdefault("_id", matches[0]["_id"])
+                    self._check_unique(replacement, replacing=matches[0])
+                    self.documents[self.documents.index(matches[0])] = replacement
+                elif request._upsert:
+                    replacement.setdefault("_id", ObjectId())
+                    self._check_unique(replacement)
+                    self.documents.append(replacement)
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": e.code, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": 0, "nUpserted": 0, "nMatched": len(requests) - len(errors)})
+        return _Result(matched_count=len(requests))
+
+    async def count_documents(self, query):
+        await asyncio.sleep(self.latency_s)
+        return len(self._find(query))
+
+    async def estimated_document_count(self):
+        return len(self.documents)
+
+    def unique_index(self, field: str):
+        """Enforce a single-field unique index from now on"""
+        if field not in self.unique_fields:
+            self.unique_fields.append(field)
+
+    async def create_index(self, keys, unique: bool = False, **kwargs):
+        if unique:
+            # Only single-field unique indexes are used by the app
+            self.unique_index(keys if isinstance(keys, str) else keys[0][0])
+        return keys if isinstance(keys, str) else "_".join(f"{k}_{v}" for k, v in keys)
+
+class FakeSyncCollection:
+    """Blocking view over a FakeCollection for code paths that use pymongo directly"""
+
+    def __init__(self, collection: FakeCollection):
+        self._collection = collection
+
+    def find_one(self, query=None, projection=None):
+        time.sleep(self._collection.latency_s)
+        matches = self._collection._find(query)
+        return _project(matches[0], projection) if matches else None
+
+    def find(self, query=None, projection=None):
+        time.sleep(self._collection.latency_s)
+        return [_project(d, projection) for d in self._collection._find(query)]
+
+    def list_search_indexes(self):
+        return []
+
+    def create_search_index(self, model):
+        return None
+
+class FakeDatabase:
+    """Collections by name, created on first access (e.g. per-tenant collections)"""
+
+    def __init__(self, collections: Dict[str, FakeCollection], make_collection: Callable[[str], FakeCollection]):
+        self._collections = collections
+        self._make_collection = make_collection
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = self._make_collection(name)
+        return self._collections[name]
+
+    async def create_collection(self, name: str) -> FakeCollection:
+        return self[name]
+
+class FakeVectorStore(BasePydanticVectorStore):
+    """MongoDBAtlasVectorSearch replacement doing exact cosine search over a FakeCollection"""
+
+    stores_text: bool = True
+    flat_metadata: bool = False
+    latency_s: float = 0.0
+    _collection: FakeCollection = PrivateAttr()
+    _id_key: str = PrivateAttr(default="id")
+    _embedding_key: str = PrivateAttr(default="embedding")
+    _text_key: str = PrivateAttr(default="text")
+    _metadata_key: str = PrivateAttr(default="metadata")
+
+    def __init__(self, collection: FakeCollection, latency_s: float = 0.0):
+        super().__init__(latency_s=latency_s)
+        self._collection = collection
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeVectorStore"
+
+    @property
+    def client(self) -> Any:
+        return self._collection
+
+    def add(self, nodes: Sequence[BaseNode], **kwargs: Any) -> List[str]:
+        """Store nodes in the same layout as MongoDBAtlasVectorSearch.add, replacing any with the same id"""
+        time.sleep(self._collection.latency_s)
+        ids = [node.node_id for node in nodes]
+        replaced = set(ids)
+        self._collection.documents = [d for d in self._collection.documents if d[self._id_key] not in replaced]
+        for node in nodes:
+            self._collection.documents.append({
+                "_id": ObjectId(),
+                self._id_key: node.node_id,
+                self._embedding_key: node.get_embedding(),
+                self._text_key: node.get_content(metadata_mode=MetadataMode.NONE) or "",
+                self._metadata_key: node_to_metadata_dict(node, remove_text=True, flat_metadata=self.flat_metadata),
+            })
+        return ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._collection.documents = [
+            d for d in self._collection.documents
+            if d[self._metadata_key].get("ref_doc_id") != ref_doc_id
+        ]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        time.sleep(self.latency_s)
+        documents = self._collection.documents
+        if query.filters is not None:
+            filters = {
+                f"{self._metadata_key}.{f.key}": {"$in": f.value} if f.operator == "in" else f.value
+                for f in query.filters.filters
+            }
+            documents = [d for d in documents if _matches(d, filters)]
+        if not documents:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        matrix = np.asarray([d[self._embedding_key] for d in documents], dtype=np.float32)
+        scores = matrix @ np.asarray(query.query_embedding, dtype=np.float32)
+        top_k = min(query.similarity_top_k, len(documents))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+
+        nodes, similarities, ids = [], [], []
+        for i in top:
+            document = documents[i]
+            node = metadata_dict_to_node(document[self._metadata_key])
+            node.set_content(document[self._text_key])
+            nodes.append(node)
+            similarities.append(float(scores[i]))
+            ids.append(document[self._id_key])
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
+
+def install_fakes(
+    embed_latency_s: float = 0.0,
+    llm_latency_s: float = 0.0,
+    db_latency_s: float = 0.0,
+    vector_search_latency_s: float = 0.0,
+    feedback_latency_s: float = 0.0,
+    store=None,
+) -> Dict[str, FakeCollection]:
+    """Point the model registry and db_manager at local fakes and return the fake collections.
+
+    With ``store`` (a proxy from ``fake_store.connect_store``) the collections
+    live in that shared store process instead of this one.
+    """
+    from backend.database import db_manager
+    from config.settings import settings
+    from llama_index.core import Settings as LlamaSettings
+    from rag.models import model_registry
+
+    model_registry.reset()
+    model_registry.set_client("llm", FakeLLM(latency_s=llm_latency_s))
+    model_registry.set_client("embed_model", FakeEmbedding(latency_s=embed_latency_s))
+    # llama-index 0.13 refuses to build a ServiceContext; indexes built without
+    # one take their models from the global Settings instead
+    model_registry.set_client("service_context", None)
+    LlamaSettings.llm = model_registry.get_llm()
+    LlamaSettings.embed_model = model_registry.get_embed_model()
+    model_registry.set_client("feedback_provider:gemini", FakeFeedbackProvider(latency_s=feedback_latency_s))
+
+    names = {
+        "vector_store_collection": settings.VECTOR_STORE_COLLECTION,
+        "sentence_window_collection": settings.SENTENCE_WINDOW_COLLECTION,
+        "metadata_collection": settings.METADATA_COLLECTION,
+        "sentence_store_collection": settings.SENTENCE_STORE_COLLECTION,
+        "counters_collection": settings.COUNTERS_COLLECTION,
+        "index_registry_collection": settings.INDEX_REGISTRY_COLLECTION,
+        "extracted_text_collection": settings.EXTRACTED_TEXT_COLLECTION,
+        "embedding_cache_collection": settings.EMBEDDING_CACHE_COLLECTION,
+        "reindex_jobs_collection": settings.REINDEX_JOBS_COLLECTION,
+        "upload_sessions_collection": settings.UPLOAD_SESSIONS_COLLECTION,
+        "feedback_cache_collection": settings.FEEDBACK_CACHE_COLLECTION,
+        "snapshot_staging_collection": settings.SNAPSHOT_STAGING_COLLECTION,
+    }
+    if store is not None:
+        from fake_store import RemoteCollection
+
+        def make_collection(name: str) -> FakeCollection:
+            return RemoteCollection(name, store, db_latency_s)
+    else:
+        def make_collection(name: str) -> FakeCollection:
+            return FakeCollection(name, db_latency_s)
+
+    collections = {name: make_collection(name) for name in names.values()}
+    for attribute, name in names.items():
+        setattr(db_manager, attribute, collections[name])
+    # The unique indexes db_manager.connect() creates
+    collections[settings.METADATA_COLLECTION].unique_index("document_id")
+    collections[settings.VECTOR_STORE_COLLECTION].unique_index("id")
+    collections[settings.SENTENCE_WINDOW_COLLECTION].unique_index("id")
+
+    db_manager.database = FakeDatabase(collections, make_collection)
+    db_manager._create_vector_store = lambda name, index_name: FakeVectorStore(db_manager.database[name], vector_search_latency_s)
+    db_manager.vector_stores = {
+        "vector_store": FakeVectorStore(collections[settings.VECTOR_STORE_COLLECTION], vector_search_latency_s),
+        "sentence_window": FakeVectorStore(collections[settings.SENTENCE_WINDOW_COLLECTION], vector_search_latency_s),
+    }
+    db_manager.tenant_vector_stores.clear()
+    db_manager._tenant_collections_ready.clear()
+    # Forget indexes attached against the previous set of fakes
+    from rag.indexing import indexing_manager
+    indexing_manager.indexes.clear()
+    indexing_manager.index_versions.clear()
+    indexing_manager.registry.clear()
+    indexing_manager.current_strategies.clear()
+    indexing_manager.tenant_strategies.clear()
+    indexing_manager._registry_synced_at.clear()
+
+    db_manager.get_sync_collection = lambda name: FakeSyncCollection(db_manager.database[name])
+    return collections
@@ -0,0 +1,235 @@
+"""Find the saturation point of the API under a mixed request load.
+
+For each uvicorn worker count, the app is started (``load_app:app``: the real
+``main:app`` with Gemini and MongoDB Atlas replaced by the local fakes, all
+workers sharing one fake database in a store process) and driven by
+closed-loop async clients at rising concurrency. Each client sends
+a weighted mix of ``/qa/query``, ``/qa/compare``, ``/documents/list`` and
+``/documents/upload`` requests back to back for ``--duration`` seconds per
+level.
+
+The JSON report has, per worker count, a throughput-versus-latency curve (one
+point per concurrency level, with p50/p95/p99 and error and 429 rates) and
+the knee: the last level before adding clients stops raising throughput by
+at least ``--knee-gain``.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/load.py --workers 1 2 4 --concurrency 1 2 4 8 16 32 64 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCH_DIR), "src")
+sys.path.insert(0, BENCH_DIR)
+
+from fake_store import start_store  # noqa: E402
+from run import QUESTIONS, WORDS, percentile  # noqa: E402
+
+DEFAULT_MIX = "query=70,list=15,compare=10,upload=5"
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``endpoint=weight,...`` into request weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("query", "compare", "list", "upload"):
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, port: int, args, upload_dir: str, store_address, store_authkey: bytes) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        LOAD_STORE_ADDRESS=f"{store_address[0]}:{store_address[1]}",
+        LOAD_STORE_AUTHKEY=store_authkey.hex(),
+        PYTHONPATH=os.pathsep.join([SRC_DIR, BENCH_DIR]),
+        UPLOAD_DIR=upload_dir,
+        DEBUG="False",
+        LOAD_SEED_DOCS=str(args.seed_docs),
+        LOAD_EMBED_LATENCY_MS=str(args.embed_latency_ms),
+        LOAD_LLM_LATENCY_MS=str(args.llm_latency_ms),
+        LOAD_DB_LATENCY_MS=str(args.db_latency_ms),
+        LOAD_VECTOR_SEARCH_LATENCY_MS=str(args.vector_search_latency_ms),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "load_app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BENCH_DIR, env=env
+    )
+
+async def wait_ready(base_url: str, server: subprocess.Popen, timeout_s: float = 120.0):
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout_s}s")
+
+async def send(client: httpx.AsyncClient, endpoint: str, rng: random.Random, n: int) -> httpx.Response:
+    question = QUESTIONS[n % len(QUESTIONS)]
+    if endpoint == "query":
+        strategy = rng.choice(["vector_store", "sentence_window"])
+        return await client.post("/api/qa/query", json={"question": question, "strategy": strategy})
+    if endpoint == "compare":
+        return await client.post("/api/qa/compare", json={"question": question})
+    if endpoint == "list":
+        return await client.get("/api/documents/list")
+    # Fresh content each time so uploads pay for parsing and embedding
+    text = " ".join(rng.choice(WORDS) for _ in range(400)) + "."
+    return await client.post(
+        "/api/documents/upload",
+        files=[("files", (f"load_{n:07d}.txt", text.encode(), "text/plain"))],
+        data={"indexing_strategy": "vector_store"}
+    )
+
+async def run_level(base_url: str, concurrency: int, duration_s: float, weights: Dict[str, float], seed: int) -> Dict[str, Any]:
+    """Drive ``concurrency`` closed-loop clients for ``duration_s`` and summarize"""
+    samples: List[tuple] = []
+    endpoints, endpoint_weights = list(weights), list(weights.values())
+    counter = iter(range(10 ** 9))
+
+    async def client_loop(client: httpx.AsyncClient, rng: random.Random, deadline: float):
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(endpoints, endpoint_weights)[0]
+            start = time.perf_counter()
+            try:
+                status = (await send(client, endpoint, rng, next(counter))).status_code
+            except httpx.HTTPError:
+                status = None
+            samples.append((endpoint, status, time.perf_counter() - start))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        start = time.perf_counter()
+        deadline = start + duration_s
+        await asyncio.gather(*(client_loop(client, random.Random(seed + i), deadline) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize_level(concurrency, samples, elapsed)
+
+def summarize_level(concurrency: int, samples: List[tuple], elapsed: float) -> Dict[str, Any]:
+    ok = [latency for _, status, latency in samples if status is not None and status < 400]
+    rejected = sum(1 for _, status, _ in samples if status == 429)
+    errors = len(samples) - len(ok) - rejected
+    by_endpoint = {}
+    for endpoint in sorted({endpoint for endpoint, _, _ in samples}):
+        latencies = [latency for name, status, latency in samples if name == endpoint and status is not None and status < 400]
+        by_endpoint[endpoint] = {
+            "requests": sum(1 for name, _, _ in samples if name == endpoint),
+            "ok": len(latencies),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "throughput_per_s": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ok, 50) * 1000, 2) if ok else None,
+        "p95_ms": round(percentile(ok, 95) * 1000, 2) if ok else None,
+        "p99_ms": round(percentile(ok, 99) * 1000, 2) if ok else None,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rejected_rate": round(rejected / len(samples), 4) if samples else 0.0,
+        "endpoints": by_endpoint,
+    }
+
+def find_knee(levels: List[Dict[str, Any]], min_gain: float) -> Dict[str, Any]:
+    """Last level before throughput stops growing by ``min_gain`` or errors appear"""
+    for previous, current in zip(levels, levels[1:]):
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 + min_gain) or current["error_rate"] > previous["error_rate"]:
+            return {"concurrency": previous["concurrency"], "throughput_per_s": previous["throughput_per_s"],
+                    "p99_ms": previous["p99_ms"], "saturated": True}
+    last = levels[-1]
+    return {"concurrency": last["concurrency"], "throughput_per_s": last["throughput_per_s"],
+            "p99_ms": last["p99_ms"], "saturated": False}
+
+async def run_workers(workers: int, args, weights: Dict[str, float]) -> Dict[str, Any]:
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    upload_dir = tempfile.mkdtemp(prefix="load_uploads_")
+    # A fresh shared store per worker count, so every run starts from the seed corpus
+    store, store_address, store_authkey = start_store()
+    server = start_server(workers, port, args, upload_dir, store_address, store_authkey)
+    try:
+        await wait_ready(base_url, server)
+        levels = []
+        for concurrency in args.concurrency:
+            level = await run_level(base_url, concurrency, args.duration, weights, seed=concurrency)
+            print(
+                f"workers={workers} concurrency={concurrency}: {level['throughput_per_s']} req/s, "
+                f"p99 {level['p99_ms']} ms, errors {level['error_rate']:.1%}, 429s {level['rejected_rate']:.1%}",
+                file=sys.stderr
+            )
+            levels.append(level)
+        return {"workers": workers, "levels": levels, "knee": find_knee(levels, args.knee_gain)}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        store.shutdown()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+async def run(args):
+    weights = parse_mix(args.mix)
+    results = [await run_workers(workers, args, weights) for workers in args.workers]
+    return {
+        "mix": weights,
+        "backend": "fakes in one store process shared by all workers",
+        "duration_s": args.duration,
+        "fake_latency_ms": {
+            "embed": args.embed_latency_ms, "llm": args.llm_latency_ms,
+            "db": args.db_latency_ms, "vector_search": args.vector_search_latency_ms,
+        },
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Request weights, e.g. query=70,list=15,compare=10,upload=5")
+    parser.add_argument("--knee-gain", type=float, default=0.1, help="Minimum relative throughput gain per level before the knee")
+    parser.add_argument("--port", type=int, default=0, help="Server port (default: a free port)")
+    parser.add_argument("--seed-docs", type=int, default=20)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    parser.add_argument("--vector-search-latency-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""``main:app`` wired to the local fakes, for ``benchmarks/load.py``.
+
+Every uvicorn worker imports this module and connects to one fake MongoDB in
+a store process (``fake_store``), as separate workers share Atlas: uploads,
+counters, caches and the index registry written by one worker are seen by
+the others. The first worker to start ingests the seed corpus for both
+strategies; the rest wait for it. Fake latencies, the corpus size and the
+store's address come from ``LOAD_*`` environment variables set by the harness.
+
+Run directly (from ``backend/benchmarks``), with a store started by
+``fake_store.start_store()``::
+
+    LOAD_STORE_ADDRESS=127.0.0.1:<port> LOAD_STORE_AUTHKEY=<hex> uvicorn load_app:app --workers 2 --port 8099
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_store import connect_store  # noqa: E402
+from fakes import install_fakes  # noqa: E402
+from run import write_corpus  # noqa: E402
+from backend.database import db_manager  # noqa: E402
+from main import app  # noqa: E402
+
+# Counter document the workers race for; its winner seeds the corpus
+SEED_ID = "load:seed"
+
+def _latency(name: str) -> float:
+    return float(os.environ.get(name, 0.0)) / 1000
+
+async def connect():
+    host, _, port = os.environ["LOAD_STORE_ADDRESS"].rpartition(":")
+    install_fakes(
+        embed_latency_s=_latency("LOAD_EMBED_LATENCY_MS"),
+        llm_latency_s=_latency("LOAD_LLM_LATENCY_MS"),
+        db_latency_s=_latency("LOAD_DB_LATENCY_MS"),
+        vector_search_latency_s=_latency("LOAD_VECTOR_SEARCH_LATENCY_MS"),
+        store=connect_store((host, int(port)), bytes.fromhex(os.environ["LOAD_STORE_AUTHKEY"])),
+    )
+    claimed = await db_manager.counters_collection.find_one_and_update(
+        {"_id": SEED_ID}, {"$setOnInsert": {"done": False}}, upsert=True
+    )
+    if claimed is None:
+        try:
+            await seed()
+        except Exception as e:
+            await db_manager.counters_collection.update_one({"_id": SEED_ID}, {"$set": {"done": True, "error": repr(e)}})
+            raise
+        await db_manager.counters_collection.update_one({"_id": SEED_ID}, {"$set": {"done": True}})
+        return
+    # Serve only once the seeding worker has published the indexes
+    while True:
+        record = await db_manager.counters_collection.find_one({"_id": SEED_ID})
+        if record["done"]:
+            break
+        await asyncio.sleep(0.2)
+    if record.get("error"):
+        raise RuntimeError(f"Seeding worker failed: {record['error']}")
+
+async def seed():
+    from services.document_processing import document_processor
+
+    workdir = tempfile.mkdtemp(prefix="load_seed_")
+    try:
+        paths = write_corpus(workdir, int(os.environ.get("LOAD_SEED_DOCS", 20)), 40, seed=7)
+        filenames = [os.path.basename(p) for p in paths]
+        for strategy in ("vector_store", "sentence_window"):
+            await document_processor.process_multiple_documents(paths, filenames, strategy)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+async def disconnect():
+    pass
+
+async def ping() -> bool:
+    return True
+
+# The lifespan hook calls these; swap them before uvicorn starts it
+db_manager.connect = connect
+db_manager.disconnect = disconnect
+db_manager.ping = ping
+
+__all__ = ["app"]
@@ -0,0 +1,117 @@
+"""Check that every worker process can serve queries for indexes built by another one.
+
+Each worker is a separate process with its own ``IndexingManager``, connected
+to one fake MongoDB in a store process (``fake_store``), as separate uvicorn
+workers share Atlas. Worker 0 ingests a corpus; every worker then syncs the
+registry and queries. Worker 0 then re-indexes, and the others must pick up
+the new version.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/multiworker.py --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_store import connect_store, start_store  # noqa: E402
+from run import QUESTIONS, write_corpus  # noqa: E402
+
+def worker_main(conn, address, authkey: bytes, strategy: str):
+    """Serve ``("index", paths)`` and ``("query",)`` commands until ``None``"""
+    import logging
+    logging.disable(logging.INFO)
+
+    from fakes import install_fakes
+    from llama_index.core import SimpleDirectoryReader
+    from rag.indexing import indexing_manager
+
+    install_fakes(store=connect_store(address, authkey))
+    loop = asyncio.new_event_loop()
+
+    async def handle(command) -> Dict[str, Any]:
+        if command[0] == "index":
+            documents = SimpleDirectoryReader(input_files=command[1]).load_data()
+            await indexing_manager.create_index(documents, strategy)
+            return {"version": indexing_manager.get_index_version(strategy)}
+        await indexing_manager.sync_registry(force=True)
+        response = indexing_manager.get_query_engine(3, strategy).query(QUESTIONS[0])
+        return {"ok": bool(response.source_nodes), "version": indexing_manager.get_index_version(strategy)}
+
+    while True:
+        command = conn.recv()
+        if command is None:
+            break
+        try:
+            conn.send(loop.run_until_complete(handle(command)))
+        except Exception as e:
+            conn.send({"ok": False, "error": repr(e)})
+    loop.close()
+
+def query_all(connections) -> List[Dict[str, Any]]:
+    for conn in connections:
+        conn.send(("query",))
+    return [{"worker": worker_id, **conn.recv()} for worker_id, conn in enumerate(connections)]
+
+def run(num_workers: int, strategy: str, timeout_s: float = 120.0) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    store, address, authkey = start_store()
+    workers, connections = [], []
+    try:
+        for _ in range(num_workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=worker_main, args=(child, address, authkey, strategy), daemon=True)
+            process.start()
+            workers.append(process)
+            connections.append(parent)
+
+        with tempfile.TemporaryDirectory(prefix="bench_corpus_") as workdir:
+            paths = write_corpus(workdir, 5, 30, seed=1)
+            connections[0].send(("index", paths))
+            first_version = connections[0].recv()
+            initial = query_all(connections)
+            connections[0].send(("index", paths))
+            second_version = connections[0].recv()
+            after_reindex = query_all(connections)
+    finally:
+        for conn in connections:
+            conn.send(None)
+        for process in workers:
+            process.join(timeout_s)
+            if process.is_alive():
+                process.kill()
+        store.shutdown()
+
+    return {
+        "strategy": strategy,
+        "workers": num_workers,
+        "initial": initial,
+        "after_reindex": after_reindex,
+        "all_ok": (
+            all(r["ok"] and r["version"] == first_version["version"] for r in initial)
+            and all(r["ok"] and r["version"] == second_version["version"] for r in after_reindex)
+            and second_version["version"] != first_version["version"]
+        ),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--strategy", default="vector_store", choices=["vector_store", "sentence_window"])
+    args = parser.parse_args()
+
+    report = run(args.workers, args.strategy)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["all_ok"] else 1)
+
+if __name__ == "__main__":
+    main()
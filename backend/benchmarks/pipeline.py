@@ -0,0 +1,85 @@
+"""Compare pipelined ingestion with one worker per stage against wider stages.
+
+Each run ingests a fresh corpus (so the embedding cache never hits) through
+``process_multiple_documents`` with slow fake embeddings and database writes.
+The report shows end-to-end time next to the summed busy time of all stages
+(what a strictly sequential ingest would cost) and per-stage utilization.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/pipeline.py --docs 100 --embed-latency-ms 30 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+from run import write_corpus  # noqa: E402
+
+async def ingest(workers, queue_size: int, args, seed: int):
+    from services.document_processing import document_processor
+    from services.ingest_pipeline import ingestion_pipeline
+
+    ingestion_pipeline.workers = dict(workers)
+    ingestion_pipeline.queue_size = queue_size
+    ingestion_pipeline.batch_nodes = args.batch_nodes
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        paths = write_corpus(workdir, args.docs, args.sentences_per_doc, seed)
+        result = await document_processor.process_multiple_documents(paths, [os.path.basename(p) for p in paths], args.strategy)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    stats = result["pipeline_stats"]
+    return {
+        "workers": workers,
+        "queue_size": queue_size,
+        "batch_nodes": args.batch_nodes,
+        "chunks": result["total_chunks"],
+        "elapsed_s": stats["elapsed_s"],
+        "sequential_s": stats["sequential_s"],
+        "speedup_vs_sequential": round(stats["sequential_s"] / stats["elapsed_s"], 2) if stats["elapsed_s"] else None,
+        "bottleneck": stats["bottleneck"],
+        "stages": stats["stages"],
+    }
+
+async def run(args):
+    install_fakes(embed_latency_s=args.embed_latency_ms / 1000, db_latency_s=args.db_latency_ms / 1000)
+    single = {"parse": 1, "chunk": 1, "embed": 1, "store": 1}
+    wide = {"parse": args.parse_workers, "chunk": args.chunk_workers, "embed": args.embed_workers, "store": args.store_workers}
+    return {
+        "docs": args.docs,
+        "strategy": args.strategy,
+        "single_worker_stages": await ingest(single, args.queue_size, args, seed=21),
+        "configured_stages": await ingest(wide, args.queue_size, args, seed=22),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--sentences-per-doc", type=int, default=40)
+    parser.add_argument("--strategy", default="vector_store", choices=["vector_store", "sentence_window"])
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--chunk-workers", type=int, default=2)
+    parser.add_argument("--embed-workers", type=int, default=4)
+    parser.add_argument("--store-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--batch-nodes", type=int, default=100)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Exercise hedging and circuit breaking around the LLM against a fake provider.
+
+The fake answers in ``--latency`` seconds, except that ``--tail-rate`` of calls
+take ``--tail-latency`` seconds. Tail latency is compared for the bare fake and
+for the same fake behind ``ResilientLLM``. An outage is then simulated: every
+call fails until the circuit opens, calls fail fast while it is open, and the
+first half-open probe after recovery closes it again.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/resilience.py --calls 200 --tail-rate 0.05
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import FakeLLM  # noqa: E402
+from run import summarize  # noqa: E402
+
+def time_calls(llm, calls: int):
+    samples, errors = [], 0
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            llm.complete("What does the index contain?")
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - start)
+    return samples, errors
+
+def bench_tail_latency(args):
+    from rag.resilience import ResilientCaller, ResilientLLM
+
+    fake = FakeLLM(latency_s=args.latency, tail_latency_s=args.tail_latency, tail_rate=args.tail_rate)
+    caller = ResilientCaller("llm", deadline_s=args.tail_latency * 2, hedging=True, hedge_min_delay_s=args.latency * 2)
+    results = {}
+    for name, llm in (("direct", fake), ("hedged", ResilientLLM(fake, caller=caller))):
+        samples, errors = time_calls(llm, args.calls)
+        results[name] = dict(summarize(samples), errors=errors)
+    results["hedge"] = caller.get_stats()
+    return results
+
+def bench_outage(args):
+    from rag.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, ResilientLLM
+
+    fake = FakeLLM(latency_s=args.latency, error_rate=1.0)
+    breaker = CircuitBreaker("llm", failure_threshold=5, reset_timeout_s=0.5)
+    llm = ResilientLLM(fake, caller=ResilientCaller("llm", deadline_s=5.0, hedging=False, breaker=breaker))
+
+    provider_failures, fast_failures = 0, []
+    for _ in range(20):
+        start = time.perf_counter()
+        try:
+            llm.complete("ping")
+        except CircuitOpenError:
+            fast_failures.append(time.perf_counter() - start)
+        except ConnectionError:
+            provider_failures += 1
+    opened = breaker.state
+
+    fake.error_rate = 0.0
+    time.sleep(breaker.reset_timeout_s)
+    llm.complete("ping")
+
+    return {
+        "provider_failures_before_open": provider_failures,
+        "fast_failures": summarize(fast_failures),
+        "state_during_outage": opened,
+        "state_after_probe": breaker.state,
+        "ok": provider_failures == breaker.failure_threshold and breaker.state == CircuitBreaker.CLOSED,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    report = {"tail_latency": bench_tail_latency(args), "outage": bench_outage(args)}
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["outage"]["ok"] else 1)
+
+if __name__ == "__main__":
+    main()
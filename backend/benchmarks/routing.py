@@ -0,0 +1,131 @@
+"""Recall versus latency for two-level (document, then chunk) retrieval.
+
+A topical corpus is ingested: every document is about one of ``--topics``
+topics, each with its own vocabulary on top of the shared benchmark words.
+Each question is answered by full chunk search (the ground truth) and by
+routing to the top-M documents by centroid first. For every M the report
+gives recall@k of the routed chunks against the full search, and the
+latency of the whole retrieval (question embedding, routing, chunk search).
+
+Usage (from ``backend/``)::
+
+    python benchmarks/routing.py --docs 400 --topics 40 --top-documents 1 2 5 10 20 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+from run import WORDS, summarize  # noqa: E402
+
+def topic_words(topic: int, size: int = 30) -> List[str]:
+    return [f"t{topic}w{i}" for i in range(size)]
+
+def write_topical_corpus(directory: str, args, rng: random.Random) -> List[int]:
+    """Write one file per document and return each document's topic"""
+    topics = []
+    for i in range(args.docs):
+        topic = i % args.topics
+        vocabulary = topic_words(topic)
+        sentences = [
+            " ".join(rng.choice(vocabulary) if rng.random() < 0.6 else rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(args.sentences_per_doc)
+        ]
+        with open(os.path.join(directory, f"doc_{i:05d}.txt"), "w") as f:
+            f.write(" ".join(sentences))
+        topics.append(topic)
+    return topics
+
+async def retrieve(question: str, top_documents: int, args) -> List[str]:
+    from llama_index.core.schema import QueryBundle
+    from rag.indexing import build_metadata_filters, indexing_manager
+    from rag.models import model_registry
+    from services.document_router import document_router
+
+    query_bundle = QueryBundle(question)
+    query_bundle.embedding = await model_registry.get_embed_model().aget_query_embedding(question)
+    filters = None
+    if top_documents:
+        document_ids = await document_router.route(query_bundle.embedding, args.strategy, top_documents)
+        filters = build_metadata_filters(document_ids=document_ids) if document_ids is not None else None
+    engine = indexing_manager.get_query_engine(args.top_k, args.strategy, filters)
+    return [node.node.node_id for node in engine.retrieve(query_bundle)]
+
+async def run(args):
+    from services.document_processing import document_processor
+
+    install_fakes(vector_search_latency_s=args.vector_search_latency_ms / 1000)
+    rng = random.Random(5)
+    workdir = tempfile.mkdtemp(prefix="bench_routing_")
+    try:
+        write_topical_corpus(workdir, args, rng)
+        paths = sorted(os.path.join(workdir, name) for name in os.listdir(workdir))
+        result = await document_processor.process_multiple_documents(paths, [os.path.basename(p) for p in paths], args.strategy)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    questions = [
+        " ".join(rng.choice(topic_words(rng.randrange(args.topics))) for _ in range(6)) + "?"
+        for _ in range(args.queries)
+    ]
+
+    baseline, truth = [], []
+    for question in questions:
+        start = time.perf_counter()
+        truth.append(set(await retrieve(question, 0, args)))
+        baseline.append(time.perf_counter() - start)
+
+    curve = []
+    for top_documents in args.top_documents:
+        samples, recalls = [], []
+        for question, expected in zip(questions, truth):
+            start = time.perf_counter()
+            found = set(await retrieve(question, top_documents, args))
+            samples.append(time.perf_counter() - start)
+            recalls.append(len(found & expected) / len(expected) if expected else 1.0)
+        curve.append({
+            "top_documents": top_documents,
+            f"recall_at_{args.top_k}": round(sum(recalls) / len(recalls), 4),
+            "latency": summarize(samples),
+        })
+
+    return {
+        "docs": args.docs,
+        "topics": args.topics,
+        "chunks": result["total_chunks"],
+        "strategy": args.strategy,
+        "top_k": args.top_k,
+        "full_search": summarize(baseline),
+        "routed": curve,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--sentences-per-doc", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--top-documents", type=int, nargs="+", default=[1, 2, 5, 10, 20, 50])
+    parser.add_argument("--strategy", default="vector_store", choices=["vector_store", "sentence_window"])
+    parser.add_argument("--vector-search-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
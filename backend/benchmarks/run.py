@@ -0,0 +1,240 @@
+"""Offline benchmarks for the ingestion and query hot paths.
+
+Gemini, GeminiEmbedding and MongoDB Atlas are replaced by the deterministic
+fakes in ``benchmarks/fakes.py``; their latency is configurable so runs can
+model a slow provider. Results are printed (or written with ``--output``) as
+JSON so they can be diffed across commits.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/run.py --sizes 10 50 200 --queries 50 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+
+WORDS = (
+    "retrieval augmented generation vector index embedding chunk sentence window "
+    "document query answer context model latency throughput storage mongo atlas "
+    "gemini evaluation groundedness relevance strategy metadata pipeline batch"
+).split()
+
+QUESTIONS = [
+    "How does sentence window retrieval improve answer context?",
+    "What is stored in the metadata collection?",
+    "Which strategy has better groundedness?",
+    "How are embeddings batched during ingestion?",
+]
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples: List[float], items: int = None) -> Dict[str, Any]:
+    """Latency percentiles in milliseconds, throughput and current peak RSS"""
+    total = sum(samples)
+    count = items if items is not None else len(samples)
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "throughput_per_s": round(count / total, 2) if total else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def write_corpus(directory: str, num_docs: int, sentences_per_doc: int, seed: int) -> List[str]:
+    """Write a synthetic text corpus and return the file paths"""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(num_docs):
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(sentences_per_doc)
+        ]
+        path = os.path.join(directory, f"doc_{i:05d}.txt")
+        with open(path, "w") as f:
+            f.write(" ".join(sentences))
+        paths.append(path)
+    return paths
+
+async def timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result, time.perf_counter() - start
+
+async def bench_ingestion_stages(paths: List[str], strategy: str) -> Dict[str, Any]:
+    """Time parse, chunk, embed and store separately for one strategy"""
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.schema import MetadataMode
+    from rag.indexing import indexing_manager
+    from rag.vector_writer import bulk_vector_writer
+
+    impl = indexing_manager.strategies[strategy]
+    documents, parse_s = await timed(lambda: SimpleDirectoryReader(input_files=paths).load_data())
+    nodes, chunk_s = await timed(impl.node_parser.get_nodes_from_documents, documents)
+    texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+    embeddings, embed_s = await timed(impl.embed_model.aget_text_embedding_batch, texts)
+    for node, embedding in zip(nodes, embeddings):
+        node.embedding = embedding
+    write_stats, store_s = await timed(bulk_vector_writer.write, nodes, strategy)
+
+    return {
+        "documents": len(documents),
+        "nodes": len(nodes),
+        "parse": summarize([parse_s], len(documents)),
+        "chunk": summarize([chunk_s], len(nodes)),
+        "embed": summarize([embed_s], len(nodes)),
+        "store": summarize([store_s], len(nodes)),
+        "writes_per_s": write_stats["writes_per_s"],
+    }
+
+async def bench_process_documents(paths: List[str], strategy: str) -> Dict[str, Any]:
+    from services.document_processing import document_processor
+
+    filenames = [os.path.basename(p) for p in paths]
+    result, elapsed = await timed(
+        document_processor.process_multiple_documents,
+        file_paths=paths, filenames=filenames, indexing_strategy=strategy
+    )
+    stats = summarize([elapsed], len(paths))
+    stats["total_chunks"] = result.get("total_chunks")
+    return stats
+
+async def bench_create_index(paths: List[str], strategy: str) -> Dict[str, Any]:
+    from llama_index.core import SimpleDirectoryReader
+    from rag.indexing import indexing_manager
+
+    documents = SimpleDirectoryReader(input_files=paths).load_data()
+    _, elapsed = await timed(indexing_manager.create_index, documents, strategy)
+    return summarize([elapsed], len(documents))
+
+async def bench_query(strategy: str, num_queries: int, top_k: int) -> Dict[str, Any]:
+    from services.qa_service import qa_service
+
+    samples, errors = [], 0
+    for i in range(num_queries):
+        result, elapsed = await timed(
+            qa_service.query, question=QUESTIONS[i % len(QUESTIONS)], strategy=strategy, similarity_top_k=top_k
+        )
+        errors += "error" in result
+        samples.append(elapsed)
+    stats = summarize(samples)
+    stats["errors"] = errors
+    return stats
+
+async def bench_compare(strategies: List[str], num_queries: int, top_k: int) -> Dict[str, Any]:
+    from services.qa_service import qa_service
+
+    samples, errors = [], 0
+    for i in range(num_queries):
+        result, elapsed = await timed(
+            qa_service.compare_strategies_query,
+            question=QUESTIONS[i % len(QUESTIONS)], strategies=strategies, similarity_top_k=top_k
+        )
+        errors += "error" in result
+        samples.append(elapsed)
+    stats = summarize(samples)
+    stats["errors"] = errors
+    return stats
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+async def run(args) -> Dict[str, Any]:
+    strategies = ["vector_store", "sentence_window"]
+    report = {
+        "revision": git_revision(),
+        "config": {
+            "sizes": args.sizes,
+            "sentences_per_doc": args.sentences_per_doc,
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "embed_latency_ms": args.embed_latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "db_latency_ms": args.db_latency_ms,
+        },
+        "results": [],
+    }
+
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix="bench_corpus_")
+        try:
+            paths = write_corpus(workdir, size, args.sentences_per_doc, args.seed)
+            for strategy in strategies:
+                install_fakes(
+                    embed_latency_s=args.embed_latency_ms / 1000,
+                    llm_latency_s=args.llm_latency_ms / 1000,
+                    db_latency_s=args.db_latency_ms / 1000,
+                    vector_search_latency_s=args.db_latency_ms / 1000,
+                )
+                entry = {"corpus_docs": size, "strategy": strategy}
+                entry["ingestion_stages"] = await bench_ingestion_stages(paths, strategy)
+                entry["create_index"] = await bench_create_index(paths, strategy)
+                entry["process_multiple_documents"] = await bench_process_documents(paths, strategy)
+                entry["query"] = await bench_query(strategy, args.queries, args.top_k)
+                report["results"].append(entry)
+
+            report["results"].append({
+                "corpus_docs": size,
+                "strategy": "compare",
+                "compare_strategies_query": await bench_compare(strategies, max(1, args.queries // 10), args.top_k),
+            })
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200], help="Corpus sizes in documents")
+    parser.add_argument("--sentences-per-doc", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare restoring an index from a snapshot with re-ingesting the corpus.
+
+A corpus is ingested through ``process_multiple_documents`` against the local
+fakes, exported to a snapshot, and imported into a fresh set of fake
+collections; the restored index must answer the same query as the original.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/snapshot.py --docs 200 --strategy sentence_window
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+from run import QUESTIONS, write_corpus  # noqa: E402
+
+async def run(args):
+    from rag.indexing import indexing_manager
+    from services.document_processing import document_processor
+    from services.snapshots import snapshot_manager
+
+    fake_latency = {"embed_latency_s": args.embed_latency_ms / 1000, "db_latency_s": args.db_latency_ms / 1000}
+    install_fakes(**fake_latency)
+    workdir = tempfile.mkdtemp(prefix="bench_corpus_")
+    try:
+        paths = write_corpus(workdir, args.docs, args.sentences_per_doc, seed=7)
+        start = time.perf_counter()
+        result = await document_processor.process_multiple_documents(
+            paths, [os.path.basename(p) for p in paths], args.strategy
+        )
+        ingest_s = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    expected = [n.node_id for n in indexing_manager.get_query_engine(3, args.strategy).retrieve(QUESTIONS[0])]
+
+    start = time.perf_counter()
+    snapshot = b"".join([chunk async for chunk in await snapshot_manager.open_export(args.strategy)])
+    export_s = time.perf_counter() - start
+
+    # Fresh collections, as in a new environment; the stream is fed in 64 KiB pieces
+    install_fakes(**fake_latency)
+
+    async def pieces():
+        for offset in range(0, len(snapshot), 64 * 1024):
+            yield snapshot[offset:offset + 64 * 1024]
+
+    start = time.perf_counter()
+    stats = await snapshot_manager.import_snapshot(args.strategy, pieces())
+    import_s = time.perf_counter() - start
+    restored = [n.node_id for n in indexing_manager.get_query_engine(3, args.strategy).retrieve(QUESTIONS[0])]
+
+    nodes = stats["nodes"]
+    return {
+        "strategy": args.strategy,
+        "documents": args.docs,
+        "nodes": nodes,
+        "ingest": {"seconds": round(ingest_s, 3), "nodes_per_s": round(nodes / ingest_s, 1), "chunks": result["total_chunks"]},
+        "export": {"seconds": round(export_s, 3), "bytes": len(snapshot), "bytes_per_node": round(len(snapshot) / max(nodes, 1), 1)},
+        "import": {"seconds": round(import_s, 3), "nodes_per_s": round(nodes / import_s, 1)},
+        "speedup_vs_ingest": round(ingest_s / import_s, 1),
+        "same_results": expected == restored,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--sentences-per-doc", type=int, default=60)
+    parser.add_argument("--strategy", default="vector_store", choices=["vector_store", "sentence_window"])
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0)
+    parser.add_argument("--db-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["same_results"] else 1)
+
+if __name__ == "__main__":
+    main()
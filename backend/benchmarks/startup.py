@@ -0,0 +1,67 @@
+"""Measure cold-start cost of the API process.
+
+Runs each measurement in a fresh interpreter and reports, as JSON:
+
+* ``import_s``: time to ``import main`` (lazy model registry, nothing built)
+* ``eager_boot_s``: import plus building every shared client up front, which
+  is what the app used to do at import time
+* ``first_use_s``: cost that is now deferred to the first request
+
+Usage (from ``backend/``)::
+
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+IMPORT_ONLY = """
+import time
+t0 = time.perf_counter()
+import main
+print(time.perf_counter() - t0)
+"""
+
+EAGER_BOOT = """
+import time
+t0 = time.perf_counter()
+import main
+from rag.models import model_registry
+model_registry.get_service_context()
+model_registry.get_tru()
+model_registry.get_feedback_provider()
+print(time.perf_counter() - t0)
+"""
+
+def _run(snippet: str) -> float:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    output = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    import_times = [_run(IMPORT_ONLY) for _ in range(args.runs)]
+    eager_times = [_run(EAGER_BOOT) for _ in range(args.runs)]
+
+    import_s = statistics.median(import_times)
+    eager_s = statistics.median(eager_times)
+    print(json.dumps({
+        "runs": args.runs,
+        "import_s": round(import_s, 4),
+        "eager_boot_s": round(eager_s, 4),
+        "first_use_s": round(eager_s - import_s, 4),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
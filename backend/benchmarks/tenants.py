@@ -0,0 +1,82 @@
+"""Show that a tenant's retrieval latency follows its own corpus, not its neighbours'.
+
+A small tenant is ingested and its retrieval latency measured; a tenant with a
+corpus ``--large-factor`` times bigger is then ingested into the same fakes and
+the small tenant is measured again. With per-tenant collections both runs
+should match, while the large tenant pays for its own size.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/tenants.py --small-docs 20 --large-factor 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import install_fakes  # noqa: E402
+from run import QUESTIONS, summarize, write_corpus  # noqa: E402
+
+async def ingest(tenant: str, num_docs: int, args, seed: int) -> int:
+    from services.document_processing import document_processor
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{tenant}_")
+    try:
+        paths = write_corpus(workdir, num_docs, args.sentences_per_doc, seed)
+        result = await document_processor.process_multiple_documents(
+            paths, [os.path.basename(p) for p in paths], args.strategy, tenant=tenant
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result["total_chunks"]
+
+def time_retrieval(tenant: str, args):
+    from rag.indexing import indexing_manager
+
+    samples = []
+    for i in range(args.queries):
+        engine = indexing_manager.get_query_engine(5, args.strategy, tenant=tenant)
+        start = time.perf_counter()
+        engine.retrieve(QUESTIONS[i % len(QUESTIONS)])
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+async def run(args):
+    install_fakes(vector_search_latency_s=args.vector_search_latency_ms / 1000)
+    small_chunks = await ingest("small", args.small_docs, args, seed=1)
+    before = time_retrieval("small", args)
+    large_chunks = await ingest("large", args.small_docs * args.large_factor, args, seed=2)
+    after = time_retrieval("small", args)
+    large = time_retrieval("large", args)
+    return {
+        "strategy": args.strategy,
+        "small_tenant": {"chunks": small_chunks, "alone": before, "with_large_neighbour": after},
+        "large_tenant": {"chunks": large_chunks, "retrieval": large},
+        "small_p50_ratio": round(after["p50_ms"] / before["p50_ms"], 2) if before["p50_ms"] else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small-docs", type=int, default=20)
+    parser.add_argument("--large-factor", type=int, default=20)
+    parser.add_argument("--sentences-per-doc", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--strategy", default="vector_store", choices=["vector_store", "sentence_window"])
+    parser.add_argument("--vector-search-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from config.settings import settings
+from observability.metrics import metrics
+from observability.tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Overloaded(HTTPException):
+    """Raised when a pool's queue is full or a request waited too long for a slot"""
+
+    def __init__(self, pool: str, retry_after: int, reason: str):
+        super().__init__(
+            status_code=429,
+            detail=f"Server is busy ({pool}: {reason}), retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.pool = pool
+        self.retry_after = retry_after
+
+class AdmissionPool:
+    """Concurrency limit with a bounded FIFO wait queue.
+
+    Requests beyond ``max_concurrency`` wait for a slot; once ``max_queue``
+    requests are already waiting, new ones are rejected immediately so that
+    admitted requests keep their latency instead of everyone slowing down.
+    Admitted requests run their blocking calls on the pool's own threads, one
+    per slot, so they never stall the event loop that admits and rejects.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_s: float = None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_s = settings.ADMISSION_QUEUE_TIMEOUT_S if queue_timeout_s is None else queue_timeout_s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._avg_service_s = 1.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        backlog = (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._avg_service_s))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected += 1
+        metrics.admission_rejected.inc(pool=self.name, reason=reason)
+        logger.warning(f"Rejected {self.name} request: {reason} (in flight: {self.in_flight}, waiting: {self.waiting})")
+        return Overloaded(self.name, self.retry_after(), reason)
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting in the queue if needed; returns the admission time"""
+        if not self._semaphore.locked():
+            # Free slot: acquire without queueing
+            await self._semaphore.acquire()
+            metrics.admission_wait.observe(0.0, pool=self.name)
+        else:
+            if self.waiting >= self.max_queue:
+                raise self._reject("queue_full")
+            self.waiting += 1
+            metrics.admission_queue_depth.set(self.waiting, pool=self.name)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout_s)
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout")
+            finally:
+                self.waiting -= 1
+                metrics.admission_queue_depth.set(self.waiting, pool=self.name)
+            metrics.admission_wait.observe(time.perf_counter() - start, pool=self.name)
+
+        self.in_flight += 1
+        metrics.admission_in_flight.set(self.in_flight, pool=self.name)
+        return time.perf_counter()
+
+    def release(self, admitted: float):
+        """Give back a slot taken at ``admitted``"""
+        self.in_flight -= 1
+        metrics.admission_in_flight.set(self.in_flight, pool=self.name)
+        self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * (time.perf_counter() - admitted)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot of the pool for the duration of the block"""
+        admitted = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(admitted)
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call of an admitted request on the pool's threads"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"{self.name}-pool")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(tracer.bind(fn), *args))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current pool occupancy"""
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "avg_service_s": round(self._avg_service_s, 3)
+        }
+
+class AdmissionController:
+    """Separate admission pools for query, upload and evaluation traffic"""
+
+    def __init__(self):
+        self.pools: Dict[str, AdmissionPool] = {
+            "query": AdmissionPool("query", settings.QUERY_MAX_CONCURRENCY, settings.QUERY_MAX_QUEUE),
+            "upload": AdmissionPool("upload", settings.UPLOAD_MAX_CONCURRENCY, settings.UPLOAD_MAX_QUEUE),
+            "evaluation": AdmissionPool("evaluation", settings.EVALUATION_MAX_CONCURRENCY, settings.EVALUATION_MAX_QUEUE),
+        }
+
+    def slot(self, pool: str):
+        """Hold one slot of the named pool"""
+        return self.pools[pool].slot()
+
+    async def run_blocking(self, pool: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the named pool's threads"""
+        return await self.pools[pool].run_blocking(fn, *args)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get occupancy for every pool"""
+        return {name: pool.get_stats() for name, pool in self.pools.items()}
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting requests to their pool before the body is read.
+
+    Rejecting here, rather than in the route, means an overloaded server does
+    not spend time receiving upload bodies it is going to turn away.
+    """
+
+    def __init__(self, app, routes: Dict[Tuple[str, str], str], controller: AdmissionController = None):
+        self.app = app
+        self.routes = routes
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        pool = self.routes.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if pool is None:
+            await self.app(scope, receive, send)
+            return
+
+        pool = self.controller.pools[pool]
+        try:
+            admitted = await pool.acquire()
+        except Overloaded as e:
+            await self._send_overloaded(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release(admitted)
+
+    @staticmethod
+    async def _send_overloaded(send, error: Overloaded):
+        body = json.dumps({"detail": error.detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(error.retry_after).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+# Global admission controller
+admission = AdmissionController()
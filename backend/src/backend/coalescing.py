@@ -0,0 +1,63 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from observability.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Share one in-flight execution among concurrent callers with the same key.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs wait on the same task and receive its result or its
+    exception. A caller that is cancelled only stops waiting; the work is
+    cancelled once no caller is left waiting for it. Nothing is kept after
+    the work finishes, so later callers always start a fresh execution.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` for this key, or join the execution already in flight"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            metrics.coalesced_requests.inc(name=self.name)
+
+        flight.waiters += 1
+        try:
+            # Shielded so one caller's cancellation does not cancel the others' result
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                logger.info(f"Cancelling {self.name} execution: no callers left waiting")
+                flight.task.cancel()
+                # Callers arriving from now on start a fresh execution
+                self._finish(key, flight)
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get executions started, callers that joined one, and executions in flight"""
+        return {"executions": self.executions, "coalesced": self.coalesced, "in_flight": len(self._flights)}
@@ -1,36 +1,71 @@
 import motor.motor_asyncio
+import pymongo
+from pymongo.errors import CollectionInvalid, OperationFailure
+from pymongo.operations import SearchIndexModel
 from llama_index.vector_stores.mongodb import MongoDBAtlasVectorSearch
-from config import settings
+from config.settings import settings
+from backend.tenancy import IdleCache, is_default_tenant, tenant_filter
+import asyncio
 import logging
-from typing import Dict
+from typing import Any, Dict, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Node metadata fields declared as filters in the vector search indexes
+VECTOR_FILTER_FIELDS = ["document_id", "filename", "file_type"]
+
 # Initialize MongoDB client
 class DatabaseManager:
     def __init__(self):  # Fixed typo from __initi__
         self.client = None
+        self.sync_client = None
         self.database = None
 
         # Collections for different strategies
         self.vector_store_collection = None
         self.sentence_window_collection = None
         self.metadata_collection = None
+        self.sentence_store_collection = None
+        self.counters_collection = None
+        self.index_registry_collection = None
+        self.extracted_text_collection = None
+        self.embedding_cache_collection = None
+        self.reindex_jobs_collection = None
+        self.upload_sessions_collection = None
+        self.feedback_cache_collection = None
+        self.snapshot_staging_collection = None
         
         # Vector stores for different strategies
         self.vector_stores = {}
 
+        # Non-default tenants: vector stores built on first use, and collections
+        # whose search indexes have been ensured by this process
+        self.tenant_vector_stores = IdleCache("tenant vector store")
+        self._tenant_collections_ready = set()
+
     async def connect(self):
         """Connect to MongoDB and initialize the vector store and index."""
         try:
-            self.client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI)
+            self.client = motor.motor_asyncio.AsyncIOMotorClient(
+                settings.MONGODB_URI,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE
+            )
             self.database = self.client[settings.DATABASE_NAME]
             
             # Initialize collections
             self.vector_store_collection = self.database[settings.VECTOR_STORE_COLLECTION]
             self.sentence_window_collection = self.database[settings.SENTENCE_WINDOW_COLLECTION]
             self.metadata_collection = self.database[settings.METADATA_COLLECTION]
+            self.sentence_store_collection = self.database[settings.SENTENCE_STORE_COLLECTION]
+            self.counters_collection = self.database[settings.COUNTERS_COLLECTION]
+            self.index_registry_collection = self.database[settings.INDEX_REGISTRY_COLLECTION]
+            self.extracted_text_collection = self.database[settings.EXTRACTED_TEXT_COLLECTION]
+            self.embedding_cache_collection = self.database[settings.EMBEDDING_CACHE_COLLECTION]
+            self.reindex_jobs_collection = self.database[settings.REINDEX_JOBS_COLLECTION]
+            self.upload_sessions_collection = self.database[settings.UPLOAD_SESSIONS_COLLECTION]
+            self.feedback_cache_collection = self.database[settings.FEEDBACK_CACHE_COLLECTION]
+            self.snapshot_staging_collection = self.database[settings.SNAPSHOT_STAGING_COLLECTION]
             
             logger.info("Connected to MongoDB collections")
 
@@ -38,44 +73,205 @@ class DatabaseManager:
             await self.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB Atlas")
             
+            await self._ensure_metadata_indexes()
+            await self._ensure_vector_id_index(self.vector_store_collection)
+            await self._ensure_vector_id_index(self.sentence_window_collection)
+            
             # Initialize vector stores for different strategies
             await self._initialize_vector_stores()
+            await self._ensure_vector_search_indexes()
             
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
             raise
     
+    async def _ensure_metadata_indexes(self):
+        """Create indexes backing document listing, filtering and lookups"""
+        try:
+            await self.metadata_collection.create_index("document_id", unique=True)
+            # Listing pages on _id (descending) within a tenant, optionally filtered by strategy and/or status
+            await self.metadata_collection.create_index([("tenant_id", 1), ("_id", -1)])
+            await self.metadata_collection.create_index([("tenant_id", 1), ("indexing_strategy", 1), ("_id", -1)])
+            await self.metadata_collection.create_index([("tenant_id", 1), ("status", 1), ("_id", -1)])
+            await self.metadata_collection.create_index([("tenant_id", 1), ("indexing_strategy", 1), ("status", 1), ("_id", -1)])
+            await self.sentence_store_collection.create_index("tenant_id")
+            # Abandoned resumable uploads expire on their own
+            await self.upload_sessions_collection.create_index("updated_at", expireAfterSeconds=settings.UPLOAD_SESSION_TTL_S)
+            # Blocks staged by a snapshot import that died before applying them
+            await self.snapshot_staging_collection.create_index([("import_id", 1), ("seq", 1)])
+            await self.snapshot_staging_collection.create_index("created_at", expireAfterSeconds=settings.SNAPSHOT_STAGING_TTL_S)
+            logger.info("Ensured metadata collection indexes")
+        except Exception as e:
+            logger.error(f"Error creating metadata indexes: {e}")
+            raise
+
+    async def _ensure_vector_id_index(self, collection):
+        """Unique index on the node id, so a retried vector write cannot store a node twice"""
+        try:
+            await collection.create_index("id", unique=True)
+        except OperationFailure as e:
+            # Collections written before the index existed may already hold duplicates
+            logger.warning(f"Could not create unique id index on {collection.name}: {e}")
+
+    async def _ensure_vector_search_indexes(self):
+        """Create vector search indexes declaring the metadata filter fields used for pre-filtering"""
+        if not settings.MANAGE_VECTOR_SEARCH_INDEXES:
+            return
+
+        for strategy in ("vector_store", "sentence_window"):
+            self._ensure_search_index(*self._strategy_target(strategy))
+
+    def _ensure_search_index(self, collection_name: str, index_name: str):
+        """Create or update one collection's vector search index"""
+        definition = {
+            "fields": [
+                {
+                    "type": "vector",
+                    "path": "embedding",
+                    "numDimensions": settings.EMBEDDING_DIMENSIONS,
+                    "similarity": "cosine"
+                }
+            ] + [{"type": "filter", "path": f"metadata.{field}"} for field in VECTOR_FILTER_FIELDS]
+        }
+        collection = self.get_sync_collection(collection_name)
+        try:
+            existing = {index["name"]: index for index in collection.list_search_indexes()}
+            if index_name not in existing:
+                collection.create_search_index(
+                    SearchIndexModel(definition=definition, name=index_name, type="vectorSearch")
+                )
+                logger.info(f"Created vector search index {index_name} on {collection_name}")
+            else:
+                current = existing[index_name].get("latestDefinition") or {}
+                # Updating triggers an Atlas rebuild, so only when a required field is missing or differs
+                if not self._definition_covers(current, definition):
+                    collection.update_search_index(index_name, self._merge_definition(current, definition))
+                    logger.info(f"Updated vector search index {index_name} on {collection_name}")
+        except Exception as e:
+            # Plain MongoDB deployments have no Atlas Search; retrieval still works unfiltered there
+            logger.warning(f"Could not ensure vector search index {index_name} on {collection_name}: {e}")
+
+    @staticmethod
+    def _field_key(field: Dict[str, Any]) -> Tuple[str, str]:
+        return field.get("type"), field.get("path")
+
+    @classmethod
+    def _definition_covers(cls, existing: Dict[str, Any], definition: Dict[str, Any]) -> bool:
+        """Whether an index definition already has every field of ``definition``, in any order"""
+        fields = {cls._field_key(field): field for field in existing.get("fields", [])}
+        return all(fields.get(cls._field_key(field)) == field for field in definition["fields"])
+
+    @classmethod
+    def _merge_definition(cls, existing: Dict[str, Any], definition: Dict[str, Any]) -> Dict[str, Any]:
+        """``definition``'s fields plus any extra fields added to the live index by hand"""
+        required = {cls._field_key(field) for field in definition["fields"]}
+        extra = [field for field in existing.get("fields", []) if cls._field_key(field) not in required]
+        return {**existing, "fields": definition["fields"] + extra}
+
     async def _initialize_vector_stores(self):
         """Initialize vector stores for different indexing strategies"""
         try:
             # Vector Store strategy
-            self.vector_stores["vector_store"] = MongoDBAtlasVectorSearch(
-                mongo_client=self.client,
-                database_name=settings.DATABASE_NAME,
-                collection_name=settings.VECTOR_STORE_COLLECTION,
-                index_name=settings.VECTOR_STORE_INDEX,
-            )
+            self.vector_stores["vector_store"] = self._create_vector_store(*self._strategy_target("vector_store"))
             logger.info("Initialized Vector Store collection")
             
             # Sentence Window strategy
-            self.vector_stores["sentence_window"] = MongoDBAtlasVectorSearch(
-                mongo_client=self.client,
-                database_name=settings.DATABASE_NAME,
-                collection_name=settings.SENTENCE_WINDOW_COLLECTION,
-                index_name=settings.SENTENCE_WINDOW_INDEX,
-            )
+            self.vector_stores["sentence_window"] = self._create_vector_store(*self._strategy_target("sentence_window"))
             logger.info("Initialized Sentence Window collection")
             
         except Exception as e:
             logger.error(f"Error initializing vector stores: {e}")
             raise
     
-    def get_vector_store(self, strategy: str) -> MongoDBAtlasVectorSearch:
-        """Get vector store for specific strategy"""
-        if strategy not in self.vector_stores:
+    async def ping(self) -> bool:
+        """Round-trip a ping to MongoDB"""
+        if self.client is None:
+            raise RuntimeError("Database client is not connected")
+        await self.client.admin.command('ping')
+        return True
+
+    def _create_vector_store(self, collection_name: str, index_name: str) -> MongoDBAtlasVectorSearch:
+        return MongoDBAtlasVectorSearch(
+            mongo_client=self.get_sync_client(),
+            database_name=settings.DATABASE_NAME,
+            collection_name=collection_name,
+            index_name=index_name,
+        )
+
+    @staticmethod
+    def _strategy_target(strategy: str) -> Tuple[str, str]:
+        """Base collection and vector search index names for a strategy"""
+        targets = {
+            "vector_store": (settings.VECTOR_STORE_COLLECTION, settings.VECTOR_STORE_INDEX),
+            "sentence_window": (settings.SENTENCE_WINDOW_COLLECTION, settings.SENTENCE_WINDOW_INDEX)
+        }
+        if strategy not in targets:
             raise ValueError(f"Unknown strategy: {strategy}")
-        return self.vector_stores[strategy]
+        return targets[strategy]
+
+    def collection_name(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> str:
+        """Name of the collection holding a tenant's vectors for a strategy"""
+        base, _ = self._strategy_target(strategy)
+        return base if is_default_tenant(tenant) else f"{base}__{tenant}"
+
+    def get_vector_store(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> MongoDBAtlasVectorSearch:
+        """Get vector store for specific strategy, scoped to a tenant's collection"""
+        if is_default_tenant(tenant):
+            if strategy not in self.vector_stores:
+                raise ValueError(f"Unknown strategy: {strategy}")
+            return self.vector_stores[strategy]
+
+        key = (tenant, strategy)
+        vector_store = self.tenant_vector_stores.get(key)
+        if vector_store is None:
+            _, index_name = self._strategy_target(strategy)
+            vector_store = self._create_vector_store(self.collection_name(strategy, tenant), index_name)
+            self.tenant_vector_stores[key] = vector_store
+        return vector_store
     
+    def get_strategy_collection(self, strategy: str, tenant: str = settings.DEFAULT_TENANT):
+        """Get async (motor) collection backing a strategy's vector store"""
+        collections = {
+            "vector_store": self.vector_store_collection,
+            "sentence_window": self.sentence_window_collection
+        }
+        if strategy not in collections:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        if is_default_tenant(tenant):
+            return collections[strategy]
+        return self.database[self.collection_name(strategy, tenant)]
+
+    async def ensure_tenant_collections(self, tenant: str):
+        """Create a tenant's node id and vector search indexes before its first write"""
+        if is_default_tenant(tenant) or tenant in self._tenant_collections_ready:
+            return
+        for strategy in ("vector_store", "sentence_window"):
+            collection_name = self.collection_name(strategy, tenant)
+            try:
+                # Search indexes can only be defined on existing collections
+                await self.database.create_collection(collection_name)
+            except CollectionInvalid:
+                pass
+            await self._ensure_vector_id_index(self.database[collection_name])
+            if settings.MANAGE_VECTOR_SEARCH_INDEXES:
+                _, index_name = self._strategy_target(strategy)
+                await asyncio.to_thread(self._ensure_search_index, collection_name, index_name)
+        self._tenant_collections_ready.add(tenant)
+        logger.info(f"Prepared collections for tenant {tenant}")
+
+    def get_sync_client(self) -> pymongo.MongoClient:
+        """Get the shared blocking pymongo client, created on first use"""
+        if self.sync_client is None:
+            self.sync_client = pymongo.MongoClient(
+                settings.MONGODB_URI,
+                maxPoolSize=settings.MONGODB_MAX_POOL_SIZE
+            )
+        return self.sync_client
+
+    def get_sync_collection(self, collection_name: str):
+        """Get a blocking pymongo collection for synchronous code paths (e.g. query post-processors)"""
+        return self.get_sync_client()[settings.DATABASE_NAME][collection_name]
+
     def get_collection_info(self) -> Dict[str, Dict[str, str]]:
         """Get collection information for different strategies"""
         return {
@@ -89,6 +285,27 @@ class DatabaseManager:
             },
             "metadata": {
                 "collection": settings.METADATA_COLLECTION
+            },
+            "sentence_store": {
+                "collection": settings.SENTENCE_STORE_COLLECTION
+            },
+            "counters": {
+                "collection": settings.COUNTERS_COLLECTION
+            },
+            "index_registry": {
+                "collection": settings.INDEX_REGISTRY_COLLECTION
+            },
+            "extracted_text": {
+                "collection": settings.EXTRACTED_TEXT_COLLECTION
+            },
+            "embedding_cache": {
+                "collection": settings.EMBEDDING_CACHE_COLLECTION
+            },
+            "feedback_cache": {
+                "collection": settings.FEEDBACK_CACHE_COLLECTION
+            },
+            "snapshot_staging": {
+                "collection": settings.SNAPSHOT_STAGING_COLLECTION
             }
         }
 
@@ -97,16 +314,18 @@ class DatabaseManager:
         if self.client:
             self.client.close()
             logger.info("Database connection closed")
+        if self.sync_client:
+            self.sync_client.close()
+            self.sync_client = None
 
-    async def clear_collection(self, strategy: str):
+    async def clear_collection(self, strategy: str, tenant: str = settings.DEFAULT_TENANT):
         """Clear specific strategy collection"""
         try:
-            if strategy == "vector_store":
-                await self.vector_store_collection.delete_many({})
-            elif strategy == "sentence_window":
-                await self.sentence_window_collection.delete_many({})
+            await self.get_strategy_collection(strategy, tenant).delete_many({})
+            if strategy == "sentence_window":
+                await self.sentence_store_collection.delete_many(tenant_filter(tenant))
             
-            logger.info(f"Cleared {strategy} collection")
+            logger.info(f"Cleared {strategy} collection for tenant {tenant}")
         except Exception as e:
             logger.error(f"Error clearing {strategy} collection: {e}")
             raise
@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import json
+from typing import Any, List, Optional
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from config.settings import settings
+import logging
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Suffixes the compression middleware adds to ETags of encoded bodies
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available, compact stdlib JSON otherwise"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag for a resource identified by the given parts"""
+    digest = hashlib.sha1("\x00".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check ``If-None-Match`` against an ETag, ignoring weak and encoding markers"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in _ENCODING_SUFFIXES:
+            if candidate.endswith(f'{suffix}"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+        if candidate == etag:
+            return True
+    return False
+
+def not_modified(etag: str, vary: Optional[str] = None) -> Response:
+    """Empty 304 response for a matching ETag"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if vary:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+def set_etag(response: Response, etag: str, vary: Optional[str] = None):
+    """Attach an ETag that clients must revalidate before reuse, optionally varying on request headers"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if vary:
+        response.headers["Vary"] = vary
+
+def _accepted_encodings(header: str) -> List[str]:
+    accepted = []
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.append(name.strip().lower())
+    return accepted
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses above a size threshold.
+
+    Brotli is used when the ``brotli`` package is installed and the client
+    accepts it, gzip otherwise. Streamed responses are passed through as-is.
+    """
+
+    COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_BYTES if minimum_size is None else minimum_size
+
+    def _choose_encoding(self, scope) -> Optional[str]:
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accepted = _accepted_encodings(value.decode("latin-1"))
+                if brotli is not None and "br" in accepted:
+                    return "br"
+                if "gzip" in accepted:
+                    return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        encoding = self._choose_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        body_parts: List[bytes] = []
+        passthrough = False
+
+        async def buffered_send(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # Streaming: flush what we have and stop buffering
+                passthrough = True
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"".join(body_parts), "more_body": True})
+                return
+            await self._send_complete(send, start_message, b"".join(body_parts), encoding)
+
+        await self.app(scope, receive, buffered_send)
+
+    async def _send_complete(self, send, start_message, body: bytes, encoding: str):
+        headers = [(name, value) for name, value in start_message.get("headers", [])]
+        names = {name.lower() for name, _ in headers}
+        content_type = next((value.decode("latin-1") for name, value in headers if name.lower() == b"content-type"), "")
+        compressible = (
+            len(body) >= self.minimum_size
+            and b"content-encoding" not in names
+            and content_type.startswith(self.COMPRESSIBLE_TYPES)
+        )
+        if compressible:
+            if encoding == "br":
+                body = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+            else:
+                body = gzip.compress(body, compresslevel=settings.GZIP_COMPRESSION_LEVEL)
+            rewritten = []
+            for name, value in headers:
+                lowered = name.lower()
+                if lowered == b"content-length":
+                    continue
+                if lowered == b"etag" and value.endswith(b'"'):
+                    # A strong ETag must differ between encodings of the same resource
+                    value = value[:-1] + f"-{encoding}".encode("ascii") + b'"'
+                rewritten.append((name, value))
+            headers = rewritten + [
+                (b"content-encoding", encoding.encode("ascii")),
+                (b"content-length", str(len(body)).encode("ascii")),
+            ]
+        if b"vary" not in names:
+            headers.append((b"vary", b"Accept-Encoding"))
+        else:
+            headers = [
+                (name, value + b", Accept-Encoding" if name.lower() == b"vary" and b"accept-encoding" not in value.lower() else value)
+                for name, value in headers
+            ]
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
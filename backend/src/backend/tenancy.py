@@ -0,0 +1,126 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional
+from fastapi import Header, HTTPException
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tenant ids end up in collection names, registry keys and counter ids
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,47}$")
+
+def normalize_tenant(tenant_id: Optional[str]) -> str:
+    """Validate a tenant id, falling back to the default tenant"""
+    tenant_id = (tenant_id or "").strip().lower() or settings.DEFAULT_TENANT
+    if not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    return tenant_id
+
+def is_default_tenant(tenant: str) -> bool:
+    return tenant == settings.DEFAULT_TENANT
+
+def tenant_key(tenant: str, name: str) -> str:
+    """Namespace a per-tenant key; the default tenant keeps the bare name"""
+    return name if is_default_tenant(tenant) else f"{tenant}/{name}"
+
+def tenant_filter(tenant: str) -> Dict[str, Any]:
+    """Query matching a tenant's records; records written before tenancy belong to the default tenant"""
+    if is_default_tenant(tenant):
+        return {"tenant_id": {"$in": [None, tenant]}}
+    return {"tenant_id": tenant}
+
+def foreign_tenant_filter(tenant: str) -> Dict[str, Any]:
+    """Query matching records owned by any other tenant"""
+    if is_default_tenant(tenant):
+        return {"tenant_id": {"$nin": [None, tenant]}}
+    return {"tenant_id": {"$ne": tenant}}
+
+def tenant_upload_dir(tenant: str) -> str:
+    """Directory a tenant's uploaded files are stored in"""
+    return settings.UPLOAD_DIR if is_default_tenant(tenant) else os.path.join(settings.UPLOAD_DIR, tenant)
+
+async def get_tenant(x_tenant_id: Optional[str] = Header(None)) -> str:
+    """Route dependency resolving the ``X-Tenant-Id`` header"""
+    try:
+        return normalize_tenant(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+class IdleCache:
+    """Thread-safe LRU mapping whose entries expire after ``idle_s`` without use.
+
+    Expired entries are swept on access, so an idle tenant's vector store or
+    index is dropped without a background task. Entries are per worker process.
+    """
+
+    def __init__(self, name: str, idle_s: float = None, max_entries: int = None):
+        self.name = name
+        self.idle_s = idle_s if idle_s is not None else settings.TENANT_CACHE_IDLE_S
+        self.max_entries = max_entries or settings.TENANT_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            evicted = self._sweep()
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._entries.move_to_end(key)
+        self._notify(evicted)
+        return entry[0] if entry is not None else default
+
+    def __setitem__(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = [value, time.monotonic()]
+            self._entries.move_to_end(key)
+            evicted = self._sweep()
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+                self.evictions += 1
+        self._notify(evicted)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _sweep(self) -> List[Any]:
+        cutoff = time.monotonic() - self.idle_s
+        evicted = []
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[1] >= cutoff:
+                break
+            evicted.append((key, self._entries.pop(key)))
+        self.evictions += len(evicted)
+        return evicted
+
+    def _notify(self, evicted: List[Any]):
+        for key, entry in evicted:
+            logger.info(f"Evicted {self.name} cache entry: {key}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "capacity": self.max_entries, "idle_s": self.idle_s, "evictions": self.evictions}
@@ -9,30 +9,105 @@ class Settings(BaseSettings):
     API_HOST: str = os.environ.get("API_HOST", "0.0.0.0")
     API_PORT: int = os.environ.get("API_PORT", 8080)
     DEBUG: bool = os.environ.get("DEBUG", "True") == "True"
+    API_WORKERS: int = int(os.environ.get("API_WORKERS", 1))
+    HEALTH_CHECK_TIMEOUT_S: float = float(os.environ.get("HEALTH_CHECK_TIMEOUT_S", 2.0))
 
-    # OpenAI
-    # OPENAI_API_KEY: str = os.environ.get("OPENAI_API_KEY", "your_openai_api_key_here")
-    # LITELLM_API_KEY: str = os.environ.get("LITELLM_API_KEY", "your_litellm_api_key_here")   
+    # Response compression (brotli when installed and accepted, else gzip)
+    COMPRESSION_MIN_BYTES: int = int(os.environ.get("COMPRESSION_MIN_BYTES", 1024))
+    GZIP_COMPRESSION_LEVEL: int = int(os.environ.get("GZIP_COMPRESSION_LEVEL", 6))
+    BROTLI_QUALITY: int = int(os.environ.get("BROTLI_QUALITY", 4))
+
+    # Admission control: concurrent requests per pool and how many may wait for a slot
+    QUERY_MAX_CONCURRENCY: int = int(os.environ.get("QUERY_MAX_CONCURRENCY", 8))
+    QUERY_MAX_QUEUE: int = int(os.environ.get("QUERY_MAX_QUEUE", 32))
+    UPLOAD_MAX_CONCURRENCY: int = int(os.environ.get("UPLOAD_MAX_CONCURRENCY", 2))
+    UPLOAD_MAX_QUEUE: int = int(os.environ.get("UPLOAD_MAX_QUEUE", 8))
+    EVALUATION_MAX_CONCURRENCY: int = int(os.environ.get("EVALUATION_MAX_CONCURRENCY", 2))
+    EVALUATION_MAX_QUEUE: int = int(os.environ.get("EVALUATION_MAX_QUEUE", 4))
+    ADMISSION_QUEUE_TIMEOUT_S: float = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_S", 10.0))
+
+    # Identical concurrent queries (same tenant, question, strategy, top_k, filters and index version) share one execution
+    QUERY_COALESCING_ENABLED: bool = os.environ.get("QUERY_COALESCING_ENABLED", "True") == "True"
+
+    # Request tracing (opt-in per request via X-Trace header, or sampled)
+    TRACE_SAMPLE_RATE: float = float(os.environ.get("TRACE_SAMPLE_RATE", 0.0))
+    TRACE_STORE_SIZE: int = int(os.environ.get("TRACE_STORE_SIZE", 200))
+    TRACE_PROFILE_INTERVAL_MS: float = float(os.environ.get("TRACE_PROFILE_INTERVAL_MS", 5.0))
+
+    # OpenAI and LiteLLM keys are only needed for those TruLens feedback providers
+    OPENAI_API_KEY: str = os.environ.get("OPENAI_API_KEY", "")
+    LITELLM_API_KEY: str = os.environ.get("LITELLM_API_KEY", "")
     GEMINI_API_KEY: str = os.environ.get("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash-latest")
+    EMBEDDING_MODEL: str = os.environ.get("EMBEDDING_MODEL", "models/embedding-001")
+    # "grpc" keeps one long-lived HTTP/2 channel per shared client; "rest" uses a pooled keep-alive HTTP session
+    GEMINI_TRANSPORT: str = os.environ.get("GEMINI_TRANSPORT", "grpc")
+
+    # Model call resilience: deadlines, hedged duplicates and circuit breaking
+    LLM_CALL_DEADLINE_S: float = float(os.environ.get("LLM_CALL_DEADLINE_S", 30.0))
+    EMBED_CALL_DEADLINE_S: float = float(os.environ.get("EMBED_CALL_DEADLINE_S", 60.0))
+    MODEL_HEDGING_ENABLED: bool = os.environ.get("MODEL_HEDGING_ENABLED", "True") == "True"
+    MODEL_HEDGE_PERCENTILE: float = float(os.environ.get("MODEL_HEDGE_PERCENTILE", 95.0))
+    MODEL_HEDGE_MIN_DELAY_S: float = float(os.environ.get("MODEL_HEDGE_MIN_DELAY_S", 1.0))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_TIMEOUT_S: float = float(os.environ.get("CIRCUIT_RESET_TIMEOUT_S", 30.0))
+    MODEL_CALL_THREADS: int = int(os.environ.get("MODEL_CALL_THREADS", 16))
+
+    # Offline batch evaluation: concurrent queries plus feedback calls in flight
+    BATCH_EVAL_CONCURRENCY: int = int(os.environ.get("BATCH_EVAL_CONCURRENCY", 8))
 
     # MongoDB
     MONGODB_URI: str = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.environ.get("DATABASE_NAME", "mydatabase")
+    MONGODB_MAX_POOL_SIZE: int = int(os.environ.get("MONGODB_MAX_POOL_SIZE", 50))
     
     # Collections for different indexing strategies
-    VECTOR_STORE_COLLECTION_NAME: str = os.environ.get("VECTOR_STORE_COLLECTION_NAME", "vector_store_docs")
+    VECTOR_STORE_COLLECTION: str = os.environ.get("VECTOR_STORE_COLLECTION_NAME", "vector_store_docs")
     SENTENCE_WINDOW_COLLECTION: str = os.environ.get("SENTENCE_WINDOW_COLLECTION", "sentence_window_docs")
     
+    METADATA_COLLECTION: str = os.environ.get("METADATA_COLLECTION", "documents")
+    COUNTERS_COLLECTION: str = os.environ.get("COUNTERS_COLLECTION", "document_counters")
+    INDEX_REGISTRY_COLLECTION: str = os.environ.get("INDEX_REGISTRY_COLLECTION", "index_registry")
+    EXTRACTED_TEXT_COLLECTION: str = os.environ.get("EXTRACTED_TEXT_COLLECTION", "extracted_text")
+    EMBEDDING_CACHE_COLLECTION: str = os.environ.get("EMBEDDING_CACHE_COLLECTION", "embedding_cache")
+    REINDEX_JOBS_COLLECTION: str = os.environ.get("REINDEX_JOBS_COLLECTION", "reindex_jobs")
+    UPLOAD_SESSIONS_COLLECTION: str = os.environ.get("UPLOAD_SESSIONS_COLLECTION", "upload_sessions")
+    FEEDBACK_CACHE_COLLECTION: str = os.environ.get("FEEDBACK_CACHE_COLLECTION", "feedback_cache")
+    SNAPSHOT_STAGING_COLLECTION: str = os.environ.get("SNAPSHOT_STAGING_COLLECTION", "snapshot_staging")
+    INDEX_REGISTRY_REFRESH_S: float = float(os.environ.get("INDEX_REGISTRY_REFRESH_S", 2.0))
+
+    # Two-level retrieval (opt-in): rank documents by centroid, then search only the top ones' chunks (0 searches every chunk)
+    ROUTING_TOP_DOCUMENTS: int = int(os.environ.get("ROUTING_TOP_DOCUMENTS", 0))
+    ROUTING_REFRESH_S: float = float(os.environ.get("ROUTING_REFRESH_S", 2.0))
+
+    # Tenants: each non-default tenant gets its own strategy collections (``<collection>__<tenant>``);
+    # per-tenant vector stores and indexes are cached and evicted once idle
+    DEFAULT_TENANT: str = os.environ.get("DEFAULT_TENANT", "default")
+    TENANT_CACHE_IDLE_S: float = float(os.environ.get("TENANT_CACHE_IDLE_S", 900))
+    TENANT_CACHE_MAX_ENTRIES: int = int(os.environ.get("TENANT_CACHE_MAX_ENTRIES", 256))
+
     # Vector Search Indexes
     VECTOR_STORE_INDEX: str = os.getenv("VECTOR_STORE_INDEX", "vector_store_index")
     SENTENCE_WINDOW_INDEX: str = os.getenv("SENTENCE_WINDOW_INDEX", "sentence_window_index")
+    MANAGE_VECTOR_SEARCH_INDEXES: bool = os.environ.get("MANAGE_VECTOR_SEARCH_INDEXES", "True") == "True"
+    EMBEDDING_DIMENSIONS: int = int(os.environ.get("EMBEDDING_DIMENSIONS", 768))
     
 
     # File upload
     UPLOAD_DIR: str = os.environ.get("UPLOAD_DIR", "./uploads")
     ALLOWED_FILE_TYPES: str = os.environ.get("ALLOWED_FILE_TYPES", ".txt,.pdf,.docx")   
     MAX_FILE_SIZE_MB: int = int(os.environ.get("MAX_FILE_SIZE_MB", 52428800))
+    UPLOAD_CHUNK_SIZE: int = int(os.environ.get("UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024))
+    UPLOAD_SESSION_TTL_S: int = int(os.environ.get("UPLOAD_SESSION_TTL_S", 24 * 3600))
+
+    # Index snapshots: rows per columnar block and zlib level for text columns
+    SNAPSHOT_BLOCK_ROWS: int = int(os.environ.get("SNAPSHOT_BLOCK_ROWS", 2048))
+    SNAPSHOT_COMPRESSION_LEVEL: int = int(os.environ.get("SNAPSHOT_COMPRESSION_LEVEL", 6))
+    SNAPSHOT_STAGING_TTL_S: int = int(os.environ.get("SNAPSHOT_STAGING_TTL_S", 24 * 3600))
+
+    # Document listing
+    DOCUMENT_LIST_PAGE_SIZE: int = int(os.environ.get("DOCUMENT_LIST_PAGE_SIZE", 50))
+    DOCUMENT_LIST_MAX_PAGE_SIZE: int = int(os.environ.get("DOCUMENT_LIST_MAX_PAGE_SIZE", 500))
 
     # CORS
     ALLOWED_ORIGINS: str = os.environ.get("ALLOWED_ORIGINS", "*").split(",")
@@ -41,6 +116,26 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = int(os.environ.get("CHUNK_SIZE", 1024))
     CHUNK_OVERLAP: int = int(os.environ.get("CHUNK_OVERLAP", 200))
     SENTENCE_WINDOW_SIZE: int = int(os.getenv("SENTENCE_WINDOW_SIZE", 3))
+    TEXT_CACHE_COMPRESSION_LEVEL: int = int(os.environ.get("TEXT_CACHE_COMPRESSION_LEVEL", 6))
+
+    # Ingestion pipeline: workers per stage (parse, chunk, embed, store), items buffered between stages
+    # and nodes per batch handed from chunking to embedding and storing
+    INGEST_PARSE_WORKERS: int = int(os.environ.get("INGEST_PARSE_WORKERS", 2))
+    INGEST_CHUNK_WORKERS: int = int(os.environ.get("INGEST_CHUNK_WORKERS", 2))
+    INGEST_EMBED_WORKERS: int = int(os.environ.get("INGEST_EMBED_WORKERS", 4))
+    INGEST_STORE_WORKERS: int = int(os.environ.get("INGEST_STORE_WORKERS", 2))
+    INGEST_QUEUE_SIZE: int = int(os.environ.get("INGEST_QUEUE_SIZE", 4))
+    INGEST_BATCH_NODES: int = int(os.environ.get("INGEST_BATCH_NODES", 100))
+
+    # Vector writes
+    VECTOR_WRITE_BATCH_SIZE: int = int(os.environ.get("VECTOR_WRITE_BATCH_SIZE", 500))
+    VECTOR_WRITE_CONCURRENCY: int = int(os.environ.get("VECTOR_WRITE_CONCURRENCY", 4))
+    VECTOR_WRITE_MAX_RETRIES: int = int(os.environ.get("VECTOR_WRITE_MAX_RETRIES", 3))
+    VECTOR_WRITE_RETRY_BACKOFF_S: float = float(os.environ.get("VECTOR_WRITE_RETRY_BACKOFF_S", 0.5))
+
+    # Sentence window storage
+    SENTENCE_STORE_COLLECTION: str = os.environ.get("SENTENCE_STORE_COLLECTION", "sentence_store")
+    SENTENCE_CACHE_SIZE: int = int(os.environ.get("SENTENCE_CACHE_SIZE", 256))
 
     class Config:
         env_file = ".env"
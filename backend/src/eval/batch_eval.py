@@ -0,0 +1,248 @@
+"""Offline batch evaluation of indexing strategies.
+
+Usage (from ``backend/src``, against the configured MongoDB and Gemini)::
+
+    python -m eval.batch_eval questions.json --strategies vector_store sentence_window --output leaderboard.json
+
+``questions.json`` is a JSON list of questions (strings, or objects with a
+``question`` key). ``benchmarks/batch_eval.py`` runs the same evaluator
+offline against local fakes.
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from backend.database import db_manager
+from backend.tenancy import normalize_tenant
+from config.settings import settings
+from eval.feedback_cache import feedback_cache
+from eval.tru_eval import TruLensEvaluator
+from rag.indexing import indexing_manager
+from rag.models import model_registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_NAMES = ["Groundedness", "Answer Relevance", "Context Relevance"]
+
+def _as_score(result: Any) -> Tuple[float, Optional[str]]:
+    """Normalize a TruLens ``*_with_cot_reasons`` result to (score, reason)"""
+    score, reason = result if isinstance(result, tuple) else (result, None)
+    if isinstance(score, dict):
+        # Per-statement groundedness scores
+        score = sum(score.values()) / len(score) if score else 0.0
+    return float(score), (str(reason) if reason is not None else None)
+
+class BatchEvaluator:
+    """Evaluate a question set against several strategies.
+
+    Queries and feedback calls share one concurrency cap. Answers are
+    memoized per (strategy, index version, question, top_k), so a rerun
+    against an unchanged index scores the same answers. Every feedback call
+    is memoized by (feedback name, input, context, output hash), and each
+    reads only the fields it scores: groundedness ignores the question and
+    context relevance is scored per retrieved chunk. A rerun therefore only
+    pays for indexes, answers and contexts that changed.
+    """
+
+    def __init__(
+        self,
+        provider_name: str = "gemini",
+        concurrency: int = None,
+        similarity_top_k: int = 5,
+        tenant: str = settings.DEFAULT_TENANT
+    ):
+        self.provider_name = provider_name
+        self.concurrency = concurrency or settings.BATCH_EVAL_CONCURRENCY
+        self.similarity_top_k = similarity_top_k
+        self.tenant = tenant
+        self.stats = {"queries": 0, "answer_cache_hits": 0, "feedback_calls": 0, "feedback_cache_hits": 0}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def provider(self):
+        return model_registry.get_feedback_provider(self.provider_name)
+
+    @property
+    def provider_id(self) -> str:
+        return f"{self.provider_name}:{getattr(self.provider, 'model_engine', '')}"
+
+    async def run(self, questions: List[str], strategies: List[str]) -> Dict[str, Any]:
+        """Evaluate every question with every strategy and rank the strategies"""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._inflight = {}
+        self.stats = {"queries": 0, "answer_cache_hits": 0, "feedback_calls": 0, "feedback_cache_hits": 0}
+
+        await indexing_manager.sync_registry(force=True, tenant=self.tenant)
+        missing = [strategy for strategy in strategies if not indexing_manager.has_index(strategy, self.tenant)]
+        if missing:
+            raise ValueError(f"No index available for strategies: {missing}")
+
+        start = time.perf_counter()
+        rows = await asyncio.gather(*(self._evaluate(question, strategy) for strategy in strategies for question in questions))
+        elapsed = time.perf_counter() - start
+
+        leaderboard = self.leaderboard(rows, strategies)
+        logger.info(
+            f"Evaluated {len(questions)} questions x {len(strategies)} strategies in {elapsed:.2f}s; "
+            f"{self.stats['queries']} queries ({self.stats['answer_cache_hits']} memoized), "
+            f"{self.stats['feedback_calls']} feedback calls ({self.stats['feedback_cache_hits']} memoized)"
+        )
+        return {
+            "questions": len(questions),
+            "strategies": strategies,
+            "elapsed_s": round(elapsed, 3),
+            "stats": dict(self.stats),
+            "leaderboard": leaderboard,
+            "summary": TruLensEvaluator.create_comparison_summary({
+                entry["strategy"]: {"metrics": {name: {"score": score} for name, score in entry["metrics"].items()}}
+                for entry in leaderboard
+            }),
+            "results": rows
+        }
+
+    async def _answer(self, question: str, strategy: str) -> Dict[str, Any]:
+        """Answer, contexts and query latency, memoized for the strategy's current index version"""
+        index_version = indexing_manager.get_index_version(strategy, self.tenant)
+        key = feedback_cache.answer_key(self.tenant, strategy, index_version, question, self.similarity_top_k)
+        cached = await feedback_cache.get_answer(key)
+        if cached is not None:
+            self.stats["answer_cache_hits"] += 1
+            return cached
+
+        query_engine = indexing_manager.get_query_engine(self.similarity_top_k, strategy, tenant=self.tenant)
+        async with self._semaphore:
+            start = time.perf_counter()
+            response = await asyncio.to_thread(query_engine.query, question)
+            latency = round(time.perf_counter() - start, 4)
+        self.stats["queries"] += 1
+
+        answer = str(response)
+        contexts = [node.node.get_content() for node in response.source_nodes]
+        await feedback_cache.put_answer(key, answer, contexts, latency)
+        return {"answer": answer, "contexts": contexts, "latency_s": latency}
+
+    async def _evaluate(self, question: str, strategy: str) -> Dict[str, Any]:
+        try:
+            result = await self._answer(question, strategy)
+            scores = await self._score(question, result["contexts"], result["answer"])
+            return {
+                "question": question,
+                "strategy": strategy,
+                "answer": result["answer"],
+                "latency_s": result["latency_s"],
+                "metrics": {name: {"score": score} for name, score in scores.items()}
+            }
+        except Exception as e:
+            logger.error(f"Error evaluating {strategy} on {question!r}: {str(e)}")
+            return {"question": question, "strategy": strategy, "error": str(e)}
+
+    async def _score(self, question: str, contexts: List[str], answer: str) -> Dict[str, float]:
+        """Run the three RAG triad feedbacks for one answer"""
+        provider = self.provider
+        context = "\n\n".join(contexts)
+        groundedness, answer_relevance, *context_scores = await asyncio.gather(
+            self._feedback("Groundedness", "", context, answer, self._groundedness, context, answer),
+            self._feedback("Answer Relevance", question, "", answer, provider.relevance_with_cot_reasons, question, answer),
+            *(
+                self._feedback("Context Relevance", question, chunk, "", provider.relevance_with_cot_reasons, question, chunk)
+                for chunk in contexts
+            )
+        )
+        return {
+            "Groundedness": groundedness,
+            "Answer Relevance": answer_relevance,
+            "Context Relevance": sum(context_scores) / len(context_scores) if context_scores else 0.0
+        }
+
+    def _groundedness(self, context: str, answer: str) -> Any:
+        measure = getattr(self.provider, "groundedness_measure_with_cot_reasons", None)
+        if measure is None:
+            # Older TruLens releases expose groundedness through a separate class
+            from trulens_eval.feedback import Groundedness
+            measure = Groundedness(groundedness_provider=self.provider).groundedness_measure_with_cot_reasons
+        return measure(context, answer)
+
+    async def _feedback(self, name: str, input_text: str, context: str, output: str, fn: Callable[..., Any], *args: Any) -> float:
+        """Memoized feedback call; identical calls in flight share one provider call"""
+        key = feedback_cache.key(self.provider_id, name, input_text, context, output)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_feedback(key, name, fn, *args))
+            self._inflight[key] = task
+        return await task
+
+    async def _compute_feedback(self, key: str, name: str, fn: Callable[..., Any], *args: Any) -> float:
+        cached = await feedback_cache.get(key)
+        if cached is not None:
+            self.stats["feedback_cache_hits"] += 1
+            return cached["score"]
+        async with self._semaphore:
+            score, reason = _as_score(await asyncio.to_thread(fn, *args))
+        self.stats["feedback_calls"] += 1
+        await feedback_cache.put(key, name, score, reason)
+        return score
+
+    @staticmethod
+    def leaderboard(rows: List[Dict[str, Any]], strategies: List[str]) -> List[Dict[str, Any]]:
+        """Mean feedback scores and query latency per strategy, best overall first"""
+        entries = []
+        for strategy in strategies:
+            evaluated = [row for row in rows if row["strategy"] == strategy and "error" not in row]
+            latencies = sorted(row["latency_s"] for row in evaluated)
+            metrics = {
+                name: round(sum(row["metrics"][name]["score"] for row in evaluated) / len(evaluated), 4) if evaluated else 0.0
+                for name in FEEDBACK_NAMES
+            }
+            entries.append({
+                "strategy": strategy,
+                "evaluated": len(evaluated),
+                "errors": sum(1 for row in rows if row["strategy"] == strategy and "error" in row),
+                "metrics": metrics,
+                "overall": round(sum(metrics.values()) / len(metrics), 4),
+                "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else None,
+                "p95_latency_ms": round(latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] * 1000, 2) if latencies else None
+            })
+        entries.sort(key=lambda entry: entry["overall"], reverse=True)
+        for rank, entry in enumerate(entries, start=1):
+            entry["rank"] = rank
+        return entries
+
+def load_questions(path: str) -> List[str]:
+    """Read a JSON list of questions (strings or objects with a ``question`` key)"""
+    with open(path) as f:
+        items = json.load(f)
+    return [item["question"] if isinstance(item, dict) else str(item) for item in items]
+
+async def _main(args):
+    await db_manager.connect()
+    try:
+        evaluator = BatchEvaluator(args.provider, args.concurrency, args.top_k, normalize_tenant(args.tenant))
+        return await evaluator.run(load_questions(args.questions), args.strategies)
+    finally:
+        await db_manager.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", help="JSON file with a list of questions")
+    parser.add_argument("--strategies", nargs="+", default=["vector_store", "sentence_window"])
+    parser.add_argument("--provider", default="gemini", choices=["gemini", "openai", "litellm"])
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_EVAL_CONCURRENCY)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--tenant", default=settings.DEFAULT_TENANT)
+    parser.add_argument("--output", help="Write the full report (leaderboard and per-question results) as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    for entry in report["leaderboard"]:
+        scores = ", ".join(f"{name} {score:.3f}" for name, score in entry["metrics"].items())
+        print(f"{entry['rank']}. {entry['strategy']}: overall {entry['overall']:.3f} ({scores}); mean latency {entry['mean_latency_ms']} ms")
+
+if __name__ == "__main__":
+    main()
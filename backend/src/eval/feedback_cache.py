@@ -0,0 +1,63 @@
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+from backend.database import db_manager
+from config.settings import settings
+from observability.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FeedbackCache:
+    """Feedback results keyed by (provider, feedback name, input, context, output hash).
+
+    The answers being scored are memoized alongside them, keyed by (tenant,
+    strategy, index version, question, top_k, LLM): rerunning the live query
+    engine is not deterministic, so a rerun that re-queried would change the
+    answers and miss the feedback cache.
+    """
+
+    @staticmethod
+    def key(provider: str, feedback: str, input_text: str, context: str, output: str) -> str:
+        output_hash = hashlib.sha256(output.encode("utf-8")).hexdigest()
+        parts = "\x00".join([provider, feedback, input_text, context, output_hash])
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def answer_key(tenant: str, strategy: str, index_version: Optional[int], question: str, top_k: int) -> str:
+        parts = "\x00".join(["answer", tenant, strategy, str(index_version), question, str(top_k), settings.GEMINI_MODEL])
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a memoized feedback result"""
+        record = await db_manager.feedback_cache_collection.find_one({"_id": key}, {"score": 1, "reason": 1})
+        metrics.record_cache("feedback", hit=record is not None)
+        return record
+
+    async def put(self, key: str, feedback: str, score: float, reason: Optional[str] = None):
+        """Store a feedback result; an existing entry for the key is kept"""
+        try:
+            await db_manager.feedback_cache_collection.insert_one(
+                {"_id": key, "feedback": feedback, "score": score, "reason": reason, "created_at": time.time()}
+            )
+        except Exception as e:
+            # Concurrent runners scoring the same answer race on the key
+            logger.debug(f"Feedback cache insert skipped: {e}")
+
+    async def get_answer(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a memoized answer with its contexts and original latency"""
+        record = await db_manager.feedback_cache_collection.find_one({"_id": key}, {"answer": 1, "contexts": 1, "latency_s": 1})
+        metrics.record_cache("evaluated_answer", hit=record is not None)
+        return record
+
+    async def put_answer(self, key: str, answer: str, contexts: List[str], latency_s: float):
+        """Store an answer; an existing entry for the key is kept"""
+        try:
+            await db_manager.feedback_cache_collection.insert_one(
+                {"_id": key, "answer": answer, "contexts": contexts, "latency_s": latency_s, "created_at": time.time()}
+            )
+        except Exception as e:
+            logger.debug(f"Answer cache insert skipped: {e}")
+
+# Global feedback cache
+feedback_cache = FeedbackCache()
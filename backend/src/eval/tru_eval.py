@@ -1,18 +1,8 @@
 from typing import Dict, Any, List, Optional
-from trulens_eval import (
-    Feedback,
-    TruLlama,
-    Tru
-)
-from trulens_eval.feedback import Groundedness
-
-# from trulens_eval.feedback import Feedback, Groundedness
-from trulens_eval.feedback.provider.openai import OpenAI
-from trulens_eval.feedback.provider.litellm import LiteLLM
-from trulens_eval.feedback.provider.google import Gemini
-
-from trulens_eval.app import App
 from rag.indexing import indexing_manager
+from rag.models import model_registry
+from backend.admission import admission
+from backend.tenancy import tenant_key
 from config.settings import settings
 import logging
 
@@ -21,41 +11,40 @@ logger = logging.getLogger(__name__)
 class TruLensEvaluator:
     """TruLens evaluation for different indexing strategies"""
     
-    def __init__(self):
-        self.tru = Tru()
-        self.provider = None
-        # self.openai = OpenAI(api_key=settings.OPENAI_API_KEY)
-        # self.litellm = LiteLLM(model_engine="gemini-pro", api_key=settings.LITELLM_API_KEY)
-        self.initialize_provider("gemini")
-        # self.feedback_functions = self._create_feedback_functions()
+    def __init__(self, provider: str = "gemini"):
+        # Tru session, feedback provider and feedback functions are built on
+        # first evaluation so workers that never evaluate don't pay for them.
+        self.provider_name = provider
+        self._feedback_functions = None
         self.recorders = {}
+
+    @property
+    def tru(self):
+        return model_registry.get_tru()
+
+    @property
+    def provider(self):
+        return model_registry.get_feedback_provider(self.provider_name)
+
+    @property
+    def feedback_functions(self) -> List[Any]:
+        if self._feedback_functions is None:
+            self._feedback_functions = self._create_feedback_functions()
+        return self._feedback_functions
     
     def initialize_provider(self, provider: str = "gemini"):
-        """Initialize feedback provider"""
-        try: 
-            if provider == "litellm":
-                self.provider = LiteLLM(model_engine="gemini-pro", api_key=settings.LITELLM_API_KEY)
-            elif provider == "openai":
-                self.provider = OpenAI(api_key=settings.OPENAI_API_KEY)
-            elif provider == "gemini":
-                    # Direct Gemini integration if TruLens adds it
-                    self.provider = Gemini(
-                        api_key=settings.GEMINI_API_KEY,
-                        model=settings.GEMINI_MODEL
-                    )
-                    logger.info(f"Initialized Gemini provider with model: {settings.GEMINI_MODEL}")
-            else:
-                raise ValueError(f"Unsupported provider: {provider}")
-        # Create feedback functions after provider is initialized
-            self.feedback_functions = self._create_feedback_functions()
-        except Exception as e:
-            logger.error(f"Error initializing provider {provider}: {str(e)}")
-            raise
-        
-        # self.openai_provider = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Switch feedback provider; it is built lazily on next use"""
+        self.provider_name = provider
+        self._feedback_functions = None
+        self.recorders = {}
+        logger.info(f"Using {provider} feedback provider")
 
-    def _create_feedback_functions(self) -> List[Feedback]:
+    def _create_feedback_functions(self) -> List[Any]:
         """Create feedback functions for evaluation"""
+        # TruLens is imported on first use to keep it off the startup path
+        from trulens_eval import Feedback, TruLlama
+        from trulens_eval.feedback import Groundedness
+
         # Groundedness feedback
         grounded = Groundedness(groundedness_provider=self.provider)
         qa_groundedness = (
@@ -81,12 +70,16 @@ class TruLensEvaluator:
         
         return [qa_groundedness, qa_relevance, qs_relevance]
     
-    def create_recorder(self, strategy_name: str) -> TruLlama:
-        """Create TruLens recorder for a specific indexing strategy"""
+    def create_recorder(self, strategy_name: str, filters=None, tenant: str = settings.DEFAULT_TENANT):
+        """Create TruLens recorder for a tenant's indexing strategy"""
         try:
-            query_engine = indexing_manager.get_query_engine()
+            from trulens_eval import TruLlama
+
+            query_engine = indexing_manager.get_query_engine(strategy=strategy_name, filters=filters, tenant=tenant)
+            version = indexing_manager.get_index_version(strategy_name, tenant)
             
-            app_id = f"{strategy_name}_query_engine"
+            key = tenant_key(tenant, strategy_name)
+            app_id = f"{key.replace('/', '_')}_query_engine"
             
             tru_recorder = TruLlama(
                 query_engine,
@@ -94,8 +87,10 @@ class TruLensEvaluator:
                 feedbacks=self.feedback_functions
             )
             
-            self.recorders[strategy_name] = tru_recorder
-            logger.info(f"Created TruLens recorder for {strategy_name} strategy")
+            # Filtered recorders are one-off; only the unfiltered one is reused
+            if filters is None:
+                self.recorders[key] = (version, tru_recorder)
+            logger.info(f"Created TruLens recorder for {key} strategy")
             
             return tru_recorder
             
@@ -104,20 +99,24 @@ class TruLensEvaluator:
             raise
 
     
-    async def evaluate_query(self, query: str, strategy_name: str) -> Dict[str, Any]:
+    async def evaluate_query(self, query: str, strategy_name: str, filters=None, tenant: str = settings.DEFAULT_TENANT) -> Dict[str, Any]:
         """Evaluate a single query with TruLens"""
         try:
-            if strategy_name not in self.recorders:
-                self.create_recorder(strategy_name)
-            
-            recorder = self.recorders[strategy_name]
-            
-            # Execute query with recording
-            with recorder as recording:
-                response = recorder.app.query(query)
-            
-            # Get the record
-            record = recording.get()
+            # Recorders wrap a query engine, so rebuild them when the index version moves
+            await indexing_manager.sync_registry(tenant=tenant)
+            version, recorder = self.recorders.get(tenant_key(tenant, strategy_name), (None, None))
+            if filters is not None:
+                recorder = self.create_recorder(strategy_name, filters, tenant)
+            elif recorder is None or version != indexing_manager.get_index_version(strategy_name, tenant):
+                recorder = self.create_recorder(strategy_name, tenant=tenant)
+            
+            # Execute query with recording, on the evaluation pool's threads
+            def record_query():
+                with recorder as recording:
+                    response = recorder.app.query(query)
+                return response, recording.get()
+
+            response, record = await admission.run_blocking("evaluation", record_query)
             
             # Extract evaluation metrics
             metrics = {
@@ -146,18 +145,19 @@ class TruLensEvaluator:
             raise
 
     
-    async def compare_strategies(self, query: str, strategies: List[str]) -> Dict[str, Any]:
+    async def compare_strategies(self, query: str, strategies: List[str], filters=None, tenant: str = settings.DEFAULT_TENANT) -> Dict[str, Any]:
         """Compare multiple indexing strategies for the same query"""
         try:
             results = {}
             
             for strategy in strategies:
-                # Ensure we have the right index for this strategy
-                if indexing_manager.get_current_strategy() != strategy:
-                    logger.warning(f"Current strategy {indexing_manager.get_current_strategy()} doesn't match {strategy}")
+                # Ensure we have an index for this strategy
+                await indexing_manager.sync_registry(tenant=tenant)
+                if not indexing_manager.has_index(strategy, tenant):
+                    logger.warning(f"No index available for strategy {strategy}")
                     continue
                 
-                result = await self.evaluate_query(query, strategy)
+                result = await self.evaluate_query(query, strategy, filters, tenant)
                 results[strategy] = result
             
             # Calculate comparison metrics
@@ -165,7 +165,7 @@ class TruLensEvaluator:
                 "query": query,
                 "strategies_compared": strategies,
                 "results": results,
-                "summary": self._create_comparison_summary(results)
+                "summary": self.create_comparison_summary(results)
             }
             
             return comparison
@@ -174,36 +174,37 @@ class TruLensEvaluator:
             logger.error(f"Error comparing strategies: {str(e)}")
             raise
     
-    # def _create_comparison_summary(self, results: Dict[str, Any]) -> Dict[str, Any]:
-    #     """Create summary comparing different strategies"""
-    #     summary = {
-    #         "best_groundedness": {"strategy": None, "score": -1},
-    #         "best_answer_relevance": {"strategy": None, "score": -1},
-    #         "best_context_relevance": {"strategy": None, "score": -1}
-    #     }
+    @staticmethod
+    def create_comparison_summary(results: Dict[str, Any]) -> Dict[str, Any]:
+        """Create summary comparing different strategies"""
+        summary = {
+            "best_groundedness": {"strategy": None, "score": -1},
+            "best_answer_relevance": {"strategy": None, "score": -1},
+            "best_context_relevance": {"strategy": None, "score": -1}
+        }
         
-    #     for strategy, result in results.items():
-    #         metrics = result.get("metrics", {})
-            
-    #         # Check Groundedness
-    #         if "Groundedness" in metrics:
-    #             score = metrics["Groundedness"].get("score", 0)
-    #             if score > summary["best_groundedness"]["score"]:
-    #                 summary["best_groundedness"] = {"strategy": strategy, "score": score}
-            
-    #         # Check Answer Relevance
-    #         if "Answer Relevance" in metrics:
-    #             score = metrics["Answer Relevance"].get("score", 0)
-    #             if score > summary["best_answer_relevance"]["score"]:
-    #                 summary["best_answer_relevance"] = {"strategy": strategy, "score": score}
-            
-    #         # Check Context Relevance
-    #         if "Context Relevance" in metrics:
-    #             score = metrics["Context Relevance"].get("score", 0)
-    #             if score > summary["best_context_relevance"]["score"]:
-    #                 summary["best_context_relevance"] = {"strategy": strategy, "score": score}
+        for strategy, result in results.items():
+            metrics = result.get("metrics", {})
+            
+            # Check Groundedness
+            if "Groundedness" in metrics:
+                score = metrics["Groundedness"].get("score", 0)
+                if score > summary["best_groundedness"]["score"]:
+                    summary["best_groundedness"] = {"strategy": strategy, "score": score}
+            
+            # Check Answer Relevance
+            if "Answer Relevance" in metrics:
+                score = metrics["Answer Relevance"].get("score", 0)
+                if score > summary["best_answer_relevance"]["score"]:
+                    summary["best_answer_relevance"] = {"strategy": strategy, "score": score}
+            
+            # Check Context Relevance
+            if "Context Relevance" in metrics:
+                score = metrics["Context Relevance"].get("score", 0)
+                if score > summary["best_context_relevance"]["score"]:
+                    summary["best_context_relevance"] = {"strategy": strategy, "score": score}
         
-    #     return summary
+        return summary
     
     def reset_database(self):
         """Reset TruLens database"""
@@ -1,9 +1,18 @@
+import asyncio
+import time
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from backend.database import db_manager
+from backend.admission import admission, AdmissionMiddleware
+from backend.responses import CompressionMiddleware, FastJSONResponse
+from services.qa_service import qa_service
+from rag.indexing import indexing_manager
+from services.upload_sessions import upload_sessions
 from config.settings import settings
+from observability.metrics import metrics
 from routes import api_router  # Import the combined router
 import logging
 
@@ -16,6 +25,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up the application...")
     await db_manager.connect()
+    await indexing_manager.sync_registry(force=True)
+    upload_sessions.sweep_partial_files()
     
     yield
     
@@ -27,16 +38,32 @@ app = FastAPI(
     title="Document Q&A API",
     description="AI-Powered Document Question & Answer System",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
-# Add CORS middleware
+# Bound concurrent query and upload traffic; overflow gets a fast 429.
+# Evaluation work is admitted in the QA service, where it is known to run.
+app.add_middleware(
+    AdmissionMiddleware,
+    routes={
+        ("POST", "/api/qa/query"): "query",
+        ("POST", "/api/documents/upload"): "upload",
+        ("POST", "/api/documents/reindex"): "upload",
+    }
+)
+
+# Compress larger JSON responses (list pages, query sources, comparisons)
+app.add_middleware(CompressionMiddleware)
+
+# Add CORS middleware (outermost, so 429 responses carry CORS headers too)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Trace-Id", "ETag"],
 )
 
 # Include API router
@@ -48,15 +75,39 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db_manager.ping(), timeout=settings.HEALTH_CHECK_TIMEOUT_S)
+    except Exception as e:
+        logger.warning(f"Health check failed: {e!r}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "database": "unreachable", "error": repr(e)}
+        )
+    return {
+        "status": "healthy",
+        "database": "connected",
+        "database_latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "admission": admission.get_stats(),
+        "query_coalescing": qa_service.coalescer.get_stats(),
+        "tenant_caches": indexing_manager.get_cache_stats()
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 def start():
     """Launched with `poetry run start` at root level"""
+    # Index state lives in MongoDB, so any number of workers can serve queries;
+    # uvicorn only supports auto-reload with a single worker
+    workers = settings.API_WORKERS
     uvicorn.run(
         "main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG and workers == 1,
+        workers=workers
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,212 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Stage latencies range from sub-millisecond cache lookups to multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            state[bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = self._header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state[:len(self.buckets)]):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in Prometheus text exposition format.
+
+    With several workers each process counts only the requests it served, so
+    /metrics must be scraped per worker (or summed) for totals.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+        self.stage_duration = self.register(Histogram(
+            "rag_stage_duration_seconds", "Duration of pipeline stages", ["stage", "strategy"]
+        ))
+        self.stage_errors = self.register(Counter(
+            "rag_stage_errors_total", "Pipeline stage executions that raised", ["stage", "strategy"]
+        ))
+        self.stage_in_flight = self.register(Gauge(
+            "rag_stage_in_flight", "Pipeline stage executions currently running", ["stage", "strategy"]
+        ))
+        self.cache_requests = self.register(Counter(
+            "rag_cache_requests_total", "Cache lookups by result", ["cache", "result"]
+        ))
+        self.coalesced_requests = self.register(Counter(
+            "rag_coalesced_requests_total", "Requests served by an identical request already in flight", ["name"]
+        ))
+        self.model_calls = self.register(Counter(
+            "rag_model_calls_total", "Provider calls by outcome, including hedges and fast failures", ["client", "outcome"]
+        ))
+        self.circuit_state = self.register(Gauge(
+            "rag_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["client"]
+        ))
+        self.admission_in_flight = self.register(Gauge(
+            "rag_admission_in_flight", "Admitted requests currently running", ["pool"]
+        ))
+        self.admission_queue_depth = self.register(Gauge(
+            "rag_admission_queue_depth", "Requests waiting for an admission slot", ["pool"]
+        ))
+        self.admission_wait = self.register(Histogram(
+            "rag_admission_wait_seconds", "Time spent waiting for an admission slot", ["pool"]
+        ))
+        self.admission_rejected = self.register(Counter(
+            "rag_admission_rejected_total", "Requests rejected with 429", ["pool", "reason"]
+        ))
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    @contextmanager
+    def track(self, stage: str, strategy: str = "none") -> Iterator[None]:
+        """Time a pipeline stage, counting it as in flight while it runs"""
+        labels = {"stage": stage, "strategy": strategy or "none"}
+        self.stage_in_flight.inc(**labels)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.stage_errors.inc(**labels)
+            raise
+        finally:
+            self.stage_duration.observe(time.perf_counter() - start, **labels)
+            self.stage_in_flight.dec(**labels)
+
+    def record_cache(self, cache: str, hit: bool):
+        """Count a cache hit or miss"""
+        self.cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry
+metrics = MetricsRegistry()
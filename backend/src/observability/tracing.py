@@ -0,0 +1,254 @@
+import contextvars
+import functools
+import inspect
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as FrameCounter, OrderedDict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+
+class Span:
+    """One timed operation in a trace"""
+
+    __slots__ = ("name", "attributes", "start", "end", "children", "error")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end = None
+        self.children: List["Span"] = []
+        self.error = None
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        span = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "children": [child.to_dict(origin) for child in self.children],
+        }
+        if self.error:
+            span["error"] = self.error
+        return span
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+class _SpanContext:
+    __slots__ = ("span", "token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.span = Span(name, attributes)
+        self.token = None
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        if parent is not None:
+            parent.children.append(self.span)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc is not None:
+            self.span.error = repr(exc)
+        _current_span.reset(self.token)
+        return False
+
+class SamplingProfiler:
+    """Periodically samples the stacks of the threads working on a trace and counts collapsed stacks.
+
+    The request's own thread is watched for the whole trace; pool threads are
+    watched while they run a call bound with ``Tracer.bind``. Each stack starts
+    with the name of the thread it was sampled on.
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.samples = FrameCounter()
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def watch(self) -> bool:
+        """Start sampling the calling thread; False if it is already watched"""
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._threads:
+                return False
+            self._threads[ident] = threading.current_thread().name
+            return True
+
+    def unwatch(self):
+        """Stop sampling the calling thread"""
+        with self._lock:
+            self._threads.pop(threading.get_ident(), None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+            for thread_id, thread_name in threads:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    stack.append(thread_name)
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def to_dict(self, top: int = 50) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval_s * 1000,
+            "total_samples": sum(self.samples.values()),
+            "stacks": [{"stack": stack, "samples": count} for stack, count in self.samples.most_common(top)],
+        }
+
+class Trace:
+    """Span tree for one traced request"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, attributes)
+        self.profiler: Optional[SamplingProfiler] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        trace = {"trace_id": self.trace_id, "root": self.root.to_dict(self.root.start)}
+        if self.profiler is not None:
+            trace["profile"] = self.profiler.to_dict()
+        return trace
+
+class _TraceContext:
+    def __init__(self, tracer: "Tracer", trace: Trace, profile: bool):
+        self.tracer = tracer
+        self.trace = trace
+        self.profile = profile
+        self.token = None
+        self.trace_token = None
+
+    def __enter__(self) -> Trace:
+        if self.profile:
+            self.trace.profiler = SamplingProfiler(settings.TRACE_PROFILE_INTERVAL_MS / 1000)
+            self.trace.profiler.watch()
+            self.trace.profiler.start()
+        self.token = _current_span.set(self.trace.root)
+        self.trace_token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.root.end = time.perf_counter()
+        if exc is not None:
+            self.trace.root.error = repr(exc)
+        _current_span.reset(self.token)
+        _current_trace.reset(self.trace_token)
+        if self.trace.profiler is not None:
+            self.trace.profiler.stop()
+        self.tracer.store(self.trace)
+        return False
+
+class Tracer:
+    """Opt-in request tracing; spans are no-ops unless a trace is active.
+
+    Traces are kept in the worker process that recorded them, so with several
+    workers /qa/traces/{id} only finds a trace on the worker that served it.
+    """
+
+    def __init__(self, sample_rate: float = None, max_traces: int = None):
+        self.sample_rate = settings.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_traces = max_traces or settings.TRACE_STORE_SIZE
+        self._traces: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def should_trace(self, header_value: Optional[str] = None) -> bool:
+        """Trace when the request opts in via header, or when sampled"""
+        if header_value is not None:
+            return header_value.lower() not in ("", "0", "false", "off")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start_trace(self, name: str, profile: bool = False, **attributes: Any) -> _TraceContext:
+        """Start a trace; spans opened inside it are recorded under its root"""
+        return _TraceContext(self, Trace(name, attributes), profile)
+
+    def active(self) -> bool:
+        """Whether the current request is being traced"""
+        return _current_span.get() is not None
+
+    def span(self, name: str, **attributes: Any):
+        """Open a child span of the active span, or do nothing when tracing is off"""
+        if _current_span.get() is None:
+            return _NOOP
+        return _SpanContext(name, attributes)
+
+    def bind(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a call to run on another thread in a copy of the current context.
+
+        Spans opened by the call attach to the active trace, and the thread
+        running it is sampled by the trace's profiler while the call lasts.
+        Bind once per submission: a context cannot be entered by two threads.
+        """
+        context = contextvars.copy_context()
+        trace = _current_trace.get()
+        profiler = trace.profiler if trace is not None else None
+
+        def run(*args, **kwargs):
+            watched = profiler is not None and profiler.watch()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                if watched:
+                    profiler.unwatch()
+        return run
+
+    def traced(self, name: str):
+        """Decorator recording each call of a sync or async function as a span"""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def store(self, trace: Trace):
+        with self._lock:
+            self._traces[trace.trace_id] = trace.to_dict()
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+
+    def get_trace(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Get a stored trace by id"""
+        with self._lock:
+            return self._traces.get(trace_id)
+
+# Global tracer
+tracer = Tracer()
@@ -0,0 +1,63 @@
+import hashlib
+from typing import List, Dict, Optional
+from backend.database import db_manager
+from observability.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """Embeddings keyed by (model, text) hash so unchanged chunks are never re-embedded"""
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up cached embeddings for the given keys"""
+        if not keys:
+            return {}
+        found = {}
+        cursor = db_manager.embedding_cache_collection.find({"_id": {"$in": list(set(keys))}})
+        async for record in cursor:
+            found[record["_id"]] = record["embedding"]
+        return found
+
+    async def put_many(self, embeddings: Dict[str, List[float]]):
+        """Store newly computed embeddings; existing keys are left as they are"""
+        if not embeddings:
+            return
+        try:
+            await db_manager.embedding_cache_collection.insert_many(
+                [{"_id": key, "embedding": embedding} for key, embedding in embeddings.items()],
+                ordered=False
+            )
+        except Exception as e:
+            # Duplicate keys from concurrent ingestion are expected and harmless
+            logger.debug(f"Embedding cache insert finished with errors: {e}")
+
+    async def embed(self, embed_model, model_name: str, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing cached embeddings and only calling the model for misses"""
+        keys = [self.key(model_name, text) for text in texts]
+        cached = await self.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        hits = len(texts) - sum(1 for key in keys if key not in cached)
+        metrics.cache_requests.inc(hits, cache="embedding", result="hit")
+        metrics.cache_requests.inc(len(texts) - hits, cache="embedding", result="miss")
+
+        if missing:
+            new_embeddings = await embed_model.aget_text_embedding_batch(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_embeddings))
+            await self.put_many(computed)
+            cached.update(computed)
+
+        logger.info(f"Embedded {len(missing)} new chunks, reused {hits} cached embeddings")
+        return [cached[key] for key in keys]
+
+# Global embedding cache
+embedding_cache = EmbeddingCache()
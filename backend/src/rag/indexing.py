@@ -1,76 +1,161 @@
-from typing import List, Dict, Any, Optional
-from llama_index.core import VectorStoreIndex, StorageContext, ServiceContext
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from pymongo import ReturnDocument
+from llama_index.core import VectorStoreIndex
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores import MetadataFilter, MetadataFilters, FilterOperator
 from llama_index.core.node_parser import SentenceSplitter, SentenceWindowNodeParser
-from llama_index.core.postprocessor import MetadataReplacementPostProcessor
-# from llama_index.llms.openai import OpenAI
-from llama_index.llms.gemini import Gemini
-from llama_index.embeddings.gemini import GeminiEmbedding
-# from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.core import Document
+from rag.models import model_registry
+from rag.vector_writer import bulk_vector_writer
+from rag.embedding_cache import embedding_cache
+from rag.sentence_store import sentence_store, SentenceWindowPostProcessor
 from backend.database import db_manager
+from backend.tenancy import IdleCache, is_default_tenant, tenant_filter, tenant_key
 from config.settings import settings
+from observability.metrics import metrics
+from observability.tracing import tracer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Registry document holding the most recently indexed strategy
+CURRENT_STRATEGY_KEY = "__current__"
+
+def build_metadata_filters(
+    document_ids: Optional[List[str]] = None,
+    filename: Optional[str] = None,
+    file_type: Optional[str] = None
+) -> Optional[MetadataFilters]:
+    """Build vector search pre-filters restricting retrieval to selected documents"""
+    filters = []
+    if document_ids:
+        filters.append(MetadataFilter(key="document_id", value=list(document_ids), operator=FilterOperator.IN))
+    if filename:
+        filters.append(MetadataFilter(key="filename", value=filename, operator=FilterOperator.EQ))
+    if file_type:
+        filters.append(MetadataFilter(key="file_type", value=file_type.lower().lstrip("."), operator=FilterOperator.EQ))
+    return MetadataFilters(filters=filters) if filters else None
+
+def embedding_sums(nodes: List[BaseNode]) -> Dict[str, np.ndarray]:
+    """Sum of each document's normalized chunk embeddings, keyed by document_id.
+
+    Sums of separate batches add up; ``normalize_centroid`` of the total is the
+    document centroid.
+    """
+    grouped: Dict[str, List[List[float]]] = {}
+    for node in nodes:
+        if node.embedding is not None and node.metadata.get("document_id"):
+            grouped.setdefault(node.metadata["document_id"], []).append(node.embedding)
+
+    sums = {}
+    for document_id, embeddings in grouped.items():
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        sums[document_id] = matrix.sum(axis=0)
+    return sums
+
+def normalize_centroid(total: np.ndarray) -> List[float]:
+    return (total / max(float(np.linalg.norm(total)), 1e-12)).tolist()
+
+def document_centroids(nodes: List[BaseNode]) -> Dict[str, List[float]]:
+    """Mean of each document's normalized chunk embeddings, normalized, keyed by document_id"""
+    return {document_id: normalize_centroid(total) for document_id, total in embedding_sums(nodes).items()}
+
 class IndexingStrategy:
     """Base class for different indexing strategies"""
     
-    def __init__(self):
-        # self.llm = OpenAI(
-        #     model="gpt-3.5-turbo", 
-        #     temperature=0.1,
-        #     api_key=settings.OPENAI_API_KEY
-        # )
-        self.llm = Gemini(
-            api_key=settings.GEMINI_API_KEY,
-            model=settings.GEMINI_MODEL,
-            temperature=0.1
-        )
-        # self.embed_model = OpenAIEmbedding(
-        #     model="text-embedding-ada-002",
-        #     api_key=settings.OPENAI_API_KEY
-        # )
-
-        self.embed_model = GeminiEmbedding(
-            api_key=settings.GEMINI_API_KEY,
-            model_name="models/embedding-001"
-        )
-        self.service_context = ServiceContext.from_defaults(
-            llm=self.llm,
-            embed_model=self.embed_model
+    strategy_name: str = None
+
+    # LLM, embedding model and service context come from the shared model
+    # registry; they are built on first use and shared across strategies.
+    @property
+    def llm(self):
+        return model_registry.get_llm()
+
+    @property
+    def embed_model(self):
+        return model_registry.get_embed_model()
+
+    @property
+    def service_context(self):
+        return model_registry.get_service_context()
+
+    # Index building is split into chunk, embed, store and attach steps so the
+    # ingestion pipeline can run them as overlapping stages. Strategies are
+    # shared by concurrent builds, so build statistics are returned to the
+    # caller rather than kept on the instance.
+    async def chunk(
+        self,
+        documents: List[Document],
+        tenant: str = settings.DEFAULT_TENANT,
+        storage_estimate: Optional[Dict[str, int]] = None
+    ) -> List[BaseNode]:
+        """Split documents into nodes, adding the estimated text storage (if tracked) to ``storage_estimate``"""
+        with metrics.track("chunking", self.strategy_name):
+            return await asyncio.to_thread(self.node_parser.get_nodes_from_documents, documents)
+
+    async def embed(self, nodes: List[BaseNode]) -> List[BaseNode]:
+        """Attach embeddings to nodes, reusing cached ones"""
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+        with metrics.track("embedding", self.strategy_name):
+            embeddings = await embedding_cache.embed(self.embed_model, settings.EMBEDDING_MODEL, texts)
+        for node, embedding in zip(nodes, embeddings):
+            node.embedding = embedding
+        return nodes
+
+    async def store(self, nodes: List[BaseNode], tenant: str = settings.DEFAULT_TENANT) -> Dict[str, Any]:
+        """Bulk-write embedded nodes to the tenant's strategy collection"""
+        with metrics.track("vector_write", self.strategy_name):
+            return await bulk_vector_writer.write(nodes, self.strategy_name, tenant)
+
+    def attach(self, tenant: str = settings.DEFAULT_TENANT) -> VectorStoreIndex:
+        """Open an index over the tenant's strategy collection"""
+        return VectorStoreIndex.from_vector_store(
+            db_manager.get_vector_store(self.strategy_name, tenant),
+            service_context=self.service_context
         )
 
+    async def _build_index(self, nodes: List[BaseNode], tenant: str = settings.DEFAULT_TENANT) -> Tuple[VectorStoreIndex, Dict[str, Any]]:
+        """Embed nodes, bulk-write them to the tenant's strategy collection and return an index over it
+        with the build's write statistics and document centroids"""
+        await self.embed(nodes)
+        build_stats = {"document_centroids": document_centroids(nodes), "write_stats": await self.store(nodes, tenant)}
+        return self.attach(tenant), build_stats
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Settings this strategy builds its index with"""
+        return {"embed_model": settings.EMBEDDING_MODEL}
+
 class VectorStoreIndexing(IndexingStrategy):
     """Standard vector store indexing"""
     
-    def __init__(self):
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None):
         super().__init__()
+        self.strategy_name = "vector_store"
+        self.chunk_size = chunk_size or settings.CHUNK_SIZE
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.CHUNK_OVERLAP
         self.node_parser = SentenceSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap
         )
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Settings this strategy builds its index with"""
+        return {**super().get_settings(), "chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
     
-    async def create_index(self, documents: List[Document]) -> VectorStoreIndex:
-        """Create vector store index from documents"""
+    async def create_index(self, documents: List[Document], tenant: str = settings.DEFAULT_TENANT) -> Tuple[VectorStoreIndex, Dict[str, Any]]:
+        """Create vector store index from documents; returns the index and its build statistics"""
         try:
             # Parse documents into nodes
-            nodes = self.node_parser.get_nodes_from_documents(documents)
-            
-            # Create storage context with MongoDB vector store
-            storage_context = StorageContext.from_defaults(
-                vector_store=db_manager.vector_store
-            )
+            nodes = await self.chunk(documents, tenant)
             
-            # Create index
-            index = VectorStoreIndex(
-                nodes,
-                storage_context=storage_context,
-                service_context=self.service_context
-            )
+            index, build_stats = await self._build_index(nodes, tenant)
             
             logger.info(f"Created VectorStoreIndex with {len(nodes)} nodes")
-            return index
+            return index, build_stats
             
         except Exception as e:
             logger.error(f"Error creating vector store index: {str(e)}")
@@ -79,87 +164,272 @@ class VectorStoreIndexing(IndexingStrategy):
 class SentenceWindowIndexing(IndexingStrategy):
     """Sentence window indexing for better context retrieval"""
     
-    def __init__(self, window_size: int = 3, window_metadata_key: str = "window"):
+    def __init__(self, window_size: int = None, window_metadata_key: str = "window"):
         super().__init__()
-        self.window_size = window_size
+        self.strategy_name = "sentence_window"
+        self.window_size = window_size or settings.SENTENCE_WINDOW_SIZE
         self.window_metadata_key = window_metadata_key
         self.node_parser = SentenceWindowNodeParser.from_defaults(
-            window_size=window_size,
+            window_size=self.window_size,
             window_metadata_key=window_metadata_key,
         )
     
-    async def create_index(self, documents: List[Document]) -> VectorStoreIndex:
-        """Create sentence window index from documents"""
+    async def create_index(self, documents: List[Document], tenant: str = settings.DEFAULT_TENANT) -> Tuple[VectorStoreIndex, Dict[str, Any]]:
+        """Create sentence window index from documents; returns the index and its build statistics"""
         try:
-            # Parse documents into sentence window nodes
-            nodes = self.node_parser.get_nodes_from_documents(documents)
-            
-            # Create storage context with MongoDB vector store
-            storage_context = StorageContext.from_defaults(
-                vector_store=db_manager.vector_store
+            # Parse documents into sentence window nodes with their sentence arrays stored
+            storage_estimate = {}
+            nodes = await self.chunk(documents, tenant, storage_estimate)
+            logger.info(
+                f"Sentence window text storage (estimated): {storage_estimate['estimated_bytes_with_windows']} bytes with window copies, "
+                f"{storage_estimate['estimated_bytes_compact']} bytes compact"
             )
             
-            # Create index
-            index = VectorStoreIndex(
-                nodes,
-                storage_context=storage_context,
-                service_context=self.service_context
-            )
+            index, build_stats = await self._build_index(nodes, tenant)
+            build_stats["storage_estimate"] = storage_estimate
             
             logger.info(f"Created SentenceWindowIndex with {len(nodes)} nodes")
-            return index
+            return index, build_stats
             
         except Exception as e:
             logger.error(f"Error creating sentence window index: {str(e)}")
             raise
     
-    def get_postprocessor(self):
-        """Get metadata replacement post-processor for sentence windows"""
-        return MetadataReplacementPostProcessor(
+    async def chunk(
+        self,
+        documents: List[Document],
+        tenant: str = settings.DEFAULT_TENANT,
+        storage_estimate: Optional[Dict[str, int]] = None
+    ) -> List[BaseNode]:
+        """Split documents into sentence nodes and store one sentence array per document"""
+        nodes = await super().chunk(documents, tenant)
+        # Keep one sentence array per document instead of a window copy per node
+        sentence_arrays = sentence_store.compact_nodes(nodes, self.window_metadata_key)
+        if storage_estimate is not None:
+            # Pipelined ingestion chunks a batch at a time; the counts add up
+            for key, value in sentence_store.estimate_storage(nodes, sentence_arrays, self.window_size).items():
+                storage_estimate[key] = storage_estimate.get(key, 0) + value
+        await sentence_store.save(sentence_arrays, tenant)
+        return nodes
+
+    def get_settings(self) -> Dict[str, Any]:
+        """Settings this strategy builds its index with"""
+        return {**super().get_settings(), "window_size": self.window_size}
+    
+    def get_postprocessor(self, window_size: int = None):
+        """Get post-processor that rebuilds sentence windows from the sentence store"""
+        return SentenceWindowPostProcessor(
+            store=sentence_store,
+            window_size=window_size or self.window_size,
             target_metadata_key=self.window_metadata_key
         )
 
+STRATEGY_CLASSES = {
+    "vector_store": VectorStoreIndexing,
+    "sentence_window": SentenceWindowIndexing
+}
+
 class IndexingManager:
-    """Manager class to handle different indexing strategies"""
+    """Manager class to handle different indexing strategies.
+
+    Which strategies have an index, their versions and the settings they were
+    built with live in the index registry collection, so every worker process
+    sees the same state. Each worker attaches to a strategy's index lazily and
+    re-attaches when the registry reports a newer version.
+
+    Indexes are namespaced by tenant: registry records and local state are
+    keyed by ``tenant_key(tenant, strategy)``, so the default tenant keeps its
+    pre-tenancy keys. Attached indexes are evicted once idle, and a tenant's
+    registry records are only loaded when that tenant is queried.
+    """
     
     def __init__(self):
-        self.strategies = {
-            "vector_store": VectorStoreIndexing(),
-            "sentence_window": SentenceWindowIndexing()
-        }
-        self.current_index = None
-        self.current_strategy = None
-    
-    async def create_index(self, documents: List[Document], strategy: str = "vector_store") -> VectorStoreIndex:
-        """Create index using specified strategy"""
+        self.strategies = {name: strategy_class() for name, strategy_class in STRATEGY_CLASSES.items()}
+        # Strategies rebuilt with overrides for a non-default tenant, by tenant key
+        self.tenant_strategies: Dict[str, IndexingStrategy] = {}
+        self.indexes = IdleCache("index")
+        self.index_versions: Dict[str, int] = {}
+        self.registry: Dict[str, Dict[str, Any]] = {}
+        self.current_strategies: Dict[str, str] = {}
+        self._registry_synced_at: Dict[str, float] = {}
+
+    def get_strategy(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> IndexingStrategy:
+        """Get the strategy instance a tenant's index is built with"""
         if strategy not in self.strategies:
             raise ValueError(f"Unknown strategy: {strategy}. Available: {list(self.strategies.keys())}")
+        return self.tenant_strategies.get(tenant_key(tenant, strategy)) or self.strategies[strategy]
+
+    def _set_strategy(self, strategy: str, tenant: str, indexing_strategy: IndexingStrategy):
+        if is_default_tenant(tenant):
+            self.strategies[strategy] = indexing_strategy
+        else:
+            self.tenant_strategies[tenant_key(tenant, strategy)] = indexing_strategy
+    
+    async def create_index(
+        self,
+        documents: List[Document],
+        strategy: str = "vector_store",
+        overrides: Optional[Dict[str, Any]] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Tuple[VectorStoreIndex, Dict[str, Any]]:
+        """Create index using specified strategy, optionally with new chunking settings.
+
+        Returns the index and this build's statistics (write stats, document
+        centroids and, for sentence window, the storage estimate).
+        """
+        indexing_strategy = self.get_strategy(strategy, tenant)
+        if overrides:
+            indexing_strategy = STRATEGY_CLASSES[strategy](**overrides)
+        index, build_stats = await indexing_strategy.create_index(documents, tenant)
+        return await self.register_index(index, strategy, indexing_strategy, tenant), build_stats
+
+    async def register_index(
+        self,
+        index: VectorStoreIndex,
+        strategy: str,
+        indexing_strategy: IndexingStrategy,
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> VectorStoreIndex:
+        """Publish an index whose nodes have been written and attach it locally"""
+        self._set_strategy(strategy, tenant, indexing_strategy)
+        version = await self._publish(strategy, tenant)
+
+        key = tenant_key(tenant, strategy)
+        self.indexes[key] = index
+        self.index_versions[key] = version
         
-        indexing_strategy = self.strategies[strategy]
-        self.current_index = await indexing_strategy.create_index(documents)
-        self.current_strategy = strategy
-        
-        logger.info(f"Created index using {strategy} strategy")
-        return self.current_index
+        logger.info(f"Created index using {strategy} strategy for tenant {tenant} (version {version})")
+        return index
+
+    async def adopt_index(self, strategy: str, index_settings: Dict[str, Any], tenant: str = settings.DEFAULT_TENANT) -> int:
+        """Publish an index whose vectors were loaded directly (e.g. from a snapshot)"""
+        overrides = {key: value for key, value in index_settings.items() if key != "embed_model"}
+        self._set_strategy(strategy, tenant, STRATEGY_CLASSES[strategy](**overrides))
+        version = await self._publish(strategy, tenant)
+
+        # Attach lazily at the new version
+        self.indexes.pop(tenant_key(tenant, strategy), None)
+        logger.info(f"Adopted loaded index for {strategy} strategy for tenant {tenant} (version {version})")
+        return version
+
+    @property
+    def current_index(self) -> Optional[VectorStoreIndex]:
+        current = self.get_current_strategy()
+        return self.indexes.get(current) if current else None
+
+    async def _publish(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> int:
+        """Bump a strategy's index version in the registry and mark it current for the tenant"""
+        key = tenant_key(tenant, strategy)
+        record = await db_manager.index_registry_collection.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"version": 1},
+                "$set": {
+                    "tenant_id": tenant,
+                    "strategy": strategy,
+                    "settings": self.get_strategy(strategy, tenant).get_settings(),
+                    "updated_at": time.time()
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        await db_manager.index_registry_collection.update_one(
+            {"_id": tenant_key(tenant, CURRENT_STRATEGY_KEY)},
+            {"$set": {"tenant_id": tenant, "strategy": strategy, "updated_at": time.time()}},
+            upsert=True
+        )
+        self.registry[key] = record
+        self.current_strategies[tenant] = strategy
+        self._registry_synced_at[tenant] = time.monotonic()
+        return record["version"]
+
+    async def sync_registry(self, force: bool = False, tenant: str = settings.DEFAULT_TENANT):
+        """Refresh a tenant's registry state, dropping local indexes whose version is stale"""
+        if not force and time.monotonic() - self._registry_synced_at.get(tenant, 0.0) < settings.INDEX_REGISTRY_REFRESH_S:
+            return
+
+        records = {}
+        async for record in db_manager.index_registry_collection.find(tenant_filter(tenant)):
+            records[record["_id"]] = record
+        self._registry_synced_at[tenant] = time.monotonic()
+
+        current = records.pop(tenant_key(tenant, CURRENT_STRATEGY_KEY), None)
+        if current:
+            self.current_strategies[tenant] = current["strategy"]
+
+        for key in [key for key, record in self.registry.items() if (record.get("tenant_id") or settings.DEFAULT_TENANT) == tenant]:
+            if key not in records:
+                self.registry.pop(key)
+        self.registry.update(records)
+
+        for key, record in records.items():
+            if key in self.indexes and self.index_versions.get(key) != record["version"]:
+                logger.info(f"Index for {key} moved to version {record['version']}; re-attaching")
+                self.indexes.pop(key, None)
+
+    def has_index(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> bool:
+        """Check whether an index exists for a tenant's strategy in any worker"""
+        key = tenant_key(tenant, strategy)
+        return key in self.indexes or key in self.registry
+
+    def _attach(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> VectorStoreIndex:
+        """Open an index over a tenant's existing vector store collection"""
+        key = tenant_key(tenant, strategy)
+        if key not in self.registry:
+            raise ValueError(f"No index found for strategy: {strategy} (tenant {tenant})")
+
+        index = VectorStoreIndex.from_vector_store(
+            db_manager.get_vector_store(strategy, tenant),
+            service_context=self.strategies[strategy].service_context
+        )
+        self.indexes[key] = index
+        self.index_versions[key] = self.registry[key]["version"]
+        logger.info(f"Attached to {key} index version {self.index_versions[key]}")
+        return index
     
-    def get_query_engine(self, similarity_top_k: int = 5):
-        """Get query engine for current index"""
-        if not self.current_index:
+    @tracer.traced("indexing.get_query_engine")
+    def get_query_engine(
+        self,
+        similarity_top_k: int = 5,
+        strategy: Optional[str] = None,
+        filters: Optional[MetadataFilters] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ):
+        """Get query engine for a tenant's strategy (defaults to its current one), optionally pre-filtered"""
+        strategy = strategy or self.get_current_strategy(tenant)
+        if strategy is None:
             raise ValueError("No index created yet. Call create_index() first.")
+
+        key = tenant_key(tenant, strategy)
+        index = self.indexes.get(key) or self._attach(strategy, tenant)
         
-        if self.current_strategy == "sentence_window":
+        if strategy == "sentence_window":
             # Add post-processor for sentence window strategy
-            postprocessor = self.strategies["sentence_window"].get_postprocessor()
-            return self.current_index.as_query_engine(
+            # Windows are rebuilt with the size the index was built with, whichever worker built it
+            window_size = self.registry.get(key, {}).get("settings", {}).get("window_size")
+            postprocessor = self.strategies["sentence_window"].get_postprocessor(window_size)
+            return index.as_query_engine(
                 similarity_top_k=similarity_top_k,
-                node_postprocessors=[postprocessor]
+                node_postprocessors=[postprocessor],
+                filters=filters
             )
         else:
-            return self.current_index.as_query_engine(similarity_top_k=similarity_top_k)
+            return index.as_query_engine(similarity_top_k=similarity_top_k, filters=filters)
     
-    def get_current_strategy(self) -> Optional[str]:
-        """Get current indexing strategy"""
-        return self.current_strategy
+    def get_current_strategy(self, tenant: str = settings.DEFAULT_TENANT) -> Optional[str]:
+        """Get a tenant's current indexing strategy"""
+        return self.current_strategies.get(tenant)
+
+    def get_index_version(self, strategy: str, tenant: str = settings.DEFAULT_TENANT) -> Optional[int]:
+        """Get the registry version of a tenant's strategy index"""
+        key = tenant_key(tenant, strategy)
+        record = self.registry.get(key)
+        return record["version"] if record else self.index_versions.get(key)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get attached index and tenant vector store cache statistics"""
+        return {"indexes": self.indexes.get_stats(), "vector_stores": db_manager.tenant_vector_stores.get_stats()}
 
 # Global indexing manager
-indexing_manager = IndexingManager()
\ No newline at end of file
+indexing_manager = IndexingManager()
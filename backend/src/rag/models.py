@@ -0,0 +1,113 @@
+from threading import RLock
+from typing import Any, Callable, Dict
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Lazily built model clients shared by every indexing strategy and the evaluator.
+
+    Clients are created on first use, so importing the app no longer pays for
+    LLM, embedding or TruLens setup, and every strategy reuses the same client
+    (and therefore the same connections). The Gemini SDK does not expose pool
+    sizes or keep-alive timers; ``GEMINI_TRANSPORT`` picks between its gRPC
+    channel and its pooled REST session, both of which keep connections open
+    between calls.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, Any] = {}
+        self._lock = RLock()
+
+    def _get_or_create(self, name: str, factory: Callable[[], Any]) -> Any:
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        # Reentrant: a factory may build the clients it depends on (the service
+        # context builds the LLM and embedding model) while the lock is held
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = factory()
+                logger.info(f"Initialized shared {name} client")
+            return self._clients[name]
+
+    def get_llm(self):
+        """Get shared Gemini LLM, wrapped with deadlines, hedging and a circuit breaker"""
+        def factory():
+            from llama_index.llms.gemini import Gemini
+            from rag.resilience import ResilientLLM
+            return ResilientLLM(Gemini(
+                api_key=settings.GEMINI_API_KEY,
+                model=settings.GEMINI_MODEL,
+                temperature=0.1,
+                transport=settings.GEMINI_TRANSPORT
+            ))
+        return self._get_or_create("llm", factory)
+
+    def get_embed_model(self):
+        """Get shared Gemini embedding model, wrapped like the LLM"""
+        def factory():
+            from llama_index.embeddings.gemini import GeminiEmbedding
+            from rag.resilience import ResilientEmbedding
+            return ResilientEmbedding(GeminiEmbedding(
+                api_key=settings.GEMINI_API_KEY,
+                model_name=settings.EMBEDDING_MODEL,
+                transport=settings.GEMINI_TRANSPORT
+            ))
+        return self._get_or_create("embed_model", factory)
+
+    def get_service_context(self):
+        """Get shared service context built from the shared LLM and embedding model"""
+        def factory():
+            from llama_index.core import ServiceContext
+            return ServiceContext.from_defaults(
+                llm=self.get_llm(),
+                embed_model=self.get_embed_model()
+            )
+        return self._get_or_create("service_context", factory)
+
+    def get_tru(self):
+        """Get shared TruLens session"""
+        def factory():
+            from trulens_eval import Tru
+            return Tru()
+        return self._get_or_create("tru", factory)
+
+    def get_feedback_provider(self, provider: str = "gemini"):
+        """Get shared TruLens feedback provider"""
+        def factory():
+            keys = {"litellm": settings.LITELLM_API_KEY, "openai": settings.OPENAI_API_KEY}
+            if provider in keys and not keys[provider]:
+                raise ValueError(f"{provider.upper()}_API_KEY is not set")
+            if provider == "litellm":
+                from trulens_eval.feedback.provider.litellm import LiteLLM
+                return LiteLLM(model_engine="gemini-pro", api_key=keys[provider])
+            elif provider == "openai":
+                from trulens_eval.feedback.provider.openai import OpenAI
+                return OpenAI(api_key=keys[provider])
+            elif provider == "gemini":
+                from trulens_eval.feedback.provider.google import Gemini
+                return Gemini(
+                    api_key=settings.GEMINI_API_KEY,
+                    model=settings.GEMINI_MODEL
+                )
+            raise ValueError(f"Unsupported provider: {provider}")
+        return self._get_or_create(f"feedback_provider:{provider}", factory)
+
+    def set_client(self, name: str, client: Any):
+        """Install a prebuilt client (e.g. a local fake for benchmarks)"""
+        with self._lock:
+            self._clients[name] = client
+
+    def is_initialized(self, name: str) -> bool:
+        """Check whether a client has been built yet"""
+        return name in self._clients
+
+    def reset(self):
+        """Drop all cached clients (mainly for tests and benchmarks)"""
+        with self._lock:
+            self._clients.clear()
+
+# Global model registry
+model_registry = ModelRegistry()
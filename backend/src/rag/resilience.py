@@ -0,0 +1,355 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.llms import LLM
+from config.settings import settings
+from observability.metrics import metrics
+from observability.tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sync model calls run here so a slow attempt can be raced by a hedge
+_executor = ThreadPoolExecutor(max_workers=settings.MODEL_CALL_THREADS, thread_name_prefix="model-call")
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the provider while its circuit is open"""
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when no attempt answered within the call deadline"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probes.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail immediately. Once ``reset_timeout_s`` has passed, up to
+    ``half_open_max_calls`` probe calls are let through; a successful probe
+    closes the circuit, a failed one opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout_s: float = None, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout_s = settings.CIRCUIT_RESET_TIMEOUT_S if reset_timeout_s is None else reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logger.warning(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+        metrics.circuit_state.set(self._STATE_VALUES[state], client=self.name)
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout_s:
+                    raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+                self._set_state(self.HALF_OPEN)
+                self._probes = 0
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"{self.name} circuit is half-open; probe already in flight")
+                self._probes += 1
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def record_abandoned(self):
+        """A call ended without an outcome (its caller was cancelled); free its probe slot"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+class ResilientCaller:
+    """Runs provider calls with a deadline, an optional hedge and a circuit breaker.
+
+    A hedged call starts a duplicate attempt once the first has been running
+    longer than the recent ``hedge_percentile`` latency, and returns whichever
+    answers first. Until enough calls have been seen, ``hedge_min_delay_s`` is
+    used as the hedge delay.
+    """
+
+    MIN_SAMPLES = 20
+
+    def __init__(
+        self,
+        name: str,
+        deadline_s: float,
+        hedging: bool = None,
+        hedge_percentile: float = None,
+        hedge_min_delay_s: float = None,
+        breaker: CircuitBreaker = None
+    ):
+        self.name = name
+        self.deadline_s = deadline_s
+        self.hedging = settings.MODEL_HEDGING_ENABLED if hedging is None else hedging
+        self.hedge_percentile = hedge_percentile or settings.MODEL_HEDGE_PERCENTILE
+        self.hedge_min_delay_s = settings.MODEL_HEDGE_MIN_DELAY_S if hedge_min_delay_s is None else hedge_min_delay_s
+        self.breaker = breaker or CircuitBreaker(name)
+        self.latency = LatencyTracker()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait before issuing a hedge"""
+        if len(self.latency) < self.MIN_SAMPLES:
+            return self.hedge_min_delay_s
+        return max(self.hedge_min_delay_s, self.latency.percentile(self.hedge_percentile))
+
+    def _check(self):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            metrics.model_calls.inc(client=self.name, outcome="circuit_open")
+            raise
+
+    def _succeeded(self, start: float, attempt: int):
+        self.latency.record(time.perf_counter() - start)
+        self.breaker.record_success()
+        metrics.model_calls.inc(client=self.name, outcome="hedge_won" if attempt else "success")
+
+    def _failed(self, error: BaseException):
+        self.breaker.record_failure()
+        outcome = "deadline" if isinstance(error, DeadlineExceeded) else "error"
+        metrics.model_calls.inc(client=self.name, outcome=outcome)
+        logger.warning(f"{self.name} call failed: {error!r}")
+
+    def call(self, fn: Callable[..., Any], *args: Any, hedge: bool = True, **kwargs: Any) -> Any:
+        """Run a blocking provider call"""
+        self._check()
+        hedged = not (hedge and self.hedging)
+        start = time.perf_counter()
+        deadline_at = start + self.deadline_s
+        hedge_at = start + self.hedge_delay()
+        attempts = {_executor.submit(tracer.bind(fn), *args, **kwargs): 0}
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                now = time.perf_counter()
+                if now >= deadline_at:
+                    raise DeadlineExceeded(f"{self.name} call exceeded {self.deadline_s}s deadline")
+                timeout = deadline_at - now if hedged else max(0.0, min(deadline_at, hedge_at) - now)
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self._succeeded(start, attempts[future])
+                        return future.result()
+                    error = future.exception()
+                if error is not None and not hedged:
+                    # The first attempt failed outright; a hedge is not a retry
+                    break
+                if not done and not hedged:
+                    hedged = True
+                    metrics.model_calls.inc(client=self.name, outcome="hedge_issued")
+                    future = _executor.submit(tracer.bind(fn), *args, **kwargs)
+                    attempts[future] = 1
+                    pending.add(future)
+            raise error
+        except BaseException as e:
+            self._failed(e)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def acall(self, fn: Callable[..., Any], *args: Any, hedge: bool = True, **kwargs: Any) -> Any:
+        """Await a provider coroutine"""
+        self._check()
+        hedged = not (hedge and self.hedging)
+        start = time.perf_counter()
+        deadline_at = start + self.deadline_s
+        hedge_at = start + self.hedge_delay()
+        attempts = {asyncio.ensure_future(fn(*args, **kwargs)): 0}
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                now = time.perf_counter()
+                if now >= deadline_at:
+                    raise DeadlineExceeded(f"{self.name} call exceeded {self.deadline_s}s deadline")
+                timeout = deadline_at - now if hedged else max(0.0, min(deadline_at, hedge_at) - now)
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._succeeded(start, attempts[task])
+                        return task.result()
+                    error = task.exception()
+                if error is not None and not hedged:
+                    break
+                if not done and not hedged:
+                    hedged = True
+                    metrics.model_calls.inc(client=self.name, outcome="hedge_issued")
+                    task = asyncio.ensure_future(fn(*args, **kwargs))
+                    attempts[task] = 1
+                    pending.add(task)
+            raise error
+        except asyncio.CancelledError:
+            # The caller went away; says nothing about the provider
+            self.breaker.record_abandoned()
+            raise
+        except BaseException as e:
+            self._failed(e)
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and current hedge delay"""
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+            "samples": len(self.latency),
+        }
+
+class ResilientLLM(LLM):
+    """LLM wrapper adding deadlines, hedging and a circuit breaker to another LLM.
+
+    Streaming calls are passed straight through: a partially consumed stream
+    cannot be raced, and its outcome is only known to the consumer.
+    """
+
+    _inner: LLM = PrivateAttr()
+    _caller: ResilientCaller = PrivateAttr()
+
+    def __init__(self, inner: LLM, caller: ResilientCaller = None, **kwargs: Any):
+        super().__init__(callback_manager=inner.callback_manager, **kwargs)
+        self._inner = inner
+        self._caller = caller or ResilientCaller("llm", settings.LLM_CALL_DEADLINE_S)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ResilientLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return self._inner.metadata
+
+    @property
+    def caller(self) -> ResilientCaller:
+        return self._caller
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return self._caller.call(self._inner.chat, messages, **kwargs)
+
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return self._caller.call(self._inner.complete, prompt, formatted=formatted, **kwargs)
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseGen:
+        return self._inner.stream_chat(messages, **kwargs)
+
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        return self._inner.stream_complete(prompt, formatted=formatted, **kwargs)
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return await self._caller.acall(self._inner.achat, messages, **kwargs)
+
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return await self._caller.acall(self._inner.acomplete, prompt, formatted=formatted, **kwargs)
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseAsyncGen:
+        return await self._inner.astream_chat(messages, **kwargs)
+
+    async def astream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseAsyncGen:
+        return await self._inner.astream_complete(prompt, formatted=formatted, **kwargs)
+
+class ResilientEmbedding(BaseEmbedding):
+    """Embedding wrapper adding deadlines, hedging and a circuit breaker.
+
+    Only query embeddings are hedged: they sit on the request path, while
+    document batches are large and duplicating them would double ingestion cost.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _caller: ResilientCaller = PrivateAttr()
+
+    def __init__(self, inner: BaseEmbedding, caller: ResilientCaller = None, **kwargs: Any):
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            callback_manager=inner.callback_manager,
+            **kwargs
+        )
+        self._inner = inner
+        self._caller = caller or ResilientCaller("embedding", settings.EMBED_CALL_DEADLINE_S)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ResilientEmbedding"
+
+    @property
+    def caller(self) -> ResilientCaller:
+        return self._caller
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._caller.call(self._inner._get_query_embedding, query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._caller.call(self._inner._get_text_embedding, text, hedge=False)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._caller.call(self._inner._get_text_embeddings, texts, hedge=False)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._caller.acall(self._inner._aget_query_embedding, query)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await self._caller.acall(self._inner._aget_text_embedding, text, hedge=False)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._caller.acall(self._inner._aget_text_embeddings, texts, hedge=False)
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Dict, Any, Optional
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import BaseNode, NodeWithScore, QueryBundle
+from backend.database import db_manager
+from config.settings import settings
+from observability.metrics import metrics
+from observability.tracing import tracer
+import logging
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_DOC_KEY = "sentence_doc_id"
+SENTENCE_INDEX_KEY = "sentence_index"
+
+class SentenceStore:
+    """Compact per-document sentence arrays with an LRU of hot documents.
+
+    The arrays live in MongoDB; the LRU is per worker process, so each worker
+    warms its own copy of the hot documents.
+    """
+
+    def __init__(self, cache_size: int = None):
+        self.cache_size = cache_size or settings.SENTENCE_CACHE_SIZE
+        self._cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compact_nodes(self, nodes: List[BaseNode], window_metadata_key: str = "window") -> Dict[str, List[str]]:
+        """Strip window copies from sentence window nodes and return one sentence array per document.
+
+        Each node keeps only its sentence offset; windows are rebuilt on demand
+        by ``SentenceWindowPostProcessor``.
+        """
+        sentence_arrays: Dict[str, List[str]] = {}
+        for node in nodes:
+            doc_id = node.ref_doc_id or node.node_id
+            sentences = sentence_arrays.setdefault(doc_id, [])
+            node.metadata.pop(window_metadata_key, None)
+            node.metadata.pop("original_text", None)
+            node.metadata[SENTENCE_DOC_KEY] = doc_id
+            node.metadata[SENTENCE_INDEX_KEY] = len(sentences)
+            for key in (window_metadata_key, "original_text"):
+                for excluded in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+                    if key in excluded:
+                        excluded.remove(key)
+            node.excluded_embed_metadata_keys.extend([SENTENCE_DOC_KEY, SENTENCE_INDEX_KEY])
+            node.excluded_llm_metadata_keys.extend([SENTENCE_DOC_KEY, SENTENCE_INDEX_KEY])
+            sentences.append(node.get_content())
+        return sentence_arrays
+
+    @staticmethod
+    def estimate_storage(nodes: List[BaseNode], sentence_arrays: Dict[str, List[str]], window_size: int) -> Dict[str, int]:
+        """Estimate stored text bytes with full window copies versus sentence arrays.
+
+        Counts the UTF-8 length of node text, ``original_text`` and windows
+        against node text, the sentence arrays and the offset keys; BSON
+        overhead, other metadata and embeddings (the same either way) are not
+        counted, so the numbers compare the layouts rather than measure them.
+        """
+        encoded = {doc_id: [s.encode("utf-8") for s in sentences] for doc_id, sentences in sentence_arrays.items()}
+        before = 0
+        for sentences in encoded.values():
+            for i, sentence in enumerate(sentences):
+                window = sentences[max(0, i - window_size): i + window_size + 1]
+                # node text + original_text + window metadata
+                before += 2 * len(sentence) + sum(len(s) + 1 for s in window)
+        after = sum(len(s) for sentences in encoded.values() for s in sentences) * 2
+        after += len(nodes) * (len(SENTENCE_DOC_KEY) + len(SENTENCE_INDEX_KEY) + 8)
+        return {
+            "nodes": len(nodes),
+            "documents": len(sentence_arrays),
+            "estimated_bytes_with_windows": before,
+            "estimated_bytes_compact": after,
+        }
+
+    async def save(self, sentence_arrays: Dict[str, List[str]], tenant: str = settings.DEFAULT_TENANT):
+        """Persist sentence arrays, one document per source document"""
+        collection = db_manager.sentence_store_collection
+        for doc_id, sentences in sentence_arrays.items():
+            await collection.replace_one(
+                {"_id": doc_id},
+                {"_id": doc_id, "sentences": sentences, "tenant_id": tenant},
+                upsert=True
+            )
+            self._put(doc_id, sentences)
+        logger.info(f"Stored sentence arrays for {len(sentence_arrays)} documents in collection: {settings.SENTENCE_STORE_COLLECTION}")
+
+    def get_sentences(self, doc_id: str) -> Optional[List[str]]:
+        """Get sentence array for a document, loading it on a cache miss"""
+        with self._lock:
+            sentences = self._cache.get(doc_id)
+            if sentences is not None:
+                self._cache.move_to_end(doc_id)
+                self.hits += 1
+                metrics.record_cache("sentence_store", hit=True)
+                return sentences
+            self.misses += 1
+        metrics.record_cache("sentence_store", hit=False)
+
+        record = db_manager.get_sync_collection(settings.SENTENCE_STORE_COLLECTION).find_one(
+            {"_id": doc_id}, {"sentences": 1}
+        )
+        if not record:
+            return None
+        self._put(doc_id, record["sentences"])
+        return record["sentences"]
+
+    def _put(self, doc_id: str, sentences: List[str]):
+        with self._lock:
+            self._cache[doc_id] = sentences
+            self._cache.move_to_end(doc_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def evict(self, doc_id: str):
+        """Drop a document from the hot cache"""
+        with self._lock:
+            self._cache.pop(doc_id, None)
+
+    def get_cache_info(self) -> Dict[str, Any]:
+        """Get LRU cache statistics"""
+        with self._lock:
+            return {"size": len(self._cache), "capacity": self.cache_size, "hits": self.hits, "misses": self.misses}
+
+class SentenceWindowPostProcessor(BaseNodePostprocessor):
+    """Rebuild sentence windows from the sentence store at query time"""
+
+    window_size: int = 3
+    target_metadata_key: str = "window"
+    _store: SentenceStore = PrivateAttr()
+
+    def __init__(self, store: SentenceStore, window_size: int = 3, target_metadata_key: str = "window"):
+        super().__init__(window_size=window_size, target_metadata_key=target_metadata_key)
+        self._store = store
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SentenceWindowPostProcessor"
+
+    def _postprocess_nodes(
+        self,
+        nodes: List[NodeWithScore],
+        query_bundle: Optional[QueryBundle] = None,
+    ) -> List[NodeWithScore]:
+        with tracer.span("postprocessor.sentence_window", num_nodes=len(nodes)):
+            return self._rebuild_windows(nodes)
+
+    def _rebuild_windows(self, nodes: List[NodeWithScore]) -> List[NodeWithScore]:
+        for n in nodes:
+            metadata = n.node.metadata
+            # Nodes written before compact storage still carry their window
+            if self.target_metadata_key in metadata:
+                n.node.set_content(metadata[self.target_metadata_key])
+                continue
+
+            doc_id = metadata.get(SENTENCE_DOC_KEY)
+            index = metadata.get(SENTENCE_INDEX_KEY)
+            if doc_id is None or index is None:
+                continue
+
+            sentences = self._store.get_sentences(doc_id)
+            if not sentences:
+                logger.warning(f"No sentence array found for document: {doc_id}")
+                continue
+
+            window = sentences[max(0, index - self.window_size): index + self.window_size + 1]
+            n.node.set_content(" ".join(window))
+        return nodes
+
+# Global sentence store
+sentence_store = SentenceStore()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import List, Dict, Any
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, AutoReconnect, NetworkTimeout
+from llama_index.core.schema import BaseNode, MetadataMode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from backend.database import db_manager
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Server error codes worth retrying: the write may succeed once a primary is reachable again
+TRANSIENT_WRITE_ERRORS = {6, 7, 89, 91, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436}
+
+class BulkVectorWriter:
+    """Write embedded nodes to a strategy collection with concurrent, unordered insert_many batches.
+
+    Documents use the same layout as ``MongoDBAtlasVectorSearch.add`` so the
+    strategy's vector store and search index read them unchanged. Strategy
+    collections carry a unique index on the node id, so resending a batch
+    after a dropped connection cannot store a node twice.
+    """
+
+    def __init__(self, batch_size: int = None, concurrency: int = None, max_retries: int = None):
+        self.batch_size = batch_size or settings.VECTOR_WRITE_BATCH_SIZE
+        self.concurrency = concurrency or settings.VECTOR_WRITE_CONCURRENCY
+        self.max_retries = max(0, max_retries if max_retries is not None else settings.VECTOR_WRITE_MAX_RETRIES)
+
+    @staticmethod
+    def field_names(vector_store) -> Dict[str, str]:
+        """Document field names the vector store reads ids, embeddings, text and metadata from"""
+        return {
+            "id": getattr(vector_store, "_id_key", "id"),
+            "embedding": getattr(vector_store, "_embedding_key", "embedding"),
+            "text": getattr(vector_store, "_text_key", "text"),
+            "metadata": getattr(vector_store, "_metadata_key", "metadata"),
+        }
+
+    def _to_document(self, node: BaseNode, vector_store) -> Dict[str, Any]:
+        metadata = node_to_metadata_dict(
+            node, remove_text=True, flat_metadata=getattr(vector_store, "flat_metadata", False)
+        )
+        # node_to_metadata_dict overwrites document_id with the page's ref_doc_id;
+        # document filters, routing and reindexing need the uploaded document's id
+        if "document_id" in node.metadata:
+            metadata["document_id"] = node.metadata["document_id"]
+        fields = self.field_names(vector_store)
+        return {
+            fields["id"]: node.node_id,
+            fields["embedding"]: node.get_embedding(),
+            fields["text"]: node.get_content(metadata_mode=MetadataMode.NONE) or "",
+            fields["metadata"]: metadata,
+        }
+
+    async def write(self, nodes: List[BaseNode], strategy: str, tenant: str = settings.DEFAULT_TENANT) -> Dict[str, Any]:
+        """Insert embedded nodes into the tenant's strategy collection and return write statistics"""
+        vector_store = db_manager.get_vector_store(strategy, tenant)
+        documents = [self._to_document(node, vector_store) for node in nodes]
+        return await self.write_documents(documents, strategy, tenant)
+
+    async def write_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        strategy: str,
+        tenant: str = settings.DEFAULT_TENANT,
+        upsert: bool = False
+    ) -> Dict[str, Any]:
+        """Insert documents already in vector store layout (e.g. from a snapshot).
+
+        With ``upsert`` each document replaces any stored node with the same id
+        instead of being skipped as a duplicate.
+        """
+        await db_manager.ensure_tenant_collections(tenant)
+        collection = db_manager.get_strategy_collection(strategy, tenant)
+        id_field = self.field_names(db_manager.get_vector_store(strategy, tenant))["id"] if upsert else None
+        batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"written": 0, "batches": len(batches), "retried_batches": 0}
+
+        async def write_batch(batch: List[Dict[str, Any]]):
+            async with semaphore:
+                await self._write_with_retry(collection, batch, stats, id_field)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(write_batch(batch) for batch in batches))
+        elapsed = time.perf_counter() - start
+
+        stats["elapsed_s"] = round(elapsed, 4)
+        stats["writes_per_s"] = round(stats["written"] / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(
+            f"Wrote {stats['written']} vectors to {db_manager.collection_name(strategy, tenant)} in {stats['batches']} batches "
+            f"({stats['writes_per_s']} writes/s, {stats['retried_batches']} retried)"
+        )
+        return stats
+
+    async def _write_with_retry(self, collection, batch: List[Dict[str, Any]], stats: Dict[str, Any], id_field: str = None):
+        """Insert a batch, or upsert it on ``id_field`` when given"""
+        pending = batch
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                if id_field:
+                    await collection.bulk_write(
+                        [ReplaceOne({id_field: doc[id_field]}, doc, upsert=True) for doc in pending], ordered=False
+                    )
+                    stats["written"] += len(pending)
+                else:
+                    result = await collection.insert_many(pending, ordered=False)
+                    stats["written"] += len(result.inserted_ids)
+                return
+            except BulkWriteError as e:
+                # Unordered inserts keep going past failures; retry only the documents that failed transiently.
+                # Duplicate keys mean an earlier attempt already landed.
+                errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+                stats["written"] += len(pending) - len(errors)
+                if not errors:
+                    return
+                if any(err.get("code") not in TRANSIENT_WRITE_ERRORS for err in errors):
+                    logger.error(f"Vector write failed for {len(errors)} of {len(pending)} documents: {errors[0].get('errmsg')}")
+                    raise
+                failed = {err["index"] for err in errors}
+                pending = [doc for i, doc in enumerate(pending) if i in failed]
+                last_error = e
+            except (AutoReconnect, NetworkTimeout) as e:
+                # Part of the batch may have landed; the unique id index turns those into duplicate keys on retry
+                last_error = e
+
+            if attempt < self.max_retries:
+                stats["retried_batches"] += 1
+                await asyncio.sleep(settings.VECTOR_WRITE_RETRY_BACKOFF_S * (2 ** attempt))
+
+        logger.error(f"Giving up on batch of {len(pending)} vectors after {self.max_retries} retries: {last_error}")
+        raise last_error
+
+# Global bulk vector writer
+bulk_vector_writer = BulkVectorWriter()
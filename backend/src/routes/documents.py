@@ -1,18 +1,53 @@
-from fastapi import APIRouter, UploadFile, Form, File, HTTPException, BackgroundTasks
-from typing import List, Dict, Any
+from fastapi import APIRouter, UploadFile, Form, File, HTTPException, BackgroundTasks, Query, Request, Header, Response, Depends
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field
 from services.document_processing import document_processor
+from services.upload_sessions import upload_sessions, ChunkTooLargeError, UploadIncompleteError
+from services.snapshots import snapshot_manager
+from backend.admission import admission
+from backend.responses import make_etag, etag_matches, not_modified, set_etag
+from backend.tenancy import get_tenant, tenant_upload_dir
 import os
+import time
 from config.settings import settings
+from observability.metrics import metrics
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int = Field(..., gt=0)
+    indexing_strategy: str = "vector_store"
+    sha256: Optional[str] = None
+
+class ReindexRequest(BaseModel):
+    strategy: str = "vector_store"
+    document_ids: Optional[List[str]] = None
+    chunk_size: Optional[int] = Field(None, gt=0)
+    chunk_overlap: Optional[int] = Field(None, ge=0)
+    window_size: Optional[int] = Field(None, gt=0)
+
+    def to_overrides(self) -> Dict[str, Any]:
+        """Strategy constructor overrides for the requested settings"""
+        if self.strategy == "vector_store":
+            if self.window_size is not None:
+                raise ValueError("window_size only applies to the sentence_window strategy")
+            overrides = {"chunk_size": self.chunk_size, "chunk_overlap": self.chunk_overlap}
+        else:
+            if self.chunk_size is not None or self.chunk_overlap is not None:
+                raise ValueError("chunk_size and chunk_overlap only apply to the vector_store strategy")
+            overrides = {"window_size": self.window_size}
+        return {key: value for key, value in overrides.items() if value is not None}
+
 @router.post("/upload")
 async def upload_documents(
     files: List[UploadFile] = File(...),
-    indexing_strategy: str = Form("vector_store")
+    indexing_strategy: str = Form("vector_store"),
+    tenant: str = Depends(get_tenant)
 ):
     """Upload multiple documents and process them with the specified indexing strategy"""
     try:
@@ -30,21 +65,24 @@ async def upload_documents(
                 raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.filename}")
         
         # Create upload directory if it doesn't exist
-        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        upload_dir = tenant_upload_dir(tenant)
+        os.makedirs(upload_dir, exist_ok=True)
         
         # Save files to disk
         file_paths = []
-        for file in files:
-            file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-            with open(file_path, "wb") as buffer:
-                buffer.write(await file.read())
-            file_paths.append(file_path)
+        with metrics.track("upload_write", indexing_strategy):
+            for file in files:
+                file_path = os.path.join(upload_dir, file.filename)
+                with open(file_path, "wb") as buffer:
+                    buffer.write(await file.read())
+                file_paths.append(file_path)
         
         # Process documents
         result = await document_processor.process_multiple_documents(
             file_paths=file_paths,
             filenames=[file.filename for file in files],
-            indexing_strategy=indexing_strategy
+            indexing_strategy=indexing_strategy,
+            tenant=tenant
         )
         
         return result
@@ -53,21 +91,184 @@ async def upload_documents(
         logger.error(f"Error during document upload: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/uploads", status_code=201)
+async def create_upload_session(request: UploadSessionRequest, tenant: str = Depends(get_tenant)):
+    """Start a resumable upload; chunks are then PUT with Content-Range"""
+    if request.indexing_strategy not in ["vector_store", "sentence_window"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported indexing strategy: {request.indexing_strategy}")
+    if not request.filename.lower().endswith(('.pdf', '.txt')):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {request.filename}")
+    try:
+        return await upload_sessions.create_session(request.filename, request.size, request.indexing_strategy, request.sha256, tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating upload session: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: Optional[str] = Header(None),
+    x_chunk_sha256: Optional[str] = Header(None),
+    tenant: str = Depends(get_tenant)
+):
+    """Store one chunk (``Content-Range: bytes start-end/total``) verified against ``X-Chunk-SHA256``"""
+    try:
+        data = await upload_sessions.read_chunk(request.stream())
+        status = await upload_sessions.write_chunk(upload_id, content_range, data, x_chunk_sha256, tenant)
+    except ChunkTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error storing chunk for upload {upload_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return status
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_status(upload_id: str, tenant: str = Depends(get_tenant)):
+    """Get received chunks and the contiguous received offset, for resuming"""
+    status = await upload_sessions.get_status(upload_id, tenant)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    return status
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, tenant: str = Depends(get_tenant)):
+    """Assemble a fully received upload and process it"""
+    try:
+        async with admission.slot("upload"):
+            session = await upload_sessions.finalize(upload_id, tenant)
+            if session is None:
+                raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+            try:
+                result = await document_processor.process_multiple_documents(
+                    file_paths=[session["file_path"]],
+                    filenames=[session["filename"]],
+                    indexing_strategy=session["indexing_strategy"],
+                    tenant=tenant
+                )
+            except Exception as e:
+                await upload_sessions.mark(upload_id, "failed", error=str(e))
+                raise
+            await upload_sessions.mark(upload_id, "completed", document_ids=result.get("document_ids"))
+            return result
+    except UploadIncompleteError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing upload {upload_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/list")
-async def list_documents():
-    """Get list of all processed documents"""
+async def list_documents(
+    request: Request,
+    response: Response,
+    limit: int = Query(settings.DOCUMENT_LIST_PAGE_SIZE, ge=1, le=settings.DOCUMENT_LIST_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    strategy: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    tenant: str = Depends(get_tenant)
+):
+    """Get a page of processed documents, optionally filtered by strategy and status.
+
+    The ETag changes whenever the metadata collection does, so ``If-None-Match``
+    revalidation costs a single counter lookup.
+    """
     try:
-        documents = await document_processor.get_all_documents()
-        return {"documents": documents, "total": len(documents)}
+        etag = make_etag("documents", tenant, await document_processor.get_metadata_version(), request.url.query)
+        if etag_matches(request, etag):
+            return not_modified(etag, vary="X-Tenant-Id")
+        result = await document_processor.list_documents(
+            limit=limit,
+            cursor=cursor,
+            strategy=strategy,
+            status=status,
+            fields=fields.split(",") if fields else None,
+            tenant=tenant
+        )
+        set_etag(response, etag, vary="X-Tenant-Id")
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/reindex", status_code=202)
+async def reindex_documents(request: ReindexRequest, background_tasks: BackgroundTasks, tenant: str = Depends(get_tenant)):
+    """Re-chunk and re-embed documents from cached extracted text under new settings"""
+    try:
+        if request.strategy not in ["vector_store", "sentence_window"]:
+            raise HTTPException(status_code=400, detail=f"Unsupported indexing strategy: {request.strategy}")
+        overrides = request.to_overrides()
+
+        job_id = await document_processor.start_reindex(request.strategy, request.document_ids, overrides, tenant)
+        background_tasks.add_task(
+            document_processor.reindex_documents,
+            job_id, request.strategy, request.document_ids, overrides, tenant
+        )
+        return {"job_id": job_id, "status": "pending"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting reindex: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/reindex/{job_id}")
+async def get_reindex_job(job_id: str, tenant: str = Depends(get_tenant)):
+    """Get reindex job status"""
+    job = await document_processor.get_reindex_job(job_id, tenant)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Reindex job {job_id} not found")
+    return job
+
+@router.get("/snapshots/{strategy}")
+async def export_snapshot(strategy: str, tenant: str = Depends(get_tenant)):
+    """Stream a columnar snapshot of a strategy's nodes, embeddings and document metadata"""
+    if strategy not in ["vector_store", "sentence_window"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported indexing strategy: {strategy}")
+    try:
+        stream = await snapshot_manager.open_export(strategy, tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return StreamingResponse(
+        stream,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{tenant}-{strategy}-{int(time.time())}.ragsnap"'}
+    )
+
+@router.post("/snapshots/{strategy}")
+async def import_snapshot(strategy: str, request: Request, replace: bool = False, tenant: str = Depends(get_tenant)):
+    """Bulk-load a snapshot into a strategy collection; ``replace`` clears it first"""
+    if strategy not in ["vector_store", "sentence_window"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported indexing strategy: {strategy}")
+    try:
+        async with admission.slot("upload"):
+            return await snapshot_manager.import_snapshot(strategy, request.stream(), replace=replace, tenant=tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing {strategy} snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.delete("/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, tenant: str = Depends(get_tenant)):
     """Delete document by ID"""
     try:
-        success = await document_processor.delete_document(document_id)
+        success = await document_processor.delete_document(document_id, tenant)
         if success:
             return {"status": "success", "message": f"Document {document_id} deleted"}
         else:
@@ -77,10 +278,14 @@ async def delete_document(document_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/strategies")
-async def get_indexing_strategies():
+async def get_indexing_strategies(request: Request, response: Response):
     """Get available indexing strategies"""
     try:
         strategies = ["vector_store", "sentence_window"]
+        etag = make_etag("indexing_strategies", *strategies)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         return {"strategies": strategies}
     except Exception as e:
         logger.error(f"Error getting strategies: {str(e)}")
@@ -1,59 +1,127 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Header, Request, Response, Depends
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from services.qa_service import qa_service
+from rag.indexing import build_metadata_filters, indexing_manager
+from observability.tracing import tracer
+from backend.responses import make_etag, etag_matches, not_modified, set_etag
+from backend.tenancy import get_tenant
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-class QueryRequest(BaseModel):
+class DocumentFilter(BaseModel):
+    """Restrict retrieval to selected documents; applied as vector search pre-filters"""
+    document_ids: Optional[List[str]] = None
+    filename: Optional[str] = None
+    file_type: Optional[str] = None
+
+    def to_metadata_filters(self):
+        return build_metadata_filters(self.document_ids, self.filename, self.file_type)
+
+class QueryRequest(DocumentFilter):
     question: str
     strategy: str = "vector_store"
     similarity_top_k: int = 5
     enable_evaluation: bool = False
+    # Documents to search after centroid routing; None uses ROUTING_TOP_DOCUMENTS, 0 searches every chunk
+    route_top_documents: Optional[int] = Field(None, ge=0)
 
-class CompareStrategiesRequest(BaseModel):
+class CompareStrategiesRequest(DocumentFilter):
     question: str
     strategies: List[str] = ["vector_store", "sentence_window"]
     similarity_top_k: int = 5
 
 @router.post("/query")
-async def query_documents(query_request: QueryRequest):
-    """Query documents with specified strategy"""
+async def query_documents(
+    query_request: QueryRequest,
+    response: Response,
+    x_trace: Optional[str] = Header(None),
+    x_trace_profile: Optional[str] = Header(None),
+    tenant: str = Depends(get_tenant)
+):
+    """Query documents with specified strategy.
+
+    Send ``X-Trace: 1`` to record a span tree for this request (and
+    ``X-Trace-Profile: 1`` to attach a sampling CPU profile); the trace id is
+    returned in the body and the ``X-Trace-Id`` header.
+    """
     try:
-        result = await qa_service.query(
-            question=query_request.question,
+        if not tracer.should_trace(x_trace):
+            return await qa_service.query(
+                question=query_request.question,
+                strategy=query_request.strategy,
+                similarity_top_k=query_request.similarity_top_k,
+                enable_evaluation=query_request.enable_evaluation,
+                filters=query_request.to_metadata_filters(),
+                tenant=tenant,
+                route_top_documents=query_request.route_top_documents
+            )
+
+        with tracer.start_trace(
+            "POST /qa/query",
+            profile=tracer.should_trace(x_trace_profile or "0"),
             strategy=query_request.strategy,
-            similarity_top_k=query_request.similarity_top_k,
-            enable_evaluation=query_request.enable_evaluation
-        )
+            tenant=tenant
+        ) as trace:
+            result = await qa_service.query(
+                question=query_request.question,
+                strategy=query_request.strategy,
+                similarity_top_k=query_request.similarity_top_k,
+                enable_evaluation=query_request.enable_evaluation,
+                filters=query_request.to_metadata_filters(),
+                tenant=tenant,
+                route_top_documents=query_request.route_top_documents
+            )
+        result["trace_id"] = trace.trace_id
+        response.headers["X-Trace-Id"] = trace.trace_id
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/compare")
-async def compare_strategies(compare_request: CompareStrategiesRequest):
+async def compare_strategies(compare_request: CompareStrategiesRequest, tenant: str = Depends(get_tenant)):
     """Compare query results across different strategies"""
     try:
         result = await qa_service.compare_strategies_query(
             question=compare_request.question,
             strategies=compare_request.strategies,
-            similarity_top_k=compare_request.similarity_top_k
+            similarity_top_k=compare_request.similarity_top_k,
+            filters=compare_request.to_metadata_filters(),
+            tenant=tenant
         )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error comparing strategies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get a recorded request trace (kept by the worker that served the request)"""
+    trace = tracer.get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return trace
+
 @router.get("/strategies")
-async def get_available_strategies():
+async def get_available_strategies(request: Request, response: Response, tenant: str = Depends(get_tenant)):
     """Get list of available indexing strategies"""
     try:
+        await indexing_manager.sync_registry(tenant=tenant)
         strategies = qa_service.get_available_strategies()
-        return {"strategies": strategies, "current": qa_service.get_current_strategy()}
+        current = qa_service.get_current_strategy(tenant)
+        etag = make_etag("qa_strategies", tenant, current, *strategies)
+        if etag_matches(request, etag):
+            return not_modified(etag, vary="X-Tenant-Id")
+        set_etag(response, etag, vary="X-Tenant-Id")
+        return {"strategies": strategies, "current": current}
     except Exception as e:
         logger.error(f"Error getting strategies: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,116 +1,326 @@
 import uuid
 import os
-from typing import List, Dict, Any
-from llama_index.core import Document, SimpleDirectoryReader
-from llama_index.node_parser import SentenceSplitter, SentenceWindowNodeParser
+import re
+import time
+from typing import List, Dict, Any, Optional
+from bson import ObjectId
+from llama_index.core import Document
 
 from rag.indexing import indexing_manager
+from services.ingest_pipeline import ingestion_pipeline
+from services.text_cache import text_cache
 # from llama_index.readers.file import PyMuPDFReader
 from backend.database import db_manager
-from config import settings
+from backend.tenancy import is_default_tenant, tenant_filter
+from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-class DocumentProcessor:
-    def __init__(self):
-        self.processed_documents = []
+# Fields that may be requested from /documents/list
+LIST_FIELDS = ["document_id", "filename", "file_path", "num_pages", "status", "indexing_strategy"]
 
-    async def process_multiple_documents(self, file_paths: List[str], filenames: List[str], indexing_strategy: str = "vector_store") -> Dict[str, Any]:
-        """Process uploaded PDFs and store in vector database"""
-        try:
-            all_documents = []
-            document_metadata = []
-
-            # Process each file
-            for file_path, filename in zip(file_paths, filenames):
-                documents = SimpleDirectoryReader(input_files=[file_path]).load_data()
-                
-
-                doc_id = str(uuid.uuid4())
-                for doc in documents:
-                    doc.metadata.update({
-                        "filename": filename,
-                        "document_id": doc_id,
-                        "file_type": os.path.splitext(filename)[1][1:].lower(),
-                        "file_path": file_path
-                    })
+# Counter document holding the metadata collection version (used for ETags)
+METADATA_VERSION_ID = "documents:version"
 
-                all_documents.extend(documents)
+# Previous chunk rows removed per delete once a reindex has written their replacements
+REINDEX_DELETE_BATCH = 1000
 
-                # Store metadata
-                document_metadata.append({
-                    "document_id": doc_id,
-                    "filename": filename,
-                    "file_path": file_path,
-                    "num_pages": len(documents),
-                    "status": "processed",
-                    "indexing_strategy": indexing_strategy
-                })
+class DocumentProcessor:
+    def __init__(self):
+        self.processed_documents = []
 
-            document = Document(text='\n\n'.join([doc.text for doc in all_documents]) if all_documents else None)
+    async def process_multiple_documents(
+        self,
+        file_paths: List[str],
+        filenames: List[str],
+        indexing_strategy: str = "vector_store",
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Dict[str, Any]:
+        """Process uploaded PDFs and store them in the tenant's vector collections.
 
+        Files flow through the ingestion pipeline, so parsing, chunking,
+        embedding and vector writes for different files overlap.
+        """
+        try:
+            strategy_impl = indexing_manager.get_strategy(indexing_strategy, tenant)
+            ingested = await ingestion_pipeline.run(file_paths, filenames, strategy_impl, self._prepare_documents, tenant)
 
-            # Create index using specified strategy
-            index = await indexing_manager.create_index(document, indexing_strategy)
+            # Nodes keep their document_id, filename and file_type metadata for filtered retrieval
+            await indexing_manager.register_index(strategy_impl.attach(tenant), indexing_strategy, strategy_impl, tenant)
 
             # Store document metadata in MongoDB
+            document_metadata = [
+                {
+                    "document_id": record["document_id"],
+                    "filename": record["filename"],
+                    "file_path": record["file_path"],
+                    "num_pages": record["num_pages"],
+                    "content_hash": record["content_hash"],
+                    "status": "processed",
+                    "indexing_strategy": indexing_strategy,
+                    "tenant_id": tenant,
+                    # Document-level embedding for two-level retrieval
+                    "centroid": record["centroid"]
+                }
+                for record in ingested["documents"]
+            ]
             if document_metadata:
-                await db_manager.collection.insert_many(document_metadata)
-            
-
-            total_chunks = self._calculate_total_chunks(document, indexing_strategy)
-
-            
+                await db_manager.metadata_collection.insert_many(document_metadata)
+                await self._update_counters(document_metadata, 1, tenant)
             
             logger.info(f"Successfully processed {len(filenames)} documents with {indexing_strategy} strategy")
             
-            return {
+            result = {
                 "status": "success",
                 "processed_documents": len(filenames),
-                "total_chunks": total_chunks,
+                "total_chunks": ingested["total_chunks"],
                 "indexing_strategy": indexing_strategy,
-                "document_ids": [meta["document_id"] for meta in document_metadata]
+                "document_ids": [meta["document_id"] for meta in document_metadata],
+                "pipeline_stats": ingested["pipeline_stats"]
             }
+
+            # Report vector write throughput, plus the estimated storage savings for strategies that track them (sentence window)
+            result["write_stats"] = ingested["write_stats"]
+            if ingested["storage_estimate"]:
+                result["storage_estimate"] = ingested["storage_estimate"]
+
+            return result
             
         except Exception as e:
             logger.error(f"Error processing documents: {str(e)}")
             raise
 
-    def _calculate_total_chunks(self, document: Document, strategy: str) -> int:
-        """Calculate total number of chunks based on strategy"""
-        if strategy == "vector_store":            
-            splitter = SentenceSplitter(
-                chunk_size=settings.CHUNK_SIZE,
-                chunk_overlap=settings.CHUNK_OVERLAP
-            )
-            nodes = splitter.get_nodes_from_documents(document)
-            return len(nodes)
-        
-        elif strategy == "sentence_window":
-            # Use sentence window parser to estimate chunks
-            parser = SentenceWindowNodeParser.from_defaults(window_size=3)
-            nodes = parser.get_nodes_from_documents(document)
-            return len(nodes)
-        return 0
-    
-    async def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get list of all processed documents"""
+    @staticmethod
+    def _prepare_documents(documents: List[Document], doc_id: str, filename: str, file_path: str):
+        """Attach document metadata and give pages stable ids ({document_id}:{page})"""
+        for page, doc in enumerate(documents):
+            doc.id_ = f"{doc_id}:{page}"
+            doc.metadata.update({
+                "filename": filename,
+                "document_id": doc_id,
+                "file_type": os.path.splitext(filename)[1][1:].lower(),
+                "file_path": file_path
+            })
+            # Filter fields are for retrieval, not for the embedding or the prompt
+            doc.excluded_embed_metadata_keys.extend(["document_id", "file_type", "file_path"])
+            doc.excluded_llm_metadata_keys.extend(["document_id", "file_path"])
+
+    async def start_reindex(
+        self,
+        strategy: str,
+        document_ids: Optional[List[str]] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> str:
+        """Record a reindex job and return its id"""
+        job_id = str(uuid.uuid4())
+        await db_manager.reindex_jobs_collection.insert_one({
+            "_id": job_id,
+            "status": "pending",
+            "tenant_id": tenant,
+            "strategy": strategy,
+            "document_ids": document_ids,
+            "overrides": overrides or {},
+            "created_at": time.time()
+        })
+        return job_id
+
+    async def get_reindex_job(self, job_id: str, tenant: str = settings.DEFAULT_TENANT) -> Optional[Dict[str, Any]]:
+        """Get a tenant's reindex job status"""
+        job = await db_manager.reindex_jobs_collection.find_one({"_id": job_id, **tenant_filter(tenant)})
+        if job:
+            job["job_id"] = job.pop("_id")
+        return job
+
+    async def reindex_documents(
+        self,
+        job_id: str,
+        strategy: str,
+        document_ids: Optional[List[str]] = None,
+        overrides: Optional[Dict[str, Any]] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ):
+        """Re-chunk and re-embed documents from the extracted text cache.
+
+        Runs as a background task; progress is recorded on the job. Chunks whose
+        text is unchanged under the new settings reuse their cached embeddings.
+        The previous chunks are only deleted once the new ones are written.
+        """
+        jobs = db_manager.reindex_jobs_collection
+        await jobs.update_one({"_id": job_id}, {"$set": {"status": "running", "started_at": time.time()}})
         try:
-            cursor = db_manager.collection.find({}, {"_id": 0})
-            documents = await cursor.to_list(length=None)
-            return documents
+            query = {**tenant_filter(tenant), "indexing_strategy": strategy}
+            if document_ids:
+                query["document_id"] = {"$in": document_ids}
+            records = await db_manager.metadata_collection.find(
+                query, {"document_id": 1, "filename": 1, "file_path": 1, "content_hash": 1}
+            ).to_list(length=None)
+
+            all_documents, reindexed, skipped, write_stats = [], [], [], {}
+            for record in records:
+                pages = await text_cache.load_pages(record["content_hash"]) if record.get("content_hash") else None
+                if pages is None:
+                    skipped.append(record["document_id"])
+                    continue
+                documents = text_cache.to_documents(pages)
+                self._prepare_documents(documents, record["document_id"], record["filename"], record.get("file_path", ""))
+                all_documents.extend(documents)
+                reindexed.append(record["document_id"])
+
+            if reindexed:
+                # Write the new chunks before deleting the previous ones, so a failed
+                # embed or write leaves the documents searchable with their old chunks
+                collection = db_manager.get_strategy_collection(strategy, tenant)
+                previous = await collection.find({"metadata.document_id": {"$in": reindexed}}, {"_id": 1}).to_list(length=None)
+                previous_ids = [row["_id"] for row in previous]
+                try:
+                    _, build_stats = await indexing_manager.create_index(all_documents, strategy, overrides, tenant)
+                except Exception:
+                    await collection.delete_many({"metadata.document_id": {"$in": reindexed}, "_id": {"$nin": previous_ids}})
+                    raise
+                for i in range(0, len(previous_ids), REINDEX_DELETE_BATCH):
+                    await collection.delete_many({"_id": {"$in": previous_ids[i:i + REINDEX_DELETE_BATCH]}})
+                for document_id, centroid in build_stats["document_centroids"].items():
+                    await db_manager.metadata_collection.update_one({"document_id": document_id}, {"$set": {"centroid": centroid}})
+                write_stats = build_stats["write_stats"]
+
+            await jobs.update_one({"_id": job_id}, {"$set": {
+                "status": "completed",
+                "finished_at": time.time(),
+                "reindexed_documents": reindexed,
+                "skipped_documents": skipped,
+                "write_stats": write_stats
+            }})
+            logger.info(f"Reindex job {job_id}: {len(reindexed)} documents reindexed, {len(skipped)} skipped (no cached text)")
         except Exception as e:
-            logger.error(f"Error fetching documents: {str(e)}")
-            return []
+            logger.error(f"Reindex job {job_id} failed: {str(e)}")
+            await jobs.update_one({"_id": job_id}, {"$set": {"status": "failed", "finished_at": time.time(), "error": str(e)}})
+
+    async def list_documents(
+        self,
+        limit: int = None,
+        cursor: Optional[str] = None,
+        strategy: Optional[str] = None,
+        status: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Dict[str, Any]:
+        """Get one page of processed documents, newest first.
+
+        Pages are keyed on ``_id`` so each page is an index range scan; pass the
+        returned ``next_cursor`` back to fetch the following page.
+        """
+        limit = min(limit or settings.DOCUMENT_LIST_PAGE_SIZE, settings.DOCUMENT_LIST_MAX_PAGE_SIZE)
+        query = self._build_list_filter(strategy, status, tenant)
+        if cursor:
+            if not ObjectId.is_valid(cursor):
+                raise ValueError(f"Invalid cursor: {cursor}")
+            query["_id"] = {"$lt": ObjectId(cursor)}
+
+        projection = {field: 1 for field in (fields or LIST_FIELDS) if field in LIST_FIELDS}
+        projection["document_id"] = 1
+
+        documents = await db_manager.metadata_collection.find(query, projection) \
+            .sort("_id", -1) \
+            .limit(limit + 1) \
+            .to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = str(documents[-1]["_id"])
+        for document in documents:
+            document.pop("_id", None)
+
+        return {
+            "documents": documents,
+            "total": await self.count_documents(strategy, status, tenant),
+            "next_cursor": next_cursor
+        }
+
+    async def count_documents(self, strategy: Optional[str] = None, status: Optional[str] = None, tenant: str = settings.DEFAULT_TENANT) -> int:
+        """Get document count from the maintained counters, seeding a counter with an exact count when missing"""
+        counter_id = self._counter_id(strategy, status, tenant)
+        counter = await db_manager.counters_collection.find_one({"_id": counter_id})
+        if counter:
+            return counter["count"]
+
+        count = await db_manager.metadata_collection.count_documents(self._build_list_filter(strategy, status, tenant))
+        await db_manager.counters_collection.update_one(
+            {"_id": counter_id},
+            {"$setOnInsert": {"count": count}},
+            upsert=True
+        )
+        return count
+
+    async def _update_counters(self, documents: List[Dict[str, Any]], delta: int, tenant: str = settings.DEFAULT_TENANT):
+        """Increment a tenant's existing counters for each (strategy, status) combination of the given documents"""
+        increments: Dict[str, int] = {}
+        for doc in documents:
+            strategy, status = doc.get("indexing_strategy"), doc.get("status")
+            for key in {
+                self._counter_id(None, None, tenant),
+                self._counter_id(strategy, None, tenant),
+                self._counter_id(None, status, tenant),
+                self._counter_id(strategy, status, tenant)
+            }:
+                increments[key] = increments.get(key, 0) + delta
+
+        # Missing counters are left alone; count_documents seeds them from an exact count
+        for counter_id, inc in increments.items():
+            await db_manager.counters_collection.update_one({"_id": counter_id}, {"$inc": {"count": inc}})
+
+        # Every metadata insert and delete goes through here, so this also versions the collection
+        await db_manager.counters_collection.update_one(
+            {"_id": METADATA_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True
+        )
+
+    async def reset_counters(self, tenant: str = settings.DEFAULT_TENANT):
+        """Drop a tenant's document counters after a bulk load; count_documents reseeds them exactly"""
+        prefix = self._counter_id(None, None, tenant)[:-len("*:*")]
+        await db_manager.counters_collection.delete_many(
+            {"_id": {"$regex": f"^{re.escape(prefix)}", "$ne": METADATA_VERSION_ID}}
+        )
+        await db_manager.counters_collection.update_one(
+            {"_id": METADATA_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True
+        )
+
+    async def get_metadata_version(self) -> int:
+        """Get the metadata collection version, bumped on every insert and delete"""
+        record = await db_manager.counters_collection.find_one({"_id": METADATA_VERSION_ID})
+        return record["version"] if record else 0
+
+    @staticmethod
+    def _counter_id(strategy: Optional[str], status: Optional[str], tenant: str = settings.DEFAULT_TENANT) -> str:
+        # The default tenant keeps the counter ids it had before tenancy
+        scope = "documents" if is_default_tenant(tenant) else f"documents@{tenant}"
+        return f"{scope}:{strategy or '*'}:{status or '*'}"
+
+    @staticmethod
+    def _build_list_filter(strategy: Optional[str], status: Optional[str], tenant: str = settings.DEFAULT_TENANT) -> Dict[str, Any]:
+        filters = tenant_filter(tenant)
+        if strategy:
+            filters["indexing_strategy"] = strategy
+        if status:
+            filters["status"] = status
+        return filters
     
-    async def delete_document(self, document_id: str) -> bool:
+    async def delete_document(self, document_id: str, tenant: str = settings.DEFAULT_TENANT) -> bool:
         """Delete document from vector store and metadata"""
         try:
             # Delete from metadata collection
-            result = await db_manager.collection.delete_one({"document_id": document_id})
+            deleted = await db_manager.metadata_collection.find_one_and_delete(
+                {"document_id": document_id, **tenant_filter(tenant)},
+                projection={"indexing_strategy": 1, "status": 1}
+            )
             
-            if result.deleted_count > 0:
+            if deleted:
+                await self._update_counters([deleted], -1, tenant)
                 logger.info(f"Successfully deleted document: {document_id}")
                 return True
             return False
@@ -0,0 +1,81 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from backend.database import db_manager
+from backend.tenancy import IdleCache, tenant_filter, tenant_key
+from rag.indexing import indexing_manager
+from services.document_processing import document_processor
+from config.settings import settings
+from observability.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DocumentRouter:
+    """First level of two-level retrieval: pick the documents a question is most likely about.
+
+    Every document's metadata record carries a centroid of its chunk
+    embeddings. The centroids of a tenant's strategy are held as one
+    normalized matrix, so routing a question is a single matrix-vector
+    product; chunk retrieval is then restricted to the top documents. The
+    matrix is reloaded when the metadata or the index version changes.
+    Documents ingested before centroids existed are always searched.
+    """
+
+    def __init__(self, refresh_s: float = None):
+        self.refresh_s = settings.ROUTING_REFRESH_S if refresh_s is None else refresh_s
+        self._matrices = IdleCache("routing")
+
+    async def _version(self, strategy: str, tenant: str) -> Tuple[int, Optional[int]]:
+        return await document_processor.get_metadata_version(), indexing_manager.get_index_version(strategy, tenant)
+
+    async def _load(self, strategy: str, tenant: str) -> Dict[str, Any]:
+        key = tenant_key(tenant, strategy)
+        entry = self._matrices.get(key)
+        if entry and time.monotonic() - entry["checked_at"] < self.refresh_s:
+            return entry
+
+        version = await self._version(strategy, tenant)
+        if entry and entry["version"] == version:
+            entry["checked_at"] = time.monotonic()
+            return entry
+
+        records = await db_manager.metadata_collection.find(
+            {**tenant_filter(tenant), "indexing_strategy": strategy},
+            {"document_id": 1, "centroid": 1}
+        ).to_list(length=None)
+        routed = [record for record in records if record.get("centroid")]
+        matrix = np.asarray([record["centroid"] for record in routed], dtype=np.float32).reshape(len(routed), -1)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        entry = {
+            "document_ids": [record["document_id"] for record in routed],
+            "unrouted": [record["document_id"] for record in records if not record.get("centroid")],
+            "matrix": matrix,
+            "version": version,
+            "checked_at": time.monotonic()
+        }
+        self._matrices[key] = entry
+        logger.info(f"Loaded {len(routed)} document centroids for {key} ({len(entry['unrouted'])} without a centroid)")
+        return entry
+
+    async def route(self, query_embedding: List[float], strategy: str, top_documents: int, tenant: str = settings.DEFAULT_TENANT) -> Optional[List[str]]:
+        """Ids of the documents to search, or None when routing would not prune anything"""
+        with metrics.track("routing", strategy):
+            entry = await self._load(strategy, tenant)
+            document_ids = entry["document_ids"]
+            if top_documents <= 0 or len(document_ids) <= top_documents:
+                return None
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            scores = entry["matrix"] @ (query / max(float(np.linalg.norm(query)), 1e-12))
+            top = np.argpartition(-scores, top_documents - 1)[:top_documents]
+            top = top[np.argsort(-scores[top])]
+            return [document_ids[i] for i in top] + entry["unrouted"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing matrix cache statistics"""
+        return self._matrices.get_stats()
+
+# Global document router
+document_router = DocumentRouter()
@@ -0,0 +1,258 @@
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from llama_index.core import SimpleDirectoryReader
+from backend.database import db_manager
+from backend.tenancy import tenant_filter
+from rag.indexing import IndexingStrategy, embedding_sums, normalize_centroid
+from services.text_cache import text_cache
+from config.settings import settings
+from observability.metrics import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+STAGES = ["parse", "chunk", "embed", "store"]
+
+class _Stage:
+    """Worker pool for one pipeline stage, with its busy and blocked time.
+
+    ``fn`` is an async generator: each input can produce any number of
+    outputs, and each is handed on as soon as it is ready.
+    """
+
+    def __init__(self, name: str, workers: int, fn: Callable[[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]):
+        self.name = name
+        self.workers = max(1, workers)
+        self.fn = fn
+        self.items = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+
+    async def run(self, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+        async def worker():
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    # Leave the marker for the other workers of this stage
+                    await inbox.put(_DONE)
+                    return
+                results = self.fn(item)
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        result = await results.__anext__()
+                    except StopAsyncIteration:
+                        self.busy_s += time.perf_counter() - start
+                        break
+                    self.busy_s += time.perf_counter() - start
+                    if outbox is not None:
+                        start = time.perf_counter()
+                        await outbox.put(result)
+                        self.blocked_s += time.perf_counter() - start
+                self.items += 1
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    def get_stats(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy_s, 4),
+            "blocked_s": round(self.blocked_s, 4),
+            "utilization": round(self.busy_s / (elapsed * self.workers), 3) if elapsed > 0 else 0.0
+        }
+
+class IngestionPipeline:
+    """Parse, chunk, embed and store files as overlapping stages.
+
+    Each stage runs its own worker pool and hands work to the next stage
+    through a bounded queue. Parsing hands on whole files; chunking goes page
+    by page and hands on batches of ``batch_nodes`` nodes, so even within one
+    file a batch is embedding while the previous one is being stored. A slow
+    stage applies backpressure instead of buffering the whole upload.
+    End-to-end time tracks the slowest stage rather than the sum of all of
+    them; per-stage utilization shows which one that is.
+    """
+
+    def __init__(
+        self,
+        parse_workers: int = None,
+        chunk_workers: int = None,
+        embed_workers: int = None,
+        store_workers: int = None,
+        queue_size: int = None,
+        batch_nodes: int = None
+    ):
+        self.workers = {
+            "parse": parse_workers or settings.INGEST_PARSE_WORKERS,
+            "chunk": chunk_workers or settings.INGEST_CHUNK_WORKERS,
+            "embed": embed_workers or settings.INGEST_EMBED_WORKERS,
+            "store": store_workers or settings.INGEST_STORE_WORKERS
+        }
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+        self.batch_nodes = batch_nodes or settings.INGEST_BATCH_NODES
+
+    async def run(
+        self,
+        file_paths: List[str],
+        filenames: List[str],
+        indexing_strategy: IndexingStrategy,
+        prepare: Callable[..., None],
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Dict[str, Any]:
+        """Ingest files into the tenant's strategy collection.
+
+        ``prepare(documents, doc_id, filename, file_path)`` attaches document
+        metadata to a file's pages after parsing. Returns one record per file
+        (with its document centroid), in input order, plus node counts, merged
+        write statistics, the storage estimate and per-stage utilization. If any file
+        fails, the chunks already stored for every file of the run are
+        deleted before the error is raised.
+        """
+        strategy_name = indexing_strategy.strategy_name
+        write_stats = {"written": 0, "batches": 0, "retried_batches": 0}
+        storage_estimate: Dict[str, int] = {}
+        write_window = [None, None]
+        document_ids: List[str] = []
+
+        # Per-file records, completed batch by batch as the file's nodes are stored
+        files: Dict[int, Dict[str, Any]] = {}
+
+        async def parse(item: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+            content_hash = await asyncio.to_thread(text_cache.hash_file, item["file_path"])
+            with metrics.track("extraction", strategy_name):
+                # Reuse text already extracted from identical content
+                pages = await text_cache.load_pages(content_hash)
+                if pages is not None:
+                    documents = text_cache.to_documents(pages)
+                else:
+                    reader = SimpleDirectoryReader(input_files=[item["file_path"]])
+                    documents = await asyncio.to_thread(reader.load_data)
+                    await text_cache.save(content_hash, item["filename"], documents)
+            metrics.record_cache("extracted_text", hit=pages is not None)
+
+            document_id = str(uuid.uuid4())
+            document_ids.append(document_id)
+            prepare(documents, document_id, item["filename"], item["file_path"])
+            files[item["index"]] = {
+                "index": item["index"],
+                "document_id": document_id,
+                "filename": item["filename"],
+                "file_path": item["file_path"],
+                "num_pages": len(documents),
+                "content_hash": content_hash,
+                "chunks": 0,
+                "embedding_sum": None
+            }
+            yield {"index": item["index"], "documents": documents}
+
+        async def chunk(item: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+            nodes = []
+            for page in item["documents"]:
+                nodes.extend(await indexing_strategy.chunk([page], tenant, storage_estimate))
+                while len(nodes) >= self.batch_nodes:
+                    yield {"index": item["index"], "nodes": nodes[:self.batch_nodes]}
+                    nodes = nodes[self.batch_nodes:]
+            if nodes:
+                yield {"index": item["index"], "nodes": nodes}
+
+        async def embed(batch: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+            await indexing_strategy.embed(batch["nodes"])
+            yield batch
+
+        async def store(batch: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+            start = time.perf_counter()
+            stats = await indexing_strategy.store(batch["nodes"], tenant)
+            write_window[0] = min(write_window[0] or start, start)
+            write_window[1] = time.perf_counter()
+            for key in write_stats:
+                write_stats[key] += stats.get(key, 0)
+            record = files[batch["index"]]
+            record["chunks"] += len(batch["nodes"])
+            total = embedding_sums(batch["nodes"]).get(record["document_id"])
+            if total is not None:
+                record["embedding_sum"] = total if record["embedding_sum"] is None else record["embedding_sum"] + total
+            yield batch
+
+        functions = {"parse": parse, "chunk": chunk, "embed": embed, "store": store}
+        stages = [_Stage(name, self.workers[name], functions[name]) for name in STAGES]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+
+        async def feed():
+            for i, (file_path, filename) in enumerate(zip(file_paths, filenames)):
+                await queues[0].put({"index": i, "file_path": file_path, "filename": filename})
+            await queues[0].put(_DONE)
+
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(feed())] + [
+            asyncio.ensure_future(stage.run(queues[i], queues[i + 1] if i + 1 < len(queues) else None))
+            for i, stage in enumerate(stages)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed file fails the upload; stop the other stages and drop
+            # what was stored, since no metadata will point at it
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._discard(strategy_name, document_ids, tenant)
+            raise
+        elapsed = time.perf_counter() - start
+
+        results = []
+        for index in sorted(files):
+            record = files[index]
+            total = record.pop("embedding_sum")
+            record["centroid"] = normalize_centroid(total) if total is not None else None
+            results.append(record)
+
+        write_elapsed = write_window[1] - write_window[0] if write_window[0] is not None else 0.0
+        write_stats["elapsed_s"] = round(write_elapsed, 4)
+        write_stats["writes_per_s"] = round(write_stats["written"] / write_elapsed, 1) if write_elapsed > 0 else 0.0
+
+        stage_stats = {stage.name: stage.get_stats(elapsed) for stage in stages}
+        pipeline_stats = {
+            "elapsed_s": round(elapsed, 4),
+            "sequential_s": round(sum(stage.busy_s for stage in stages), 4),
+            "bottleneck": max(stage_stats, key=lambda name: stage_stats[name]["utilization"]) if results else None,
+            "stages": stage_stats
+        }
+        logger.info(
+            f"Ingested {len(results)} files in {elapsed:.2f}s (stages busy {pipeline_stats['sequential_s']:.2f}s in total, "
+            f"bottleneck: {pipeline_stats['bottleneck']})"
+        )
+        return {
+            "documents": results,
+            "total_chunks": sum(record["chunks"] for record in results),
+            "write_stats": write_stats,
+            "storage_estimate": storage_estimate,
+            "pipeline_stats": pipeline_stats
+        }
+
+    @staticmethod
+    async def _discard(strategy_name: str, document_ids: List[str], tenant: str):
+        """Delete the chunks (and sentence arrays) written for the documents of a failed run"""
+        if not document_ids:
+            return
+        try:
+            collection = db_manager.get_strategy_collection(strategy_name, tenant)
+            deleted = await collection.delete_many({"metadata.document_id": {"$in": document_ids}})
+            if strategy_name == "sentence_window":
+                # Sentence arrays are keyed by page ({document_id}:{page})
+                await db_manager.sentence_store_collection.delete_many(
+                    {**tenant_filter(tenant), "_id": {"$regex": f"^({'|'.join(document_ids)}):"}}
+                )
+            logger.info(f"Discarded {deleted.deleted_count} chunks of {len(document_ids)} documents from a failed ingestion")
+        except Exception as e:
+            logger.error(f"Error discarding chunks of a failed ingestion: {str(e)}")
+
+# Global ingestion pipeline
+ingestion_pipeline = IngestionPipeline()
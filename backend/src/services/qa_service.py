@@ -1,7 +1,15 @@
-from typing import Dict, Any, List, Optional
-from rag.indexing import indexing_manager
-from eval.trulens_evaluator import trulens_evaluator
+from typing import Dict, Any, List, Optional, Tuple
+from llama_index.core.schema import QueryBundle
+from llama_index.core.vector_stores import MetadataFilters
+from rag.indexing import build_metadata_filters, indexing_manager
+from rag.models import model_registry
+from services.document_router import document_router
+from backend.admission import admission, Overloaded
+from backend.coalescing import SingleFlight
+from eval.tru_eval import trulens_evaluator
 from config.settings import settings
+from observability.metrics import metrics
+from observability.tracing import tracer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,51 +19,50 @@ class QAService:
     
     def __init__(self):
         self.current_strategy = None
+        self.coalescer = SingleFlight("query")
     
+    @tracer.traced("qa.query")
     async def query(
         self, 
         question: str, 
         strategy: str = "vector_store",
         similarity_top_k: int = 5,
-        enable_evaluation: bool = False
+        enable_evaluation: bool = False,
+        filters: Optional[MetadataFilters] = None,
+        tenant: str = settings.DEFAULT_TENANT,
+        route_top_documents: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Query documents with specified strategy"""
+        """Query a tenant's documents with specified strategy, optionally restricted by metadata pre-filters.
+
+        Without filters, chunk retrieval is limited to the ``route_top_documents``
+        documents whose centroids are closest to the question (0 searches every chunk).
+        """
+        if route_top_documents is None:
+            route_top_documents = settings.ROUTING_TOP_DOCUMENTS
         try:
-            # Check if we need to switch strategy
-            if indexing_manager.get_current_strategy() != strategy:
-                raise ValueError(f"Index not available for strategy: {strategy}. Current: {indexing_manager.get_current_strategy()}")
-            
-            # Get query engine
-            query_engine = indexing_manager.get_query_engine(similarity_top_k)
+            # Pick up indexes built by other workers
+            await indexing_manager.sync_registry(tenant=tenant)
+            if not indexing_manager.has_index(strategy, tenant):
+                raise ValueError(f"Index not available for strategy: {strategy}. Current: {indexing_manager.get_current_strategy(tenant)}")
             
             if enable_evaluation:
                 # Use TruLens evaluation
-                evaluation_result = await trulens_evaluator.evaluate_query(question, strategy)
+                async with admission.slot("evaluation"):
+                    with metrics.track("evaluation", strategy):
+                        evaluation_result = await trulens_evaluator.evaluate_query(question, strategy, filters, tenant)
                 return evaluation_result
-            else:
-                # Direct query without evaluation
-                response = query_engine.query(question)
-                
-                # Extract source information
-                sources = []
-                if hasattr(response, 'source_nodes') and response.source_nodes:
-                    sources = [
-                        {
-                            "filename": node.metadata.get("filename", "Unknown"),
-                            "document_id": node.metadata.get("document_id", "Unknown"),
-                            "score": getattr(node, 'score', 0.0),
-                            "text_snippet": node.text[:200] + "..." if len(node.text) > 200 else node.text
-                        }
-                        for node in response.source_nodes
-                    ]
-                
-                return {
-                    "answer": str(response),
-                    "sources": sources,
-                    "strategy": strategy,
-                    "evaluation_enabled": False
-                }
+
+            def answer():
+                return self._answer(question, strategy, similarity_top_k, filters, route_top_documents, tenant)
+
+            if not settings.QUERY_COALESCING_ENABLED:
+                return await answer()
+
+            key = self._coalescing_key(question, strategy, similarity_top_k, filters, tenant) + (route_top_documents,)
+            return dict(await self.coalescer.do(key, answer))
                 
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Error during query: {str(e)}")
             return {
@@ -65,17 +72,117 @@ class QAService:
                 "error": str(e)
             }
     
+    async def _answer(
+        self,
+        question: str,
+        strategy: str,
+        similarity_top_k: int,
+        filters: Optional[MetadataFilters],
+        route_top_documents: int,
+        tenant: str
+    ) -> Dict[str, Any]:
+        """Retrieve and synthesize an answer without evaluation"""
+        query_bundle = QueryBundle(question)
+        routed_documents = None
+        # Explicit document filters already narrow the search
+        if filters is None and route_top_documents > 0:
+            with tracer.span("router.route"):
+                # The retriever reuses this embedding instead of embedding the question again
+                with metrics.track("query_embedding", strategy):
+                    query_bundle.embedding = await model_registry.get_embed_model().aget_query_embedding(question)
+                try:
+                    document_ids = await document_router.route(query_bundle.embedding, strategy, route_top_documents, tenant)
+                except Exception as e:
+                    logger.warning(f"Document routing failed, searching every chunk: {str(e)}")
+                    document_ids = None
+            if document_ids is not None:
+                filters = build_metadata_filters(document_ids=document_ids)
+                routed_documents = len(document_ids)
+
+        query_engine = indexing_manager.get_query_engine(similarity_top_k, strategy, filters, tenant)
+
+        # Retrieval and synthesis run separately so each stage is timed on its own
+        try:
+            with metrics.track("retrieval", strategy), tracer.span("retriever.retrieve"):
+                nodes = await self._run_blocking(query_engine.retrieve, query_bundle)
+        except Overloaded:
+            raise
+        except Exception as e:
+            if routed_documents is None:
+                raise
+            # e.g. a search index without the document_id filter field
+            logger.warning(f"Routed retrieval failed, searching every chunk: {str(e)}")
+            routed_documents = None
+            query_engine = indexing_manager.get_query_engine(similarity_top_k, strategy, None, tenant)
+            with metrics.track("retrieval", strategy), tracer.span("retriever.retrieve", routed=False):
+                nodes = await self._run_blocking(query_engine.retrieve, query_bundle)
+        with metrics.track("llm_synthesis", strategy), tracer.span("llm.synthesize", num_nodes=len(nodes)):
+            response = await self._run_blocking(query_engine.synthesize, query_bundle, nodes)
+        
+        # Extract source information
+        sources = []
+        if hasattr(response, 'source_nodes') and response.source_nodes:
+            sources = [
+                {
+                    "filename": node.metadata.get("filename", "Unknown"),
+                    "document_id": node.metadata.get("document_id", "Unknown"),
+                    "score": getattr(node, 'score', 0.0),
+                    "text_snippet": node.text[:200] + "..." if len(node.text) > 200 else node.text
+                }
+                for node in response.source_nodes
+            ]
+        
+        return {
+            "answer": str(response),
+            "sources": sources,
+            "strategy": strategy,
+            "evaluation_enabled": False,
+            "routed_documents": routed_documents
+        }
+
+    @staticmethod
+    async def _run_blocking(fn, *args):
+        """Run a blocking call on the query pool's threads so concurrent requests keep being served.
+
+        The call runs in a copy of the request's context, so its spans attach to the active trace.
+        """
+        return await admission.run_blocking("query", fn, *args)
+
+    @staticmethod
+    def _coalescing_key(
+        question: str,
+        strategy: str,
+        similarity_top_k: int,
+        filters: Optional[MetadataFilters],
+        tenant: str
+    ) -> Tuple[Any, ...]:
+        """Requests with equal keys get the same answer: same question up to case and whitespace, same index version"""
+        return (
+            tenant,
+            " ".join(question.lower().split()),
+            strategy,
+            similarity_top_k,
+            filters.model_dump_json() if filters else None,
+            indexing_manager.get_index_version(strategy, tenant)
+        )
+
     async def compare_strategies_query(
         self, 
         question: str, 
         strategies: List[str],
-        similarity_top_k: int = 5
+        similarity_top_k: int = 5,
+        filters: Optional[MetadataFilters] = None,
+        tenant: str = settings.DEFAULT_TENANT
     ) -> Dict[str, Any]:
         """Compare query results across different strategies"""
         try:
-            comparison_result = await trulens_evaluator.compare_strategies(question, strategies)
+            async with admission.slot("evaluation"):
+                with metrics.track("evaluation", "compare"):
+                    comparison_result = await trulens_evaluator.compare_strategies(question, strategies, filters, tenant)
             return comparison_result
             
+        except Overloaded:
+            raise
         except Exception as e:
             logger.error(f"Error comparing strategies: {str(e)}")
             return {
@@ -88,8 +195,8 @@ class QAService:
         """Get list of available indexing strategies"""
         return list(indexing_manager.strategies.keys())
     
-    def get_current_strategy(self) -> Optional[str]:
-        """Get current active strategy"""
-        return indexing_manager.get_current_strategy()
+    def get_current_strategy(self, tenant: str = settings.DEFAULT_TENANT) -> Optional[str]:
+        """Get a tenant's current active strategy"""
+        return indexing_manager.get_current_strategy(tenant)
 
 qa_service = QAService()
\ No newline at end of file
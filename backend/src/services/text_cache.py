@@ -0,0 +1,61 @@
+import hashlib
+import json
+import zlib
+from typing import List, Dict, Any, Optional
+from bson import Binary
+from llama_index.core import Document
+from backend.database import db_manager
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ExtractedTextCache:
+    """Per-page extracted text stored once per file content hash, zlib-compressed.
+
+    Lets documents be re-chunked and re-embedded without the original upload
+    and without running the file reader again.
+    """
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """SHA-256 of a file's content"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    async def load_pages(self, content_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached pages (text and reader metadata) for a content hash"""
+        record = await db_manager.extracted_text_collection.find_one({"_id": content_hash}, {"pages": 1})
+        if not record:
+            return None
+        return json.loads(zlib.decompress(record["pages"]))
+
+    async def save(self, content_hash: str, filename: str, documents: List[Document]):
+        """Store the reader's per-page output for a content hash"""
+        pages = [{"text": doc.text, "metadata": doc.metadata} for doc in documents]
+        raw = json.dumps(pages, ensure_ascii=False).encode("utf-8")
+        compressed = zlib.compress(raw, settings.TEXT_CACHE_COMPRESSION_LEVEL)
+        await db_manager.extracted_text_collection.replace_one(
+            {"_id": content_hash},
+            {
+                "_id": content_hash,
+                "filename": filename,
+                "num_pages": len(pages),
+                "raw_bytes": len(raw),
+                "compressed_bytes": len(compressed),
+                "pages": Binary(compressed)
+            },
+            upsert=True
+        )
+        logger.info(f"Cached extracted text for {filename}: {len(raw)} -> {len(compressed)} bytes")
+
+    @staticmethod
+    def to_documents(pages: List[Dict[str, Any]]) -> List[Document]:
+        """Rebuild reader documents from cached pages"""
+        return [Document(text=page["text"], metadata=dict(page["metadata"])) for page in pages]
+
+# Global extracted text cache
+text_cache = ExtractedTextCache()
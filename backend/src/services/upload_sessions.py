@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from pymongo import ReturnDocument
+from backend.database import db_manager
+from backend.tenancy import tenant_filter, tenant_upload_dir
+from config.settings import settings
+from services.text_cache import text_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+class UploadIncompleteError(ValueError):
+    """Raised when finalizing an upload that is still missing chunks"""
+
+class ChunkTooLargeError(ValueError):
+    """Raised when a chunk body is longer than the upload chunk size"""
+
+class UploadSessionManager:
+    """Resumable uploads: fixed-size chunks PUT in any order, then finalized.
+
+    Session state lives in MongoDB; chunk bytes are written in place into a
+    preallocated part file under ``UPLOAD_DIR/.partial``, so the server never
+    buffers more than one chunk. Part files are on local disk: every chunk and
+    the finalize request of one upload must reach workers that share
+    UPLOAD_DIR (one host, or a shared volume).
+    """
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    @staticmethod
+    def _part_path(upload_id: str) -> str:
+        return os.path.join(settings.UPLOAD_DIR, ".partial", f"{upload_id}.part")
+
+    @staticmethod
+    def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+        """Parse ``bytes start-end/total`` into (start, end exclusive, total)"""
+        match = _CONTENT_RANGE.match((header or "").strip())
+        if not match:
+            raise ValueError("Content-Range header must look like 'bytes start-end/total'")
+        start, end, total = (int(group) for group in match.groups())
+        return start, end + 1, total
+
+    async def read_chunk(self, stream: AsyncIterator[bytes]) -> bytes:
+        """Read a chunk request body, failing as soon as it grows past the chunk size"""
+        body = bytearray()
+        async for piece in stream:
+            body += piece
+            if len(body) > self.chunk_size:
+                raise ChunkTooLargeError(f"Chunk body exceeds {self.chunk_size} bytes")
+        return bytes(body)
+
+    async def create_session(
+        self,
+        filename: str,
+        size: int,
+        indexing_strategy: str,
+        sha256: Optional[str] = None,
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Dict[str, Any]:
+        """Start an upload session and preallocate its part file"""
+        if size <= 0:
+            raise ValueError("File size must be positive")
+        upload_id = uuid.uuid4().hex
+        total_chunks = math.ceil(size / self.chunk_size)
+
+        part_path = self._part_path(upload_id)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        await asyncio.to_thread(self._preallocate, part_path, size)
+
+        now = datetime.now(timezone.utc)
+        await db_manager.upload_sessions_collection.insert_one({
+            "_id": upload_id,
+            "tenant_id": tenant,
+            "filename": os.path.basename(filename),
+            "size": size,
+            "sha256": sha256,
+            "indexing_strategy": indexing_strategy,
+            "chunk_size": self.chunk_size,
+            "total_chunks": total_chunks,
+            "received_chunks": [],
+            "status": "uploading",
+            "created_at": now,
+            "updated_at": now
+        })
+        logger.info(f"Created upload session {upload_id} for {filename} ({size} bytes, {total_chunks} chunks)")
+        return {"upload_id": upload_id, "chunk_size": self.chunk_size, "total_chunks": total_chunks}
+
+    async def write_chunk(
+        self,
+        upload_id: str,
+        content_range: Optional[str],
+        data: bytes,
+        checksum: Optional[str],
+        tenant: str = settings.DEFAULT_TENANT
+    ) -> Optional[Dict[str, Any]]:
+        """Verify and store one chunk; returns the session status, or None if unknown to the tenant"""
+        session = await db_manager.upload_sessions_collection.find_one({"_id": upload_id, **tenant_filter(tenant)})
+        if not session:
+            return None
+        if session["status"] != "uploading":
+            raise ValueError(f"Upload {upload_id} is already {session['status']}")
+
+        start, end, total = self.parse_content_range(content_range)
+        chunk_size = session["chunk_size"]
+        if total != session["size"]:
+            raise ValueError(f"Content-Range total {total} does not match upload size {session['size']}")
+        if start % chunk_size or end != min(start + chunk_size, session["size"]):
+            raise ValueError(f"Ranges must cover exactly one {chunk_size}-byte chunk")
+        if len(data) != end - start:
+            raise ValueError(f"Expected {end - start} bytes, received {len(data)}")
+        if not checksum:
+            raise ValueError("X-Chunk-SHA256 header is required")
+        if hashlib.sha256(data).hexdigest() != checksum.lower():
+            raise ValueError("Chunk checksum mismatch")
+
+        await asyncio.to_thread(self._write_at, self._part_path(upload_id), start, data)
+        session = await db_manager.upload_sessions_collection.find_one_and_update(
+            {"_id": upload_id},
+            {
+                "$addToSet": {"received_chunks": start // chunk_size},
+                "$set": {"updated_at": datetime.now(timezone.utc)}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        return self._status(session)
+
+    async def get_status(self, upload_id: str, tenant: str = settings.DEFAULT_TENANT) -> Optional[Dict[str, Any]]:
+        """Get received chunks and the contiguous received offset"""
+        session = await db_manager.upload_sessions_collection.find_one({"_id": upload_id, **tenant_filter(tenant)})
+        return self._status(session) if session else None
+
+    async def finalize(self, upload_id: str, tenant: str = settings.DEFAULT_TENANT) -> Optional[Dict[str, Any]]:
+        """Check every chunk arrived, move the file into UPLOAD_DIR and return the session"""
+        session = await db_manager.upload_sessions_collection.find_one({"_id": upload_id, **tenant_filter(tenant)})
+        if not session:
+            return None
+        if session["status"] != "uploading":
+            raise ValueError(f"Upload {upload_id} is already {session['status']}")
+        status = self._status(session)
+        if status["missing_chunks"]:
+            raise UploadIncompleteError(f"Upload {upload_id} is missing chunks {status['missing_chunks'][:20]}")
+
+        part_path = self._part_path(upload_id)
+        if session.get("sha256"):
+            digest = await asyncio.to_thread(text_cache.hash_file, part_path)
+            if digest != session["sha256"].lower():
+                raise ValueError("File checksum mismatch")
+
+        # Only one finalize request may claim the session
+        claimed = await db_manager.upload_sessions_collection.find_one_and_update(
+            {"_id": upload_id, "status": "uploading"},
+            {"$set": {"status": "processing", "updated_at": datetime.now(timezone.utc)}}
+        )
+        if not claimed:
+            raise ValueError(f"Upload {upload_id} is already being finalized")
+
+        upload_dir = tenant_upload_dir(tenant)
+        os.makedirs(upload_dir, exist_ok=True)
+        file_path = os.path.join(upload_dir, session["filename"])
+        os.replace(part_path, file_path)
+        session["file_path"] = file_path
+        return session
+
+    async def mark(self, upload_id: str, status: str, **fields: Any):
+        """Record the outcome of ingesting a finalized upload"""
+        await db_manager.upload_sessions_collection.update_one(
+            {"_id": upload_id},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc), **fields}}
+        )
+
+    def _status(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        received = set(session["received_chunks"])
+        missing = [i for i in range(session["total_chunks"]) if i not in received]
+        contiguous = missing[0] if missing else session["total_chunks"]
+        return {
+            "upload_id": session["_id"],
+            "filename": session["filename"],
+            "status": session["status"],
+            "size": session["size"],
+            "chunk_size": session["chunk_size"],
+            "total_chunks": session["total_chunks"],
+            "received_chunks": sorted(received),
+            "missing_chunks": missing,
+            "received_offset": min(contiguous * session["chunk_size"], session["size"]),
+            "received_bytes": sum(min(session["chunk_size"], session["size"] - i * session["chunk_size"]) for i in received)
+        }
+
+    @staticmethod
+    def _preallocate(path: str, size: int):
+        with open(path, "wb") as f:
+            f.truncate(size)
+
+    @staticmethod
+    def _write_at(path: str, offset: int, data: bytes):
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            f.write(data)
+
+    def sweep_partial_files(self):
+        """Delete part files whose sessions have outlived the session TTL"""
+        partial_dir = os.path.join(settings.UPLOAD_DIR, ".partial")
+        if not os.path.isdir(partial_dir):
+            return
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL_S
+        for name in os.listdir(partial_dir):
+            path = os.path.join(partial_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                logger.info(f"Removed stale partial upload: {name}")
+
+# Global upload session manager
+upload_sessions = UploadSessionManager()
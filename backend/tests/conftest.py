@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "src"))
+# The benchmark fakes stand in for Gemini and MongoDB Atlas in tests too
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+# pydantic-settings validates the default list against the ``str`` annotation;
+# a value from the environment is taken as is
+os.environ.setdefault("ALLOWED_ORIGINS", "*")
+
+@pytest.fixture
+def fake_backend():
+    """Point the model registry and db_manager at fresh local fakes"""
+    from fakes import install_fakes
+    return install_fakes()
+
+@pytest.fixture
+def client(fake_backend):
+    """HTTP client for the app; startup is skipped, the fakes stand in for what it connects"""
+    from fastapi.testclient import TestClient
+    from main import app
+    return TestClient(app)
@@ -0,0 +1,23 @@
+"""Corpus and ingestion helpers shared by the test modules"""
+import asyncio
+
+from config.settings import settings
+from services.document_processing import document_processor
+
+def write_files(directory, count=3):
+    paths = []
+    for i in range(count):
+        path = directory / f"doc_{i}.txt"
+        path.write_text(" ".join(f"word{(i * 7 + j) % 50}" for j in range(300)) + ".")
+        paths.append(str(path))
+    return paths
+
+def ingest(paths, tenant=settings.DEFAULT_TENANT):
+    return asyncio.run(document_processor.process_multiple_documents(paths, [p.rsplit("/", 1)[-1] for p in paths], "vector_store", tenant))
+
+def reindex(overrides, document_ids=None, tenant=settings.DEFAULT_TENANT):
+    async def scenario():
+        job_id = await document_processor.start_reindex("vector_store", document_ids, overrides, tenant)
+        await document_processor.reindex_documents(job_id, "vector_store", document_ids, overrides, tenant)
+        return await document_processor.get_reindex_job(job_id, tenant)
+    return asyncio.run(scenario())
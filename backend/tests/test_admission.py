@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.admission import AdmissionController, AdmissionMiddleware, AdmissionPool, Overloaded
+
+def test_requests_beyond_the_queue_are_rejected_with_retry_after():
+    async def scenario():
+        pool = AdmissionPool("query", max_concurrency=1, max_queue=1, queue_timeout_s=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with pool.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert pool.get_stats()["waiting"] == 1
+
+        with pytest.raises(Overloaded) as rejected:
+            await pool.acquire()
+        assert rejected.value.status_code == 429
+        assert int(rejected.value.headers["Retry-After"]) >= 1
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert pool.get_stats()["in_flight"] == 0
+        assert pool.rejected == 1
+
+    asyncio.run(scenario())
+
+def test_waiting_too_long_for_a_slot_is_rejected():
+    async def scenario():
+        pool = AdmissionPool("upload", max_concurrency=1, max_queue=4, queue_timeout_s=0.05)
+        admitted = await pool.acquire()
+        with pytest.raises(Overloaded, match="queue_timeout"):
+            await pool.acquire()
+        assert pool.get_stats()["waiting"] == 0
+        pool.release(admitted)
+
+    asyncio.run(scenario())
+
+def test_blocking_calls_leave_the_event_loop_free():
+    async def scenario():
+        pool = AdmissionPool("query", max_concurrency=2, max_queue=2)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker = asyncio.ensure_future(tick())
+        await pool.run_blocking(time.sleep, 0.2)
+        ticker.cancel()
+        return ticks
+
+    # A blocking call on the loop would have let the ticker run only once
+    assert asyncio.run(scenario()) >= 5
+
+def test_blocking_calls_use_one_thread_per_slot():
+    async def scenario():
+        pool = AdmissionPool("query", max_concurrency=2, max_queue=8)
+        running, peak, lock = 0, 0, threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return threading.current_thread().name
+
+        names = await asyncio.gather(*(pool.run_blocking(work) for _ in range(6)))
+        return peak, set(names)
+
+    peak, names = asyncio.run(scenario())
+    assert peak == 2
+    assert all(name.startswith("query-pool") for name in names)
+
+def test_middleware_rejects_before_the_app_runs():
+    async def scenario():
+        controller = AdmissionController()
+        controller.pools["upload"] = AdmissionPool("upload", max_concurrency=1, max_queue=0)
+        calls, sent = [], []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = AdmissionMiddleware(app, {("POST", "/api/documents/upload"): "upload"}, controller)
+        scope = {"type": "http", "method": "POST", "path": "/api/documents/upload"}
+        admitted = await controller.pools["upload"].acquire()
+        await middleware(scope, None, send)
+        controller.pools["upload"].release(admitted)
+        await middleware(scope, None, send)
+        return calls, sent
+
+    calls, sent = asyncio.run(scenario())
+    assert sent[0]["status"] == 429
+    assert b"retry-after" in dict(sent[0]["headers"])
+    assert calls == ["/api/documents/upload"]
@@ -0,0 +1,27 @@
+import asyncio
+
+from eval.batch_eval import BatchEvaluator
+from rag.models import model_registry
+from tests.helpers import ingest, reindex, write_files
+
+QUESTIONS = ["What is word3 about?", "How does word7 relate to word12?"]
+
+def evaluate():
+    evaluator = BatchEvaluator(similarity_top_k=3)
+    return asyncio.run(evaluator.run(QUESTIONS, ["vector_store"]))
+
+def test_rerun_reuses_answers_until_the_index_changes(fake_backend, tmp_path):
+    ingest(write_files(tmp_path))
+    first = evaluate()
+    assert first["stats"]["queries"] == 2 and first["stats"]["answer_cache_hits"] == 0
+
+    provider = model_registry.get_feedback_provider("gemini")
+    calls = provider.calls
+    second = evaluate()
+    assert second["stats"]["queries"] == 0 and second["stats"]["answer_cache_hits"] == 2
+    assert provider.calls == calls
+    assert [row["answer"] for row in second["results"]] == [row["answer"] for row in first["results"]]
+
+    reindex({"chunk_overlap": 10})
+    third = evaluate()
+    assert third["stats"]["queries"] == 2
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from backend.coalescing import SingleFlight
+
+class Work:
+    """Awaitable work released by the test, counting its runs and cancellations"""
+
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+        self.error = None
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.started
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        flights, work = SingleFlight("test"), Work()
+        callers = [asyncio.ensure_future(flights.do("key", work)) for _ in range(3)]
+        await settle()
+        work.release.set()
+        return await asyncio.gather(*callers), work, flights
+
+    results, work, flights = asyncio.run(scenario())
+    assert results == [1, 1, 1]
+    assert work.started == 1
+    assert flights.get_stats() == {"executions": 1, "coalesced": 2, "in_flight": 0}
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flights, work = SingleFlight("test"), Work()
+        work.error = ConnectionError("provider down")
+        callers = [asyncio.ensure_future(flights.do("key", work)) for _ in range(2)]
+        await settle()
+        work.release.set()
+        return await asyncio.gather(*callers, return_exceptions=True), work
+
+    results, work = asyncio.run(scenario())
+    assert work.started == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+def test_cancelling_one_of_two_waiters_keeps_the_execution():
+    async def scenario():
+        flights, work = SingleFlight("test"), Work()
+        first = asyncio.ensure_future(flights.do("key", work))
+        second = asyncio.ensure_future(flights.do("key", work))
+        await settle()
+        first.cancel()
+        await settle()
+        work.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, work
+
+    result, work = asyncio.run(scenario())
+    assert result == 1
+    assert work.started == 1 and work.cancelled == 0
+
+def test_cancelling_the_last_waiter_cancels_the_execution_and_the_next_call_starts_fresh():
+    async def scenario():
+        flights, work = SingleFlight("test"), Work()
+        only = asyncio.ensure_future(flights.do("key", work))
+        await settle()
+        only.cancel()
+        await settle()
+        assert work.cancelled == 1
+        assert flights.get_stats()["in_flight"] == 0
+
+        fresh = asyncio.ensure_future(flights.do("key", work))
+        await settle()
+        work.release.set()
+        return await fresh, work, flights
+
+    result, work, flights = asyncio.run(scenario())
+    assert result == 2
+    assert work.started == 2
+    assert flights.get_stats() == {"executions": 2, "coalesced": 0, "in_flight": 0}
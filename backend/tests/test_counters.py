@@ -0,0 +1,69 @@
+import asyncio
+
+from config.settings import settings
+from services.document_processing import METADATA_VERSION_ID, document_processor
+
+def metadata(document_id, strategy="vector_store", status="processed", tenant=settings.DEFAULT_TENANT):
+    return {"document_id": document_id, "indexing_strategy": strategy, "status": status, "tenant_id": tenant}
+
+async def insert(documents, tenant=settings.DEFAULT_TENANT):
+    from backend.database import db_manager
+    await db_manager.metadata_collection.insert_many([dict(d) for d in documents])
+    await document_processor._update_counters(documents, 1, tenant)
+
+def test_missing_counter_is_seeded_from_an_exact_count(fake_backend):
+    async def scenario():
+        from backend.database import db_manager
+        # Loaded without going through the counters
+        await db_manager.metadata_collection.insert_many([metadata("a"), metadata("b", strategy="sentence_window")])
+
+        assert await document_processor.count_documents() == 2
+        assert await document_processor.count_documents("sentence_window") == 1
+        # From now on the seeded counter answers without counting
+        await db_manager.metadata_collection.insert_one(metadata("c"))
+        assert await document_processor.count_documents() == 2
+
+    asyncio.run(scenario())
+
+def test_inserts_and_deletes_keep_seeded_counters_exact(fake_backend):
+    async def scenario():
+        assert await document_processor.count_documents() == 0
+        assert await document_processor.count_documents("vector_store", "processed") == 0
+
+        await insert([metadata("a"), metadata("b"), metadata("c", strategy="sentence_window")])
+        assert await document_processor.count_documents() == 3
+        assert await document_processor.count_documents("vector_store", "processed") == 2
+
+        assert await document_processor.delete_document("a")
+        assert not await document_processor.delete_document("a")
+        assert await document_processor.count_documents() == 2
+        assert await document_processor.count_documents("vector_store", "processed") == 1
+        assert await document_processor.count_documents("sentence_window") == 1
+
+    asyncio.run(scenario())
+
+def test_counter_updates_bump_the_metadata_version(fake_backend):
+    async def scenario():
+        assert await document_processor.get_metadata_version() == 0
+        await insert([metadata("a")])
+        await document_processor.delete_document("a")
+        assert await document_processor.get_metadata_version() == 2
+
+    asyncio.run(scenario())
+
+def test_tenants_count_separately_and_reset_only_their_own(fake_backend):
+    async def scenario():
+        await insert([metadata("a"), metadata("b")])
+        await insert([metadata("c", tenant="acme")], tenant="acme")
+        assert await document_processor.count_documents() == 2
+        assert await document_processor.count_documents(tenant="acme") == 1
+
+        await document_processor.reset_counters("acme")
+        counter_ids = [d["_id"] for d in fake_backend[settings.COUNTERS_COLLECTION].documents]
+        assert METADATA_VERSION_ID in counter_ids
+        assert not [i for i in counter_ids if i.startswith("documents@acme:")]
+        assert "documents:*:*" in counter_ids
+        # Reseeded exactly on the next read
+        assert await document_processor.count_documents(tenant="acme") == 1
+
+    asyncio.run(scenario())
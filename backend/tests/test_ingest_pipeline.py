@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from services.document_processing import document_processor
+from tests.helpers import write_files
+
+def process(paths):
+    return document_processor.process_multiple_documents(paths, [p.rsplit("/", 1)[-1] for p in paths], "vector_store")
+
+def test_concurrent_runs_report_their_own_stats(fake_backend, tmp_path):
+    small, large = tmp_path / "small", tmp_path / "large"
+    small.mkdir()
+    large.mkdir()
+
+    async def scenario():
+        return await asyncio.gather(process(write_files(small, 1)), process(write_files(large, 4)))
+
+    results = asyncio.run(scenario())
+    for result in results:
+        assert result["write_stats"]["written"] == result["total_chunks"]
+    assert results[0]["total_chunks"] < results[1]["total_chunks"]
+    assert len(fake_backend[settings.VECTOR_STORE_COLLECTION].documents) == sum(r["total_chunks"] for r in results)
+
+def test_failed_run_leaves_no_orphan_chunks(fake_backend, tmp_path, monkeypatch):
+    from rag.indexing import VectorStoreIndexing
+    original_store = VectorStoreIndexing.store
+    stored = []
+
+    async def fail_on_second_file(self, nodes, tenant=settings.DEFAULT_TENANT):
+        stored.append(nodes[0].metadata["document_id"])
+        if len(stored) == 2:
+            await original_store(self, nodes[:1], tenant)
+            raise ConnectionError("write failed")
+        return await original_store(self, nodes, tenant)
+
+    monkeypatch.setattr(VectorStoreIndexing, "store", fail_on_second_file)
+    with pytest.raises(ConnectionError):
+        asyncio.run(process(write_files(tmp_path, 3)))
+    assert len(stored) >= 2
+    assert fake_backend[settings.VECTOR_STORE_COLLECTION].documents == []
+    assert fake_backend[settings.METADATA_COLLECTION].documents == []
+
+def test_one_file_is_embedded_and_stored_in_overlapping_batches(fake_backend, tmp_path, monkeypatch):
+    from rag.indexing import VectorStoreIndexing, document_centroids
+    from services.ingest_pipeline import ingestion_pipeline
+    monkeypatch.setattr(ingestion_pipeline, "batch_nodes", 2)
+    monkeypatch.setattr(ingestion_pipeline, "workers", {"parse": 1, "chunk": 1, "embed": 1, "store": 1})
+    path = tmp_path / "long.txt"
+    # Paragraphs of one chunk each, so splitting needs no NLTK data
+    path.write_text("\n\n\n".join(" ".join(f"word{(i + j) % 50}" for j in range(300)) for i in range(10)))
+    original_embed, original_store = VectorStoreIndexing.embed, VectorStoreIndexing.store
+    events = []
+
+    async def slow_embed(self, nodes):
+        events.append("embed_start")
+        await asyncio.sleep(0.02)
+        return await original_embed(self, nodes)
+
+    async def slow_store(self, nodes, tenant=settings.DEFAULT_TENANT):
+        events.append("store_start")
+        await asyncio.sleep(0.05)
+        stats = await original_store(self, nodes, tenant)
+        events.append("store_end")
+        return stats
+
+    monkeypatch.setattr(VectorStoreIndexing, "embed", slow_embed)
+    monkeypatch.setattr(VectorStoreIndexing, "store", slow_store)
+    result = asyncio.run(process([str(path)]))
+
+    stored = fake_backend[settings.VECTOR_STORE_COLLECTION].documents
+    assert result["total_chunks"] == len(stored) > 4
+    assert result["pipeline_stats"]["stages"]["store"]["items"] == -(-len(stored) // 2)
+    # The next batch was embedding while the first one was being stored
+    assert events.index("embed_start", events.index("store_start")) < events.index("store_end")
+    [record] = fake_backend[settings.METADATA_COLLECTION].documents
+    [expected] = document_centroids([_node(row) for row in stored]).values()
+    assert record["centroid"] == pytest.approx(expected, abs=1e-6)
+
+def _node(row):
+    from llama_index.core.schema import TextNode
+    return TextNode(text=row["text"], embedding=row["embedding"], metadata=row["metadata"])
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from backend.database import db_manager
+from config.settings import settings
+from observability.metrics import Counter, Gauge, Histogram, MetricsRegistry, metrics
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("stage_seconds", "Stage duration", ["stage"], buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, stage="embedding")
+    assert histogram.render() == [
+        "# HELP stage_seconds Stage duration",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="embedding",le="0.1"} 1',
+        'stage_seconds_bucket{stage="embedding",le="1.0"} 3',
+        'stage_seconds_bucket{stage="embedding",le="+Inf"} 4',
+        'stage_seconds_sum{stage="embedding"} 4.05',
+        'stage_seconds_count{stage="embedding"} 4',
+    ]
+
+def test_counter_and_gauge_render_labels():
+    counter = Counter("requests_total", "Requests", ["path"])
+    counter.inc(path='/a"b\\c')
+    counter.inc(2, path='/a"b\\c')
+    assert counter.render()[1:] == ["# TYPE requests_total counter", 'requests_total{path="/a\\"b\\\\c"} 3.0']
+
+    gauge = Gauge("in_flight", "Running")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render()[1:] == ["# TYPE in_flight gauge", "in_flight 1.0"]
+
+def test_track_records_duration_errors_and_in_flight():
+    registry = MetricsRegistry()
+    with registry.track("retrieval", "vector_store"):
+        assert registry.stage_in_flight.get(stage="retrieval", strategy="vector_store") == 1
+    with pytest.raises(ConnectionError):
+        with registry.track("retrieval", "vector_store"):
+            raise ConnectionError("down")
+    registry.record_cache("embedding", hit=True)
+    registry.record_cache("embedding", hit=False)
+    registry.record_cache("embedding", hit=False)
+
+    text = registry.render()
+    assert 'rag_stage_in_flight{stage="retrieval",strategy="vector_store"} 0.0' in text
+    assert 'rag_stage_errors_total{stage="retrieval",strategy="vector_store"} 1.0' in text
+    assert 'rag_stage_duration_seconds_count{stage="retrieval",strategy="vector_store"} 2' in text
+    assert 'rag_stage_duration_seconds_bucket{stage="retrieval",strategy="vector_store",le="+Inf"} 2' in text
+    assert 'rag_cache_requests_total{cache="embedding",result="hit"} 1.0' in text
+    assert 'rag_cache_requests_total{cache="embedding",result="miss"} 2.0' in text
+    assert text.endswith("\n")
+
+def test_duplicate_metric_names_are_rejected():
+    with pytest.raises(ValueError):
+        MetricsRegistry().register(Counter("rag_stage_errors_total", "Again"))
+
+def test_metrics_endpoint(client):
+    metrics.record_cache("extracted_text", hit=True)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    assert "# TYPE rag_stage_duration_seconds histogram" in response.text
+    assert 'rag_cache_requests_total{cache="extracted_text",result="hit"}' in response.text
+
+def test_health_reports_a_reachable_database(client, monkeypatch):
+    async def ping():
+        return True
+
+    monkeypatch.setattr(db_manager, "ping", ping)
+    response = client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "healthy" and body["database"] == "connected"
+    assert {"admission", "query_coalescing", "tenant_caches"} <= set(body)
+
+@pytest.mark.parametrize("failure", ["timeout", "error"])
+def test_health_is_503_when_the_ping_fails(client, monkeypatch, failure):
+    async def ping():
+        if failure == "timeout":
+            await asyncio.sleep(5)
+        raise ConnectionError("no primary")
+
+    monkeypatch.setattr(settings, "HEALTH_CHECK_TIMEOUT_S", 0.05)
+    monkeypatch.setattr(db_manager, "ping", ping)
+    response = client.get("/health")
+    assert response.status_code == 503
+    body = response.json()
+    assert body["status"] == "unhealthy" and body["database"] == "unreachable"
+    assert ("TimeoutError" if failure == "timeout" else "ConnectionError") in body["error"]
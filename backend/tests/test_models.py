@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from config.settings import settings
+from rag.models import ModelRegistry
+
+def build_in_thread(fn, timeout_s: float = 5.0):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=fn()), daemon=True)
+    thread.start()
+    thread.join(timeout_s)
+    assert not thread.is_alive(), "client construction deadlocked"
+    return result["value"]
+
+def test_service_context_builds_on_cold_registry(monkeypatch):
+    from llama_index.core import ServiceContext
+
+    registry = ModelRegistry()
+    llm, embed_model = object(), object()
+    monkeypatch.setattr(registry, "get_llm", lambda: registry._get_or_create("llm", lambda: llm))
+    monkeypatch.setattr(registry, "get_embed_model", lambda: registry._get_or_create("embed_model", lambda: embed_model))
+    monkeypatch.setattr(ServiceContext, "from_defaults", staticmethod(lambda llm, embed_model: (llm, embed_model)))
+
+    assert build_in_thread(registry.get_service_context) == (llm, embed_model)
+    assert registry.is_initialized("llm") and registry.is_initialized("embed_model")
+
+def test_clients_are_built_once_across_threads():
+    registry = ModelRegistry()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        return registry._get_or_create("llm", lambda: calls.append(1) or object())
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+
+@pytest.mark.parametrize("provider", ["litellm", "openai"])
+def test_feedback_provider_without_api_key_is_rejected(monkeypatch, provider):
+    monkeypatch.setattr(settings, f"{provider.upper()}_API_KEY", "")
+    registry = ModelRegistry()
+    with pytest.raises(ValueError, match=f"{provider.upper()}_API_KEY is not set"):
+        registry.get_feedback_provider(provider)
+    assert not registry.is_initialized(f"feedback_provider:{provider}")
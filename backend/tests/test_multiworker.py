@@ -0,0 +1,7 @@
+from multiworker import run
+
+def test_every_worker_process_serves_the_latest_index():
+    # Two real processes sharing one fake store: worker 0 indexes, both must query it, before and after a reindex
+    report = run(2, "vector_store")
+    assert report["all_ok"], report
+    assert [r["version"] for r in report["after_reindex"]] == [2, 2]
@@ -0,0 +1,70 @@
+import asyncio
+
+from eval.tru_eval import trulens_evaluator
+from services.qa_service import qa_service
+from tests.helpers import ingest, write_files
+
+def fake_evaluation(monkeypatch):
+    """TruLens is not needed to exercise the service's admission and metrics wiring"""
+    calls = []
+
+    async def evaluate_query(query, strategy_name, filters=None, tenant=None):
+        calls.append(strategy_name)
+        return {"query": query, "response": "answer", "strategy": strategy_name,
+                "metrics": {"Groundedness": {"score": 0.5, "reason": None}}}
+
+    monkeypatch.setattr(trulens_evaluator, "evaluate_query", evaluate_query)
+    return calls
+
+def test_query_with_evaluation(fake_backend, tmp_path, monkeypatch):
+    calls = fake_evaluation(monkeypatch)
+    ingest(write_files(tmp_path))
+    result = asyncio.run(qa_service.query("What is word3 about?", "vector_store", 3, enable_evaluation=True))
+    assert "error" not in result
+    assert result["metrics"]["Groundedness"]["score"] == 0.5
+    assert calls == ["vector_store"]
+
+def test_compare_strategies(fake_backend, tmp_path, monkeypatch):
+    calls = fake_evaluation(monkeypatch)
+    ingest(write_files(tmp_path))
+    result = asyncio.run(qa_service.compare_strategies_query("What is word3 about?", ["vector_store", "sentence_window"]))
+    assert "error" not in result
+    # sentence_window has no index, so only vector_store is evaluated
+    assert list(result["results"]) == ["vector_store"] and calls == ["vector_store"]
+    assert result["summary"]["best_groundedness"] == {"strategy": "vector_store", "score": 0.5}
+
+def find_span(span, name):
+    if span["name"] == name:
+        return span
+    return next((found for child in span["children"] if (found := find_span(child, name))), None)
+
+def test_traced_query_runs_on_the_query_pool(fake_backend, tmp_path, monkeypatch):
+    import threading
+    from fakes import FakeVectorStore
+    from observability.tracing import tracer
+    ingest(write_files(tmp_path))
+    original_query = FakeVectorStore.query
+    threads = []
+
+    def record_thread(self, query, **kwargs):
+        threads.append(threading.current_thread().name)
+        with tracer.span("vector_store.query"):
+            return original_query(self, query, **kwargs)
+
+    monkeypatch.setattr(FakeVectorStore, "query", record_thread)
+    executions = qa_service.coalescer.executions
+
+    async def scenario():
+        async def traced_query():
+            with tracer.start_trace("test") as trace:
+                result = await qa_service.query("What is word3 about?", "vector_store", 3)
+            return result, trace.trace_id
+        return await asyncio.gather(traced_query(), traced_query())
+
+    (first, trace_id), (second, _) = asyncio.run(scenario())
+    assert "error" not in first and first == second
+    # Traced requests are coalesced like any other
+    assert qa_service.coalescer.executions == executions + 1
+    assert threads and all(name.startswith("query-pool") for name in threads)
+    retrieve = find_span(tracer.get_trace(trace_id)["root"], "retriever.retrieve")
+    assert find_span(retrieve, "vector_store.query") is not None
@@ -0,0 +1,32 @@
+from config.settings import settings
+from tests.helpers import ingest, reindex, write_files
+
+def test_reindex_replaces_previous_chunks(fake_backend, tmp_path):
+    ingest(write_files(tmp_path))
+    chunks = fake_backend[settings.VECTOR_STORE_COLLECTION]
+    previous_ids = {row["_id"] for row in chunks.documents}
+
+    job = reindex({"chunk_overlap": 10})
+    assert job["status"] == "completed"
+    assert len(job["reindexed_documents"]) == 3
+    current_ids = {row["_id"] for row in chunks.documents}
+    assert current_ids and not current_ids & previous_ids
+    assert len({row["id"] for row in chunks.documents}) == len(chunks.documents)
+
+def test_failed_reindex_keeps_previous_chunks(fake_backend, tmp_path, monkeypatch):
+    from rag.indexing import VectorStoreIndexing
+    ingest(write_files(tmp_path))
+    chunks = fake_backend[settings.VECTOR_STORE_COLLECTION]
+    previous = sorted(row["id"] for row in chunks.documents)
+
+    original_store = VectorStoreIndexing.store
+
+    async def store_then_fail(self, nodes, tenant=settings.DEFAULT_TENANT):
+        # Part of the new chunks lands before the failure
+        await original_store(self, nodes[:2], tenant)
+        raise ConnectionError("write failed")
+
+    monkeypatch.setattr(VectorStoreIndexing, "store", store_then_fail)
+    job = reindex({"chunk_overlap": 10})
+    assert job["status"] == "failed"
+    assert sorted(row["id"] for row in chunks.documents) == previous
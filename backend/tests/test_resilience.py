@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from rag.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientCaller
+
+def failing():
+    raise ConnectionError("provider down")
+
+def caller(**kwargs):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout_s=kwargs.pop("reset_timeout_s", 0.05))
+    return ResilientCaller("test", deadline_s=kwargs.pop("deadline_s", 1.0), hedging=kwargs.pop("hedging", False), breaker=breaker, **kwargs)
+
+def test_circuit_opens_after_consecutive_failures_and_fails_fast():
+    resilient = caller(reset_timeout_s=60)
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            resilient.call(failing)
+    assert resilient.breaker.state == CircuitBreaker.OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        resilient.call(lambda: calls.append(1))
+    assert calls == []
+
+def test_success_resets_the_failure_count():
+    resilient = caller()
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            resilient.call(failing)
+    assert resilient.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        resilient.call(failing)
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_lets_one_probe_through_and_closes_on_success():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout_s=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    async def scenario():
+        resilient = caller(reset_timeout_s=0.05)
+        resilient.breaker.failures = 3
+        resilient.breaker.record_failure()
+        await asyncio.sleep(0.06)
+
+        probe = asyncio.ensure_future(resilient.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        async def answer():
+            return "ok"
+        return await resilient.acall(answer)
+
+    assert asyncio.run(scenario()) == "ok"
+
+def test_hedge_answers_when_the_first_attempt_is_slow():
+    attempts = []
+
+    def slow_then_fast():
+        attempts.append(1)
+        time.sleep(0.5 if len(attempts) == 1 else 0.0)
+        return len(attempts)
+
+    resilient = caller(hedging=True, hedge_min_delay_s=0.05)
+    start = time.perf_counter()
+    assert resilient.call(slow_then_fast) == 2
+    assert time.perf_counter() - start < 0.4
+
+def test_deadline_counts_as_a_failure():
+    resilient = caller(deadline_s=0.05)
+    with pytest.raises(DeadlineExceeded):
+        resilient.call(time.sleep, 0.3)
+    assert resilient.breaker.failures == 1
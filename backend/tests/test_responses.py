@@ -0,0 +1,99 @@
+import gzip
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from backend import responses
+from backend.responses import CompressionMiddleware, FastJSONResponse, etag_matches, not_modified, set_etag
+
+ETAG = '"0123456789abcdef0123"'
+ROWS = [{"document_id": f"doc-{i}", "filename": f"file-{i}.pdf"} for i in range(50)]
+
+def make_client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/rows")
+    async def rows(request: Request, response: Response):
+        if etag_matches(request, ETAG):
+            return not_modified(ETAG, vary="X-Tenant-Id")
+        set_etag(response, ETAG, vary="X-Tenant-Id")
+        return {"documents": ROWS}
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for row in ROWS:
+                yield (row["document_id"] + "\n").encode()
+        return StreamingResponse(body(), media_type="text/plain")
+
+    return TestClient(app)
+
+def get_raw(client, path, **headers):
+    """Response with the body as sent, before the client decodes it"""
+    with client.stream("GET", path, headers=headers) as response:
+        return response, b"".join(response.iter_raw())
+
+def test_gzip_when_accepted():
+    response, body = get_raw(make_client(), "/rows", **{"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == {"documents": ROWS}
+    assert response.headers["etag"] == '"0123456789abcdef0123-gzip"'
+    assert response.headers["vary"] == "X-Tenant-Id, Accept-Encoding"
+
+def test_brotli_preferred_when_available(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", SimpleNamespace(compress=lambda body, quality: b"br:" + body))
+    response, body = get_raw(make_client(), "/rows", **{"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert body.startswith(b"br:")
+    assert response.headers["etag"] == '"0123456789abcdef0123-br"'
+
+def test_brotli_unavailable_falls_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    response, _ = get_raw(make_client(), "/rows", **{"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+
+@pytest.mark.parametrize("accept", ["identity", "gzip;q=0", "br;q=0.0, gzip;q=0"])
+def test_refused_encodings_are_not_used(accept):
+    response, body = get_raw(make_client(), "/rows", **{"Accept-Encoding": accept})
+    assert "content-encoding" not in response.headers
+    assert json.loads(body) == {"documents": ROWS}
+    assert response.headers["etag"] == ETAG
+
+def test_small_bodies_are_sent_as_is():
+    response, body = get_raw(make_client(), "/small", **{"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert body == b'{"status":"ok"}'
+    assert response.headers["vary"] == "Accept-Encoding"
+
+def test_streamed_responses_are_passed_through():
+    response, body = get_raw(make_client(), "/stream", **{"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert body.decode().split() == [row["document_id"] for row in ROWS]
+
+@pytest.mark.parametrize("if_none_match", [
+    ETAG,
+    '"0123456789abcdef0123-gzip"',
+    'W/"0123456789abcdef0123-br"',
+    '"other", "0123456789abcdef0123"',
+    "*",
+])
+def test_matching_if_none_match_gets_304(if_none_match):
+    response = make_client().get("/rows", headers={"If-None-Match": if_none_match, "Accept-Encoding": "gzip"})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == ETAG
+    assert "content-encoding" not in response.headers
+
+def test_changed_etag_gets_the_body():
+    response = make_client().get("/rows", headers={"If-None-Match": '"stale-gzip"'})
+    assert response.status_code == 200 and response.json() == {"documents": ROWS}
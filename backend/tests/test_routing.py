@@ -0,0 +1,33 @@
+import asyncio
+
+from config.settings import settings
+from services.qa_service import qa_service
+from tests.helpers import ingest, write_files
+
+def query(route_top_documents=None):
+    return asyncio.run(qa_service.query("What is word3 about?", "vector_store", 3, route_top_documents=route_top_documents))
+
+def test_routing_is_off_by_default(fake_backend, tmp_path):
+    ingest(write_files(tmp_path))
+    assert settings.ROUTING_TOP_DOCUMENTS == 0
+    result = query()
+    assert result["routed_documents"] is None and result["sources"]
+
+    result = query(route_top_documents=1)
+    assert result["routed_documents"] == 1
+    assert len({source["document_id"] for source in result["sources"]}) == 1
+
+def test_failed_filtered_search_falls_back_to_every_chunk(fake_backend, tmp_path, monkeypatch):
+    from fakes import FakeVectorStore
+    ingest(write_files(tmp_path))
+    original_query = FakeVectorStore.query
+
+    def reject_filters(self, query, **kwargs):
+        if query.filters is not None:
+            raise RuntimeError("Path 'metadata.document_id' needs to be indexed as filter")
+        return original_query(self, query, **kwargs)
+
+    monkeypatch.setattr(FakeVectorStore, "query", reject_filters)
+    result = query(route_top_documents=1)
+    assert "error" not in result
+    assert result["routed_documents"] is None and result["sources"]
@@ -0,0 +1,51 @@
+from backend.database import VECTOR_FILTER_FIELDS, DatabaseManager
+from config.settings import settings
+
+def required_fields():
+    return [
+        {"type": "vector", "path": "embedding", "numDimensions": settings.EMBEDDING_DIMENSIONS, "similarity": "cosine"}
+    ] + [{"type": "filter", "path": f"metadata.{field}"} for field in VECTOR_FILTER_FIELDS]
+
+class SearchIndexCollection:
+    def __init__(self, indexes):
+        self.indexes = indexes
+        self.created, self.updated = [], []
+
+    def list_search_indexes(self):
+        return self.indexes
+
+    def create_search_index(self, model):
+        self.created.append(model.document["name"])
+
+    def update_search_index(self, name, definition):
+        self.updated.append((name, definition))
+
+def ensure(indexes):
+    manager = DatabaseManager()
+    collection = SearchIndexCollection(indexes)
+    manager.get_sync_collection = lambda name: collection
+    manager._ensure_search_index("vector_store_docs", "vector_store_index")
+    return collection
+
+def test_missing_index_is_created():
+    collection = ensure([])
+    assert collection.created == ["vector_store_index"]
+    assert collection.updated == []
+
+def test_matching_index_is_left_alone():
+    fields = list(reversed(required_fields()))
+    collection = ensure([{"name": "vector_store_index", "latestDefinition": {"fields": fields}}])
+    assert collection.created == [] and collection.updated == []
+
+def test_customized_index_keeps_extra_fields_and_is_not_rebuilt():
+    fields = required_fields() + [{"type": "filter", "path": "metadata.author"}]
+    collection = ensure([{"name": "vector_store_index", "latestDefinition": {"fields": fields}}])
+    assert collection.updated == []
+
+def test_outdated_index_is_updated_without_dropping_custom_fields():
+    custom = {"type": "filter", "path": "metadata.author"}
+    outdated = [{"type": "vector", "path": "embedding", "numDimensions": 256, "similarity": "cosine"}, custom]
+    collection = ensure([{"name": "vector_store_index", "latestDefinition": {"fields": outdated}}])
+    [(name, definition)] = collection.updated
+    assert name == "vector_store_index"
+    assert definition["fields"] == required_fields() + [custom]
@@ -0,0 +1,53 @@
+import asyncio
+import re
+
+import pytest
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceWindowNodeParser
+from llama_index.core.schema import NodeWithScore
+
+from rag.sentence_store import SentenceStore, SentenceWindowPostProcessor
+
+WINDOW_SIZE = 2
+
+def split_sentences(text):
+    # NLTK's punkt data is not needed for these regular sentences
+    return re.findall(r"[^.]+\.\s*", text)
+
+def parse(*texts):
+    parser = SentenceWindowNodeParser.from_defaults(sentence_splitter=split_sentences, window_size=WINDOW_SIZE)
+    documents = [Document(text=text, doc_id=f"doc-{i}") for i, text in enumerate(texts)]
+    return parser.get_nodes_from_documents(documents)
+
+def rebuild(store, nodes):
+    processor = SentenceWindowPostProcessor(store, window_size=WINDOW_SIZE)
+    return [n.node.get_content() for n in processor.postprocess_nodes([NodeWithScore(node=node, score=1.0) for node in nodes])]
+
+@pytest.mark.parametrize("sentences", [1, 2, 3, 12])
+def test_rebuilt_windows_match_the_parsers_windows(fake_backend, sentences):
+    long = " ".join(f"Sentence {i} of the long document." for i in range(sentences))
+    # A second document checks that windows never cross into a neighbouring document
+    nodes = parse(long, "Short one. Short two.")
+    windows = [node.metadata["window"] for node in nodes]
+
+    store = SentenceStore(cache_size=1)
+    arrays = store.compact_nodes(nodes)
+    assert all("window" not in node.metadata and "original_text" not in node.metadata for node in nodes)
+    assert [len(array) for array in arrays.values()] == [sentences, 2]
+    asyncio.run(store.save(arrays))
+
+    # A cache of one document makes every document switch reload its array
+    assert rebuild(store, nodes) == windows
+    assert store.get_cache_info()["misses"] > 0
+
+def test_legacy_nodes_use_their_stored_window(fake_backend):
+    nodes = parse("First. Second. Third. Fourth.")
+    windows = [node.metadata["window"] for node in nodes]
+    assert rebuild(SentenceStore(), nodes) == windows
+
+def test_storage_estimate_counts_window_copies():
+    nodes = parse(" ".join(f"Sentence {i}." for i in range(10)))
+    arrays = SentenceStore().compact_nodes(nodes)
+    estimate = SentenceStore.estimate_storage(nodes, arrays, WINDOW_SIZE)
+    assert estimate["nodes"] == 10 and estimate["documents"] == 1
+    assert estimate["estimated_bytes_compact"] < estimate["estimated_bytes_with_windows"]
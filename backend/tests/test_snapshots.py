@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from backend.database import db_manager
+from config.settings import settings
+from services.snapshots import _frame, snapshot_manager
+from tests.helpers import ingest, write_files
+
+def export(tenant=settings.DEFAULT_TENANT):
+    async def scenario():
+        return b"".join([chunk async for chunk in await snapshot_manager.open_export("vector_store", tenant)])
+    return asyncio.run(scenario())
+
+def import_snapshot(snapshot, replace=False, tenant=settings.DEFAULT_TENANT):
+    async def pieces():
+        for offset in range(0, len(snapshot), 1000):
+            yield snapshot[offset:offset + 1000]
+    return asyncio.run(snapshot_manager.import_snapshot("vector_store", pieces(), replace=replace, tenant=tenant))
+
+def node_ids(fake_backend):
+    return sorted(row["id"] for row in fake_backend[settings.VECTOR_STORE_COLLECTION].documents)
+
+def test_reimport_upserts_nodes(fake_backend, tmp_path):
+    ingest(write_files(tmp_path))
+    before = node_ids(fake_backend)
+    snapshot = export()
+
+    stats = import_snapshot(snapshot)
+    assert stats["nodes"] == len(before)
+    assert node_ids(fake_backend) == before
+    assert len(fake_backend[settings.METADATA_COLLECTION].documents) == 3
+    assert fake_backend[settings.SNAPSHOT_STAGING_COLLECTION].documents == []
+
+def test_replace_drops_rows_missing_from_the_snapshot(fake_backend, tmp_path):
+    ingest(write_files(tmp_path, count=2))
+    snapshot = export()
+    expected = node_ids(fake_backend)
+    later = tmp_path / "later"
+    later.mkdir()
+    ingest(write_files(later, count=1))
+
+    import_snapshot(snapshot, replace=True)
+    assert node_ids(fake_backend) == expected
+    assert len(fake_backend[settings.METADATA_COLLECTION].documents) == 2
+
+@pytest.mark.parametrize("damage", ["truncated", "miscounted"])
+def test_invalid_snapshot_leaves_the_index_alone(fake_backend, tmp_path, damage):
+    ingest(write_files(tmp_path))
+    snapshot = export()
+    if damage == "truncated":
+        snapshot = snapshot[:len(snapshot) // 2]
+    else:
+        nodes = len(node_ids(fake_backend))
+        end = _frame({"kind": "end", "nodes": nodes, "documents": 3}, [])
+        assert snapshot.endswith(end)
+        snapshot = snapshot[:-len(end)] + _frame({"kind": "end", "nodes": nodes + 1, "documents": 3}, [])
+    chunks = fake_backend[settings.VECTOR_STORE_COLLECTION]
+    rows = [dict(row) for row in chunks.documents]
+
+    with pytest.raises(ValueError):
+        import_snapshot(snapshot, replace=True)
+    assert chunks.documents == rows
+    assert len(fake_backend[settings.METADATA_COLLECTION].documents) == 3
+    assert fake_backend[settings.SNAPSHOT_STAGING_COLLECTION].documents == []
+
+def test_import_of_another_tenants_documents_is_rejected_before_writing(fake_backend, tmp_path):
+    ingest(write_files(tmp_path), tenant="acme")
+    snapshot = export(tenant="acme")
+    owned = [dict(row) for row in fake_backend[settings.METADATA_COLLECTION].documents]
+
+    with pytest.raises(ValueError, match="another tenant"):
+        import_snapshot(snapshot, tenant="globex")
+    assert fake_backend[settings.METADATA_COLLECTION].documents == owned
+    globex_nodes = fake_backend.get(db_manager.collection_name("vector_store", "globex"))
+    assert globex_nodes is None or globex_nodes.documents == []
+    assert fake_backend[settings.SNAPSHOT_STAGING_COLLECTION].documents == []
@@ -0,0 +1,109 @@
+import pytest
+
+from backend.tenancy import IdleCache
+from config.settings import settings
+from services.snapshots import _frame
+from tests.helpers import ingest, write_files
+
+ACME, GLOBEX = {"X-Tenant-Id": "acme"}, {"X-Tenant-Id": "globex"}
+
+@pytest.fixture
+def tenants(client, tmp_path):
+    """acme with three documents and globex with one; returns each tenant's document ids"""
+    acme, globex = tmp_path / "acme", tmp_path / "globex"
+    acme.mkdir()
+    globex.mkdir()
+    ingest(write_files(acme), tenant="acme")
+    ingest(write_files(globex, count=1), tenant="globex")
+    return {name: document_ids(client, headers) for name, headers in (("acme", ACME), ("globex", GLOBEX))}
+
+def document_ids(client, headers):
+    response = client.get("/api/documents/list", headers=headers)
+    assert response.status_code == 200
+    return {document["document_id"] for document in response.json()["documents"]}
+
+def test_tenants_list_and_query_only_their_own_documents(client, tenants):
+    assert len(tenants["acme"]) == 3 and len(tenants["globex"]) == 1
+    assert document_ids(client, {}) == set()
+
+    for name, headers in (("acme", ACME), ("globex", GLOBEX)):
+        result = client.post("/api/qa/query", json={"question": "What is word3 about?"}, headers=headers).json()
+        assert result["sources"]
+        assert {source["document_id"] for source in result["sources"]} <= tenants[name]
+
+    # The default tenant has no index of its own
+    assert "error" in client.post("/api/qa/query", json={"question": "What is word3 about?"}).json()
+
+def test_reindex_cannot_reach_another_tenants_documents(client, tenants, fake_backend):
+    from backend.database import db_manager
+    acme_chunks = fake_backend[db_manager.collection_name("vector_store", "acme")]
+    before = sorted(row["_id"] for row in acme_chunks.documents)
+
+    response = client.post(
+        "/api/documents/reindex",
+        json={"strategy": "vector_store", "document_ids": sorted(tenants["acme"]), "chunk_overlap": 10},
+        headers=GLOBEX
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    job = client.get(f"/api/documents/reindex/{job_id}", headers=GLOBEX).json()
+    assert job["status"] == "completed" and job["reindexed_documents"] == []
+    assert sorted(row["_id"] for row in acme_chunks.documents) == before
+    assert client.get(f"/api/documents/reindex/{job_id}", headers=ACME).status_code == 404
+
+def test_export_holds_only_the_tenants_documents(client, tenants, fake_backend):
+    from backend.database import db_manager
+    nodes = len(fake_backend[db_manager.collection_name("vector_store", "globex")].documents)
+    snapshot = client.get("/api/documents/snapshots/vector_store", headers=GLOBEX).content
+    assert snapshot.endswith(_frame({"kind": "end", "nodes": nodes, "documents": 1}, []))
+    assert client.get("/api/documents/snapshots/vector_store", headers={"X-Tenant-Id": "initech"}).status_code == 404
+
+def test_legacy_records_belong_to_the_default_tenant(client, fake_backend):
+    fake_backend[settings.METADATA_COLLECTION].documents.append(
+        {"_id": 1, "document_id": "legacy", "filename": "old.pdf", "indexing_strategy": "vector_store", "status": "completed"}
+    )
+    assert document_ids(client, {}) == {"legacy"}
+    assert document_ids(client, {"X-Tenant-Id": settings.DEFAULT_TENANT}) == {"legacy"}
+    assert document_ids(client, ACME) == set()
+
+@pytest.mark.parametrize("tenant_id", ["../etc", "Acme Corp", "-acme", "a" * 49])
+def test_invalid_tenant_id_is_rejected(client, tenant_id):
+    response = client.get("/api/documents/list", headers={"X-Tenant-Id": tenant_id})
+    assert response.status_code == 400
+    assert "Invalid tenant id" in response.json()["detail"]
+
+def test_tenant_id_is_normalized(client):
+    assert client.get("/api/documents/list", headers={"X-Tenant-Id": " ACME "}).status_code == 200
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_idle_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr("backend.tenancy.time.monotonic", Clock())
+    cache = IdleCache("test", idle_s=60, max_entries=2)
+    cache["a"], cache["b"] = 1, 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+    assert cache.keys() == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.get_stats() == {"entries": 2, "capacity": 2, "idle_s": 60, "evictions": 1}
+
+def test_idle_cache_expires_idle_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("backend.tenancy.time.monotonic", clock)
+    cache = IdleCache("test", idle_s=60, max_entries=10)
+    cache["a"], cache["b"] = 1, 2
+    clock.now += 45
+    assert cache.get("b") == 2
+    clock.now += 30
+    # a was last used 75s ago, b 30s ago
+    assert cache.get("a") is None
+    assert cache.keys() == ["b"]
+    clock.now += 61
+    assert "b" in cache and len(cache) == 1
+    assert cache.get("b") is None and len(cache) == 0
+    assert cache.get_stats()["evictions"] == 2
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.admission import admission
+from config.settings import settings
+from observability.tracing import Tracer, tracer
+from tests.helpers import ingest, write_files
+
+def test_spans_nest_under_the_trace_root():
+    tracing = Tracer(sample_rate=0.0)
+
+    @tracing.traced("sync_step")
+    def sync_step():
+        with tracing.span("inner", size=3):
+            pass
+
+    @tracing.traced("async_step")
+    async def async_step():
+        sync_step()
+        raise ValueError("failed")
+
+    async def scenario():
+        with tracing.start_trace("request", route="/test") as trace:
+            with pytest.raises(ValueError):
+                await async_step()
+        return trace
+
+    assert not tracing.active()
+    trace = tracing.get_trace(asyncio.run(scenario()).trace_id)
+    root = trace["root"]
+    assert root["name"] == "request" and root["attributes"] == {"route": "/test"}
+    [step] = root["children"]
+    assert step["name"] == "async_step" and step["error"] == "ValueError('failed')"
+    [sync] = step["children"]
+    assert sync["children"][0]["name"] == "inner" and sync["children"][0]["attributes"] == {"size": 3}
+    assert "profile" not in trace
+
+def test_spans_are_noops_outside_a_trace():
+    with tracer.span("orphan") as span:
+        assert span is None
+
+def test_should_trace(monkeypatch):
+    assert Tracer(sample_rate=0.0).should_trace("1")
+    assert Tracer(sample_rate=1.0).should_trace("off") is False
+    assert Tracer(sample_rate=0.0).should_trace() is False
+    assert Tracer(sample_rate=1.0).should_trace()
+
+    monkeypatch.setattr("observability.tracing.random.random", lambda: 0.3)
+    assert Tracer(sample_rate=0.5).should_trace()
+    assert Tracer(sample_rate=0.2).should_trace() is False
+
+def test_oldest_traces_are_dropped():
+    tracing = Tracer(max_traces=2)
+    ids = []
+    for _ in range(3):
+        with tracing.start_trace("request") as trace:
+            ids.append(trace.trace_id)
+    assert tracing.get_trace(ids[0]) is None
+    assert all(tracing.get_trace(trace_id) for trace_id in ids[1:])
+
+def busy_pool_work(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_profile_samples_the_pool_thread_doing_the_work(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_PROFILE_INTERVAL_MS", 1.0)
+
+    async def scenario():
+        with tracer.start_trace("request", profile=True) as trace:
+            await admission.run_blocking("query", busy_pool_work, 0.2)
+        return trace
+
+    profile = tracer.get_trace(asyncio.run(scenario()).trace_id)["profile"]
+    pool_stacks = [s for s in profile["stacks"] if s["stack"].startswith("query-pool")]
+    assert any(s["stack"].endswith(":busy_pool_work") for s in pool_stacks)
+
+def test_trace_endpoint(client, tmp_path):
+    ingest(write_files(tmp_path))
+    response = client.post("/api/qa/query", json={"question": "What is word3 about?"}, headers={"X-Trace": "1"})
+    assert response.status_code == 200
+    trace_id = response.headers["X-Trace-Id"]
+    assert response.json()["trace_id"] == trace_id
+
+    trace = client.get(f"/api/qa/traces/{trace_id}").json()
+    assert trace["root"]["name"] == "POST /qa/query"
+    [query] = trace["root"]["children"]
+    assert query["name"] == "qa.query"
+    assert {"retriever.retrieve", "llm.synthesize"} <= {span["name"] for span in query["children"]}
+
+    assert client.get("/api/qa/traces/missing").status_code == 404
+    untraced = client.post("/api/qa/query", json={"question": "What is word3 about?"})
+    assert "trace_id" not in untraced.json()
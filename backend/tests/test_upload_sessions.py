@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from config.settings import settings
+from services.upload_sessions import ChunkTooLargeError, UploadIncompleteError, UploadSessionManager
+
+CHUNK_SIZE = 4
+CONTENT = b"resumable upload!"
+
+@pytest.fixture
+def manager(fake_backend, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return UploadSessionManager(chunk_size=CHUNK_SIZE)
+
+def put(manager, upload_id, index, data=None, checksum=None):
+    start = index * CHUNK_SIZE
+    data = CONTENT[start:start + CHUNK_SIZE] if data is None else data
+    content_range = f"bytes {start}-{start + len(data) - 1}/{len(CONTENT)}"
+    checksum = checksum or hashlib.sha256(data).hexdigest()
+    return asyncio.run(manager.write_chunk(upload_id, content_range, data, checksum))
+
+def create(manager, sha256=None):
+    return asyncio.run(manager.create_session("notes.txt", len(CONTENT), "vector_store", sha256))
+
+def test_chunks_in_any_order_assemble_the_file(manager, tmp_path):
+    session = create(manager, hashlib.sha256(CONTENT).hexdigest())
+    assert session["total_chunks"] == 5
+
+    for index in [4, 0, 2]:
+        status = put(manager, session["upload_id"], index)
+    assert status["missing_chunks"] == [1, 3]
+    assert status["received_offset"] == CHUNK_SIZE
+    with pytest.raises(UploadIncompleteError):
+        asyncio.run(manager.finalize(session["upload_id"]))
+
+    put(manager, session["upload_id"], 1)
+    status = put(manager, session["upload_id"], 3)
+    assert status["missing_chunks"] == [] and status["received_bytes"] == len(CONTENT)
+
+    finalized = asyncio.run(manager.finalize(session["upload_id"]))
+    assert finalized["file_path"] == str(tmp_path / "notes.txt")
+    assert (tmp_path / "notes.txt").read_bytes() == CONTENT
+    with pytest.raises(ValueError):
+        asyncio.run(manager.finalize(session["upload_id"]))
+
+def test_resent_chunk_is_idempotent(manager):
+    session = create(manager)
+    put(manager, session["upload_id"], 0)
+    status = put(manager, session["upload_id"], 0)
+    assert status["received_chunks"] == [0]
+
+def test_bad_chunks_are_rejected(manager):
+    upload_id = create(manager)["upload_id"]
+    with pytest.raises(ValueError, match="checksum"):
+        put(manager, upload_id, 0, checksum="0" * 64)
+    with pytest.raises(ValueError, match="one 4-byte chunk"):
+        put(manager, upload_id, 0, data=CONTENT[:3])
+    with pytest.raises(ValueError, match="Content-Range"):
+        asyncio.run(manager.write_chunk(upload_id, "bytes=0-3", CONTENT[:4], "x"))
+    assert asyncio.run(manager.get_status(upload_id))["received_chunks"] == []
+    assert asyncio.run(manager.write_chunk("missing", "bytes 0-3/17", CONTENT[:4], "x")) is None
+
+def test_file_checksum_is_checked_on_finalize(manager):
+    upload_id = create(manager, "0" * 64)["upload_id"]
+    for index in range(5):
+        put(manager, upload_id, index)
+    with pytest.raises(ValueError, match="File checksum"):
+        asyncio.run(manager.finalize(upload_id))
+
+def test_read_chunk_stops_at_chunk_size(manager):
+    async def body(pieces):
+        for piece in pieces:
+            yield piece
+
+    assert asyncio.run(manager.read_chunk(body([b"ab", b"cd"]))) == b"abcd"
+    with pytest.raises(ChunkTooLargeError):
+        asyncio.run(manager.read_chunk(body([b"ab", b"cd", b"e", b"never read"])))
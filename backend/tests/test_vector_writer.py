@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from config.settings import settings
+from rag.vector_writer import DUPLICATE_KEY_ERROR, BulkVectorWriter
+
+class UniqueIdCollection:
+    """Collection with a unique ``id`` index whose first calls fail as scripted"""
+
+    def __init__(self, failures):
+        self.rows = {}
+        self.failures = list(failures)
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == "reconnect_after_half":
+            # The connection drops after the server applied part of the batch
+            for document in documents[:len(documents) // 2]:
+                self.rows.setdefault(document["id"], document)
+            raise AutoReconnect("connection reset")
+
+        errors = []
+        for i, document in enumerate(documents):
+            if failure == "validation" and i == 0:
+                errors.append({"index": i, "code": 121, "errmsg": "Document failed validation"})
+            elif failure == "stepdown" and i == 0:
+                errors.append({"index": i, "code": 189, "errmsg": "Primary stepped down"})
+            elif document["id"] in self.rows:
+                errors.append({"index": i, "code": DUPLICATE_KEY_ERROR, "errmsg": "duplicate key"})
+            else:
+                self.rows[document["id"]] = document
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+        return type("Result", (), {"inserted_ids": [d["id"] for d in documents]})()
+
+def documents(n):
+    return [{"id": f"node-{i}", "embedding": [0.0], "text": "", "metadata": {}} for i in range(n)]
+
+def write(collection, batch, max_retries=3):
+    stats = {"written": 0, "batches": 1, "retried_batches": 0}
+    asyncio.run(BulkVectorWriter(max_retries=max_retries)._write_with_retry(collection, batch, stats))
+    return stats
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_WRITE_RETRY_BACKOFF_S", 0.0)
+
+def test_resent_batch_after_partial_apply_stores_each_node_once():
+    collection = UniqueIdCollection(["reconnect_after_half"])
+    stats = write(collection, documents(10))
+    assert sorted(collection.rows) == sorted(d["id"] for d in documents(10))
+    assert stats["written"] == 10
+    assert stats["retried_batches"] == 1
+
+def test_transient_write_errors_retry_only_failed_documents():
+    collection = UniqueIdCollection(["stepdown"])
+    stats = write(collection, documents(4))
+    assert len(collection.rows) == 4
+    assert stats == {"written": 4, "batches": 1, "retried_batches": 1}
+
+def test_non_transient_write_errors_are_not_retried():
+    collection = UniqueIdCollection(["validation"])
+    with pytest.raises(BulkWriteError):
+        write(collection, documents(4))
+    assert collection.calls == 1
+
+def test_negative_max_retries_still_attempts_once():
+    collection = UniqueIdCollection(["reconnect_after_half"])
+    with pytest.raises(AutoReconnect):
+        write(collection, documents(2), max_retries=-1)
+    assert collection.calls == 1
+
+def test_documents_keep_the_uploaded_document_id_for_filters():
+    from llama_index.core.schema import NodeRelationship, RelatedNodeInfo, TextNode
+
+    node = TextNode(id_="chunk-1", text="text", embedding=[0.1], metadata={"document_id": "doc-1", "filename": "a.txt"})
+    node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id="doc-1:0")
+    document = BulkVectorWriter()._to_document(node, vector_store=None)
+    assert document["metadata"]["document_id"] == "doc-1"
+    assert document["metadata"]["ref_doc_id"] == "doc-1:0"
@@ -1,6 +1,9 @@
 import { useState, useEffect } from 'react';
 import { documentService, type Document } from '../services/api';
 
+const PAGE_SIZE = 50;
+const LIST_FIELDS = ['document_id', 'filename', 'status', 'indexing_strategy'];
+
 interface DocumentListProps {
   onDelete: () => void;
   refresh: boolean;
@@ -10,14 +13,19 @@ export const DocumentList = ({ onDelete, refresh }: DocumentListProps) => {
   const [documents, setDocuments] = useState<Document[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [total, setTotal] = useState(0);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   const fetchDocuments = async () => {
     setIsLoading(true);
     setError(null);
     
     try {
-      const response = await documentService.listDocuments();
+      const response = await documentService.listDocuments({ limit: PAGE_SIZE, fields: LIST_FIELDS });
       setDocuments(response.documents || []);
+      setNextCursor(response.next_cursor);
+      setTotal(response.total);
     } catch (error) {
       console.error('Failed to fetch documents:', error);
       setError('Failed to load documents.');
@@ -26,6 +34,23 @@ export const DocumentList = ({ onDelete, refresh }: DocumentListProps) => {
     }
   };
 
+  const fetchMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+
+    try {
+      const response = await documentService.listDocuments({ limit: PAGE_SIZE, cursor: nextCursor, fields: LIST_FIELDS });
+      setDocuments(prev => [...prev, ...(response.documents || [])]);
+      setNextCursor(response.next_cursor);
+      setTotal(response.total);
+    } catch (error) {
+      console.error('Failed to fetch more documents:', error);
+      setError('Failed to load documents.');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchDocuments();
   }, [refresh]);
@@ -57,7 +82,7 @@ export const DocumentList = ({ onDelete, refresh }: DocumentListProps) => {
 
   return (
     <div className="document-list">
-      <h2 className="text-xl font-semibold mb-4">Uploaded Documents</h2>
+      <h2 className="text-xl font-semibold mb-4">Uploaded Documents ({total})</h2>
       <div className="overflow-x-auto">
         <table className="min-w-full divide-y divide-gray-200">
           <thead className="bg-gray-50">
@@ -95,6 +120,15 @@ export const DocumentList = ({ onDelete, refresh }: DocumentListProps) => {
           </tbody>
         </table>
       </div>
+      {nextCursor && (
+        <button
+          onClick={fetchMore}
+          disabled={isLoadingMore}
+          className="mt-4 w-full py-2 px-4 border rounded-md text-sm hover:bg-gray-50 disabled:opacity-50"
+        >
+          {isLoadingMore ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 };
\ No newline at end of file
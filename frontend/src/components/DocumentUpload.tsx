@@ -10,6 +10,7 @@ export const DocumentUpload = ({ onUploadComplete }: DocumentUploadProps) => {
   const [strategy, setStrategy] = useState<string>('vector_store');
   const [isUploading, setIsUploading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [progress, setProgress] = useState<Record<string, number>>({});
   const [strategies, setStrategies] = useState<string[]>(['vector_store', 'sentence_window']);
 
   // Fetch available strategies on component mount
@@ -47,12 +48,22 @@ export const DocumentUpload = ({ onUploadComplete }: DocumentUploadProps) => {
     setError(null);
     
     try {
-      await documentService.uploadDocuments(files, strategy);
-      setFiles([]);
+      // Files already uploaded in an earlier attempt are dropped from the list,
+      // and an interrupted file resumes from the chunks the server already has
+      const remaining = [...files];
+      while (remaining.length > 0) {
+        const file = remaining[0];
+        await documentService.uploadDocumentResumable(file, strategy, ({ uploadedBytes, totalBytes }) => {
+          setProgress(current => ({ ...current, [file.name]: Math.round((uploadedBytes / totalBytes) * 100) }));
+        });
+        remaining.shift();
+        setFiles([...remaining]);
+      }
+      setProgress({});
       onUploadComplete();
     } catch (error) {
       console.error('Upload failed:', error);
-      setError('Failed to upload documents. Please try again.');
+      setError('Upload interrupted. Press Upload again to resume where it stopped.');
     } finally {
       setIsUploading(false);
     }
@@ -105,7 +116,10 @@ export const DocumentUpload = ({ onUploadComplete }: DocumentUploadProps) => {
             <p className="text-sm font-medium">Selected Files:</p>
             <ul className="text-sm">
               {files.map((file, index) => (
-                <li key={index}>{file.name}</li>
+                <li key={index}>
+                  {file.name}
+                  {progress[file.name] !== undefined && ` (${progress[file.name]}%)`}
+                </li>
               ))}
             </ul>
           </div>
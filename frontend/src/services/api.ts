@@ -9,6 +9,12 @@ const api = axios.create({
   },
 });
 
+// Tenant namespace sent with every request; without it the server uses the default tenant
+const TENANT_ID = import.meta.env.VITE_TENANT_ID;
+if (TENANT_ID) {
+  api.defaults.headers.common['X-Tenant-Id'] = TENANT_ID;
+}
+
 export interface Document {
   document_id: string;
   filename: string;
@@ -18,6 +24,39 @@ export interface Document {
   indexing_strategy: string;
 }
 
+export interface ListDocumentsParams {
+  limit?: number;
+  cursor?: string | null;
+  strategy?: string;
+  status?: string;
+  fields?: string[];
+}
+
+export interface DocumentPage {
+  documents: Document[];
+  total: number;
+  next_cursor: string | null;
+}
+
+export interface UploadSession {
+  upload_id: string;
+  chunk_size: number;
+  total_chunks: number;
+  received_chunks?: number[];
+  status?: string;
+}
+
+export interface UploadProgress {
+  uploadedBytes: number;
+  totalBytes: number;
+}
+
+export interface DocumentFilter {
+  document_ids?: string[];
+  filename?: string;
+  file_type?: string;
+}
+
 export interface QueryResponse {
   answer: string;
   sources: Array<{
@@ -28,9 +67,84 @@ export interface QueryResponse {
   }>;
   strategy: string;
   evaluation_enabled: boolean;
+  routed_documents?: number | null;
   metrics?: any;
 }
 
+// Responses of ETag-enabled GET endpoints, revalidated with If-None-Match.
+// A 304 costs the server one version lookup and carries no body.
+const etagCache = new Map<string, { etag: string; data: any }>();
+
+export const setTenant = (tenantId: string | null) => {
+  if (tenantId) {
+    api.defaults.headers.common['X-Tenant-Id'] = tenantId;
+  } else {
+    delete api.defaults.headers.common['X-Tenant-Id'];
+  }
+  etagCache.clear();
+};
+
+const cachedGet = async <T>(url: string, params: Record<string, any> = {}): Promise<T> => {
+  const key = `${url}?${JSON.stringify(params)}`;
+  const cached = etagCache.get(key);
+  const response = await api.get(url, {
+    params,
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: status => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304 && cached) {
+    return cached.data as T;
+  }
+  const etag = response.headers['etag'];
+  if (etag) {
+    etagCache.set(key, { etag, data: response.data });
+  }
+  return response.data as T;
+};
+
+// Resumable uploads: chunks in flight per file, and attempts per chunk
+const UPLOAD_CONCURRENCY = 3;
+const CHUNK_ATTEMPTS = 4;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+const sha256Hex = async (data: ArrayBuffer) => {
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+// Wait as long as the server asks on 429, otherwise back off exponentially
+const retryDelayMs = (error: any, attempt: number) => {
+  const retryAfter = Number(error?.response?.headers?.['retry-after']);
+  return retryAfter > 0 ? retryAfter * 1000 : 500 * 2 ** attempt;
+};
+
+// Session ids are remembered per file so a failed upload resumes where it stopped
+const uploadSessionKey = (file: File, indexingStrategy: string) =>
+  `upload:${file.name}:${file.size}:${file.lastModified}:${indexingStrategy}`;
+
+const resumeOrCreateSession = async (file: File, indexingStrategy: string): Promise<UploadSession> => {
+  const key = uploadSessionKey(file, indexingStrategy);
+  const savedId = localStorage.getItem(key);
+  if (savedId) {
+    try {
+      const response = await api.get(`/documents/uploads/${savedId}`);
+      if (response.data.status === 'uploading') {
+        return response.data as UploadSession;
+      }
+    } catch (error) {
+      console.warn('Could not resume upload, starting over:', error);
+    }
+  }
+  const response = await api.post('/documents/uploads', {
+    filename: file.name,
+    size: file.size,
+    indexing_strategy: indexingStrategy,
+  });
+  localStorage.setItem(key, response.data.upload_id);
+  return { ...response.data, received_chunks: [] } as UploadSession;
+};
+
 export const documentService = {
   uploadDocuments: async (files: File[], indexingStrategy: string) => {
     const formData = new FormData();
@@ -45,44 +159,93 @@ export const documentService = {
     return response.data;
   },
   
-  listDocuments: async () => {
-    const response = await api.get('/documents/list');
+  uploadDocumentResumable: async (file: File, indexingStrategy: string, onProgress?: (progress: UploadProgress) => void) => {
+    const session = await resumeOrCreateSession(file, indexingStrategy);
+    const chunkBounds = (index: number) => [index * session.chunk_size, Math.min((index + 1) * session.chunk_size, file.size)];
+
+    const received = new Set(session.received_chunks || []);
+    const pending = Array.from({ length: session.total_chunks }, (_, i) => i).filter(i => !received.has(i));
+    let uploadedBytes = Array.from(received).reduce((sum, i) => sum + chunkBounds(i)[1] - chunkBounds(i)[0], 0);
+    onProgress?.({ uploadedBytes, totalBytes: file.size });
+
+    const putChunk = async (index: number) => {
+      const [start, end] = chunkBounds(index);
+      const data = await file.slice(start, end).arrayBuffer();
+      const checksum = await sha256Hex(data);
+      for (let attempt = 0; ; attempt++) {
+        try {
+          await api.put(`/documents/uploads/${session.upload_id}`, data, {
+            headers: {
+              'Content-Type': 'application/octet-stream',
+              'Content-Range': `bytes ${start}-${end - 1}/${file.size}`,
+              'X-Chunk-SHA256': checksum,
+            },
+          });
+          break;
+        } catch (error) {
+          if (attempt + 1 >= CHUNK_ATTEMPTS) throw error;
+          await sleep(retryDelayMs(error, attempt));
+        }
+      }
+      uploadedBytes += end - start;
+      onProgress?.({ uploadedBytes, totalBytes: file.size });
+    };
+
+    const workers = Array.from({ length: Math.min(UPLOAD_CONCURRENCY, pending.length) }, async () => {
+      for (let index = pending.shift(); index !== undefined; index = pending.shift()) {
+        await putChunk(index);
+      }
+    });
+    await Promise.all(workers);
+
+    const response = await api.post(`/documents/uploads/${session.upload_id}/complete`);
+    localStorage.removeItem(uploadSessionKey(file, indexingStrategy));
     return response.data;
   },
   
+  listDocuments: async (params: ListDocumentsParams = {}) => {
+    return cachedGet<DocumentPage>('/documents/list', {
+      limit: params.limit,
+      cursor: params.cursor || undefined,
+      strategy: params.strategy,
+      status: params.status,
+      fields: params.fields?.join(','),
+    });
+  },
+  
   deleteDocument: async (documentId: string) => {
     const response = await api.delete(`/documents/${documentId}`);
     return response.data;
   },
   
   getIndexingStrategies: async () => {
-    const response = await api.get('/documents/strategies');
-    return response.data;
+    return cachedGet<any>('/documents/strategies');
   },
 };
 
 export const qaService = {
-  queryDocuments: async (question: string, strategy: string, similarityTopK: number = 5, enableEvaluation: boolean = false) => {
+  queryDocuments: async (question: string, strategy: string, similarityTopK: number = 5, enableEvaluation: boolean = false, filter: DocumentFilter = {}) => {
     const response = await api.post('/qa/query', {
       question,
       strategy,
       similarity_top_k: similarityTopK,
       enable_evaluation: enableEvaluation,
+      ...filter,
     });
     return response.data as QueryResponse;
   },
   
-  compareStrategies: async (question: string, strategies: string[] = ['vector_store', 'sentence_window'], similarityTopK: number = 5) => {
+  compareStrategies: async (question: string, strategies: string[] = ['vector_store', 'sentence_window'], similarityTopK: number = 5, filter: DocumentFilter = {}) => {
     const response = await api.post('/qa/compare', {
       question,
       strategies,
       similarity_top_k: similarityTopK,
+      ...filter,
     });
     return response.data;
   },
   
   getAvailableStrategies: async () => {
-    const response = await api.get('/qa/strategies');
-    return response.data;
+    return cachedGet<any>('/qa/strategies');
   },
 };
\ No newline at end of file